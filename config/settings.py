@@ -12,14 +12,17 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
-import dj_database_url
-from dotenv import load_dotenv
-
-load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Local development reads a .env file; deployments set real environment variables,
+# so they skip importing python-dotenv and its search for the file.
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / ".env")
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
@@ -36,9 +39,28 @@ DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
 # reCAPTCHA v2 keys (no defaults; must be set via environment variables)
 RECAPTCHA_SITE_KEY = os.environ.get("RECAPTCHA_SITE_KEY")
 RECAPTCHA_SECRET_KEY = os.environ.get("RECAPTCHA_SECRET_KEY")
+RECAPTCHA_VERIFY_URL = os.environ.get(
+    "RECAPTCHA_VERIFY_URL",
+    "https://www.google.com/recaptcha/api/siteverify",
+)
+RECAPTCHA_TIMEOUT = float(os.environ.get("RECAPTCHA_TIMEOUT", "8"))
 
 # Google Places API
 GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY")
+GOOGLE_PLACES_DETAILS_URL = os.environ.get(
+    "GOOGLE_PLACES_DETAILS_URL",
+    "https://maps.googleapis.com/maps/api/place/details/json",
+)
+
+# Geocoder used by `manage.py geocode_businesses`: a dotted path to a class with
+# geocode(address) -> (lat, lng) | None. The stub needs no network or key.
+GEOCODER = os.environ.get("GEOCODER", "directory.geocoders.GoogleGeocoder")
+GOOGLE_GEOCODE_URL = os.environ.get(
+    "GOOGLE_GEOCODE_URL", "https://maps.googleapis.com/maps/api/geocode/json"
+)
+# "Also nearby" suggestions on the detail page, and the /nearby/ default and maximum radius.
+NEARBY_RADIUS_KM = float(os.environ.get("NEARBY_RADIUS_KM", "1.5"))
+NEARBY_MAX_RADIUS_KM = float(os.environ.get("NEARBY_MAX_RADIUS_KM", "25"))
 
 # Email (env vars only)
 EMAIL_BACKEND = os.environ.get(
@@ -91,7 +113,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so its timings cover every other middleware.
+    "directory.instrumentation.PerformanceMiddleware",
     'django.middleware.security.SecurityMiddleware',
+    # Picks primary or replica per request; outside sessions so session saves pin the visitor.
+    "directory.routing.ReplicaMiddleware",
+    # Serves crawlers precomputed pages and keeps them off the chatbot and Google.
+    "directory.crawlers.CrawlerMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -106,7 +134,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for the performance middleware.
+        'BACKEND': 'directory.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -129,25 +158,195 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Allow a single DATABASE_URL for hosted deployments.
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
+# Connection reuse. DB_POOL=true switches to psycopg 3's pool (one pool per worker
+# process, so the server sees up to workers x DB_POOL_MAX_SIZE connections); otherwise
+# each thread keeps a persistent connection for DB_CONN_MAX_AGE seconds, health-checked
+# before reuse so a connection dropped by the server doesn't fail the next request.
+DB_POOL = os.environ.get("DB_POOL", "false").lower() == "true"
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "4"))
+# Seconds a request waits for a free pooled connection before erroring.
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", "600"))
+DB_CONN_HEALTH_CHECKS = os.environ.get("DB_CONN_HEALTH_CHECKS", "true").lower() == "true"
+
 if DATABASE_URL:
+    import dj_database_url
+
     # Render / production (Postgres)
     DATABASES = {
         "default": dj_database_url.parse(
             DATABASE_URL,
-            conn_max_age=600,
+            # Django's pool manages connection lifetime itself and rejects persistent connections.
+            conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
             ssl_require=not DEBUG,
         )
     }
+    if DB_POOL:
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+        }
 else:
-    # Local dev (SQLite)
+    # Local dev (SQLite); SQLITE_PATH points servers elsewhere (e.g. the load-test database).
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        }
+    }
+
+# Read replicas: comma-separated database URLs. Views marked replica_reads (home, news,
+# business detail, bookmarks, nearby) read from a replica at most REPLICA_MAX_LAG seconds
+# behind, re-checked every REPLICA_LAG_CHECK_INTERVAL seconds; a visitor who writes is
+# pinned to the primary for REPLICA_PIN_SECONDS so they see their own changes.
+DATABASE_REPLICA_URLS = [u.strip() for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", "5"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", "5"))
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", "15"))
+DATABASE_REPLICAS = []
+if DATABASE_REPLICA_URLS:
+    import dj_database_url
+for n, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    alias = f"replica_{n}"
+    DATABASES[alias] = dj_database_url.parse(
+        replica_url,
+        conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        ssl_require=not DEBUG,
+    )
+    if "pool" in DATABASES["default"].get("OPTIONS", {}):
+        DATABASES[alias].setdefault("OPTIONS", {})["pool"] = DATABASES["default"]["OPTIONS"]["pool"]
+    # Test runs treat it as the primary rather than creating a second test database.
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["directory.routing.ReplicaRouter"]
+
+# Cache shared by all workers/instances when REDIS_URL is set (rate limits, token
+# accounting, response caches); falls back to per-process memory for local dev, which
+# the directory.W001 system check flags outside DEBUG.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         }
     }
 
+# Sessions only exist for visitors who bookmark (or admins). With a shared cache the
+# cached_db engine serves those reads from Redis; per-process memory caches would go stale
+# across workers, so plain db is the fallback.
+SESSION_ENGINE = os.environ.get(
+    "SESSION_ENGINE",
+    "django.contrib.sessions.backends.cached_db" if REDIS_URL else "django.contrib.sessions.backends.db",
+)
+
+# Number of trusted reverse proxies in front of the app (Render adds one).
+NUM_PROXIES = int(os.environ.get("NUM_PROXIES", "0"))
+
+# Chatbot abuse and cost controls.
+# (max requests, window seconds) applied per client IP and per session.
+CHATBOT_RATE_LIMITS = [
+    (int(os.environ.get("CHATBOT_RATE_PER_MINUTE", "6")), 60),
+    (int(os.environ.get("CHATBOT_RATE_PER_DAY", "100")), 60 * 60 * 24),
+]
+# Concurrent model calls allowed across all workers, and how many may wait (and for how long).
+CHATBOT_MAX_CONCURRENT = int(os.environ.get("CHATBOT_MAX_CONCURRENT", "4"))
+CHATBOT_QUEUE_SIZE = int(os.environ.get("CHATBOT_QUEUE_SIZE", "8"))
+CHATBOT_QUEUE_TIMEOUT = float(os.environ.get("CHATBOT_QUEUE_TIMEOUT", "5"))
+# Input + output tokens allowed per UTC day before the chatbot returns 429.
+CHATBOT_DAILY_TOKEN_BUDGET = int(os.environ.get("CHATBOT_DAILY_TOKEN_BUDGET", "2000000"))
+
+# Chatbot reply cache: general answers live for CHATBOT_CACHE_TTL, questions about
+# conditions (roads, weather, alerts) for CHATBOT_CACHE_NEWS_TTL. Similarity is the
+# trigram Jaccard threshold for near-duplicate matches (0 disables).
+CHATBOT_CACHE_ENABLED = os.environ.get("CHATBOT_CACHE_ENABLED", "true").lower() == "true"
+CHATBOT_CACHE_TTL = int(os.environ.get("CHATBOT_CACHE_TTL", str(60 * 60 * 6)))
+CHATBOT_CACHE_NEWS_TTL = int(os.environ.get("CHATBOT_CACHE_NEWS_TTL", str(60 * 15)))
+CHATBOT_CACHE_SIMILARITY = float(os.environ.get("CHATBOT_CACHE_SIMILARITY", "0.8"))
+
+# Chatbot conversation memory: idle conversations expire after CHATBOT_CONVERSATION_TTL
+# seconds. Once a conversation's estimated history passes CHATBOT_HISTORY_TOKEN_BUDGET tokens,
+# all but the last CHATBOT_HISTORY_KEEP_TURNS exchanges are folded into a rolling summary.
+CHATBOT_CONVERSATION_TTL = int(os.environ.get("CHATBOT_CONVERSATION_TTL", str(60 * 60 * 2)))
+CHATBOT_HISTORY_TOKEN_BUDGET = int(os.environ.get("CHATBOT_HISTORY_TOKEN_BUDGET", "1500"))
+CHATBOT_HISTORY_KEEP_TURNS = int(os.environ.get("CHATBOT_HISTORY_KEEP_TURNS", "2"))
+
+# Review submissions: (max reviews, window seconds) per client IP and per business.
+REVIEW_RATE_LIMITS = [
+    (int(os.environ.get("REVIEW_RATE_PER_HOUR", "5")), 60 * 60),
+    (int(os.environ.get("REVIEW_RATE_PER_DAY", "20")), 60 * 60 * 24),
+]
+REVIEW_BUSINESS_RATE_LIMITS = [
+    (int(os.environ.get("REVIEW_BUSINESS_RATE_PER_HOUR", "30")), 60 * 60),
+]
+# REVIEW_STAGING=true lands submissions in a staging table that a job moves into Review
+# in bulk REVIEW_STAGING_FLUSH_DELAY seconds later, so bursts invalidate caches once.
+REVIEW_STAGING = os.environ.get("REVIEW_STAGING", "false").lower() == "true"
+REVIEW_STAGING_FLUSH_DELAY = int(os.environ.get("REVIEW_STAGING_FLUSH_DELAY", "30"))
+REVIEW_STAGING_BATCH_SIZE = int(os.environ.get("REVIEW_STAGING_BATCH_SIZE", "500"))
+
+# Background job retention: `run_jobs` deletes done jobs after JOB_DONE_RETENTION_HOURS and
+# dead letters (kept longer for inspection) after JOB_DEAD_RETENTION_DAYS.
+JOB_DONE_RETENTION_HOURS = int(os.environ.get("JOB_DONE_RETENTION_HOURS", "24"))
+JOB_DEAD_RETENTION_DAYS = int(os.environ.get("JOB_DEAD_RETENTION_DAYS", "30"))
+
+# Cross-process invalidation bus: listing changes that affect cached Google details are
+# written to an event table (plus a Postgres NOTIFY) and each gunicorn worker's listener
+# thread drops its in-process copies.
+# Workers poll the table every INVALIDATION_POLL_INTERVAL seconds, which bounds staleness
+# when LISTEN is unavailable (SQLite) or a notification is missed.
+INVALIDATION_BUS = os.environ.get("INVALIDATION_BUS", "true").lower() == "true"
+INVALIDATION_LISTEN = os.environ.get("INVALIDATION_LISTEN", "true").lower() == "true"
+INVALIDATION_POLL_INTERVAL = float(os.environ.get("INVALIDATION_POLL_INTERVAL", "5"))
+
+# Request performance instrumentation.
+# Server-Timing headers reveal internals, so they're opt-in outside DEBUG.
+PERF_SERVER_TIMING = os.environ.get("PERF_SERVER_TIMING", str(DEBUG)).lower() == "true"
+# Addresses allowed to scrape /metrics/ (Prometheus text format).
+METRICS_ALLOWED_IPS = [
+    ip.strip()
+    for ip in os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if ip.strip()
+]
+
+# Per-view/changelist query budgets: "raise", "log" (production default) or "off".
+QUERY_BUDGET_MODE = os.environ.get("QUERY_BUDGET_MODE", "raise" if DEBUG else "log").lower()
 
+# One structured timing line per request, on the "directory.requests" logger. On by default
+# in production; off under DEBUG so local runs aren't flooded.
+PERF_REQUEST_LOG = os.environ.get("PERF_REQUEST_LOG", str(not DEBUG)).lower() == "true"
+
+# Performance events (budget overruns, replica fallbacks, chatbot turns) go to "directory.perf".
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "directory.perf": {
+            "handlers": ["console"],
+            "level": os.environ.get("PERF_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+        "directory.requests": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
 
 
 # Password validation
@@ -189,9 +388,35 @@ STATIC_URL = '/static/'
 # Collected static files directory for production.
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-# Enable WhiteNoise compressed static file storage.
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# collectstatic is the front-end build: our CSS/JS is minified, then WhiteNoise writes
+# content-hashed names and .gz/.br copies (see directory.assets).
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "directory.assets.MinifiedCompressedManifestStaticFilesStorage"},
+}
 
 # Media uploads stored alongside the project.
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# News image thumbnails (`manage.py cache_news_images`): download limits and the total
+# size of the local thumbnail cache before least recently used images are evicted.
+NEWS_IMAGE_TIMEOUT = float(os.environ.get("NEWS_IMAGE_TIMEOUT", "10"))
+NEWS_IMAGE_MAX_DOWNLOAD_BYTES = int(os.environ.get("NEWS_IMAGE_MAX_DOWNLOAD_BYTES", str(10 * 1024 * 1024)))
+NEWS_IMAGE_CACHE_MAX_BYTES = int(os.environ.get("NEWS_IMAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Posts published more than this many days ago are moved to the archive table by
+# `manage.py archive_news`; their guids are remembered so feeds never re-import them.
+NEWS_RETENTION_DAYS = int(os.environ.get("NEWS_RETENTION_DAYS", "180"))
+
+# Production media serving: "nginx" (X-Accel-Redirect) or "apache" (X-Sendfile) hands
+# the transfer to the front proxy; empty streams from Django with Range/ETag support.
+MEDIA_SENDFILE = os.environ.get("MEDIA_SENDFILE", "").lower()
+# Internal location the proxy maps to MEDIA_ROOT when MEDIA_SENDFILE="nginx".
+MEDIA_ACCEL_PREFIX = os.environ.get("MEDIA_ACCEL_PREFIX", "/protected-media/")
+# Browser cache lifetime (seconds) for media without a content hash in the name.
+MEDIA_CACHE_MAX_AGE = int(os.environ.get("MEDIA_CACHE_MAX_AGE", "3600"))
+
+# Output directory for `manage.py render_static` (pre-compressed pages for a CDN or the
+# front proxy). When set, data changes queue an incremental re-render.
+STATIC_RENDER_ROOT = os.environ.get("STATIC_RENDER_ROOT")
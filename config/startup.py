@@ -0,0 +1,33 @@
+"""
+Process warm-up for preforking servers.
+
+With gunicorn's preload_app the master imports the WSGI app once and then forks
+workers, which share the already-imported modules copy-on-write. warm_up() pulls
+in everything a first request would otherwise import lazily in each worker.
+"""
+
+import importlib
+
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+# Heavy SDKs the views import lazily; in a preloaded master they're imported once for all workers.
+PRELOAD_MODULES = ("anthropic", "feedparser")
+# Templates compiled into the cached loader before forking.
+PRELOAD_TEMPLATES = (
+    "home.html",
+    "business_detail.html",
+    "directory/news.html",
+    "directory/bookmarks.html",
+    "directory/contact.html",
+)
+
+
+# Import views and SDKs and compile templates. Must not open database connections:
+# a connection (or pool) created in the master would be shared by every forked worker.
+def warm_up():
+    get_resolver().url_patterns
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    for name in PRELOAD_TEMPLATES:
+        get_template(name)
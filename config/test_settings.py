@@ -0,0 +1,33 @@
+"""
+Settings for the test suite.
+
+`manage.py test` uses them by default; other runners (pytest-django, `django-admin test`)
+select them with DJANGO_SETTINGS_MODULE=config.test_settings.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, LOGGING, STORAGES
+
+# A separate SQLite database standing in for a replica; tests opt into routing with
+# override_settings(DATABASE_REPLICAS=["replica"]).
+DATABASES["replica"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": BASE_DIR / "db-replica.sqlite3"}
+
+# Tests don't run collectstatic first, so pages use plain, unhashed static URLs.
+STORAGES = {**STORAGES, "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+
+# Every request a test makes must stay within its view's query budget.
+QUERY_BUDGET_MODE = "raise"
+
+# Keep the suite's output readable: no per-request timing lines, and perf events such as
+# chatbot turns aren't printed. Tests that check them capture the logger with assertLogs.
+PERF_REQUEST_LOG = False
+LOGGING = {
+    **LOGGING,
+    "loggers": {
+        **LOGGING["loggers"],
+        "directory.perf": {"handlers": [], "level": "CRITICAL", "propagate": False},
+    },
+}
+
+# The suite runs on per-process memory caches on purpose.
+SILENCED_SYSTEM_CHECKS = ["directory.W001"]
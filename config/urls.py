@@ -18,7 +18,8 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
+
+from directory.media import serve_media
 
 # Base routes: admin and the directory app.
 urlpatterns = [
@@ -30,7 +31,7 @@ if settings.DEBUG:
     # In development, serve media files directly.
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 else:
-    # In production, map /media/ to the media root without DEBUG.
+    # In production, serve /media/ with caching, Range support and optional proxy handoff.
     urlpatterns += [
-        re_path(r"^media/(?P<path>.*)$", serve, {"document_root": settings.MEDIA_ROOT}),
+        re_path(r"^media/(?P<path>.*)$", serve_media),
     ]
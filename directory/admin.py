@@ -1,8 +1,12 @@
 from django import forms
 from django.contrib import admin
 from django.core.validators import FileExtensionValidator
+from django.utils import timezone
 
-from .models import Business, Review, NewsPost
+from . import reviews
+from .models import Business, Job, Review, NewsImage, NewsPost, StagedReview
+from .pagination import EstimatedCountPaginator
+from .querybudget import QueryBudgetAdminMixin
 
 # Whitelistinggggggg.
 ALLOWED_IMAGE_EXTENSIONS = ["webp", "jpg", "jpeg", "png"]
@@ -27,10 +31,11 @@ class BusinessAdminForm(forms.ModelForm):
 
 # Admin configuration for business listings.
 @admin.register(Business)
-class BusinessAdmin(admin.ModelAdmin): # creates admin interface using django's method ModelAdmin
+class BusinessAdmin(QueryBudgetAdminMixin, admin.ModelAdmin): # creates admin interface using django's method ModelAdmin
     form = BusinessAdminForm
     list_display = ("name", "category", "website", "google_place_id")
     search_fields = ("name", "category")
+    changelist_query_budget = 3
     prepopulated_fields = {"slug": ("name",)}
     # Explicit field order to keep the edit form predictable.
     fields = (
@@ -49,17 +54,95 @@ class BusinessAdmin(admin.ModelAdmin): # creates admin interface using django's
 
 
 @admin.register(NewsPost)
-class NewsPostAdmin(admin.ModelAdmin):
+class NewsPostAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
     list_display = ("title", "source_name", "published_at", "is_published")
     list_filter = ("is_published", "source_name")
     search_fields = ("title", "summary")
     prepopulated_fields = {"slug": ("title",)}
     readonly_fields = ("guid",)
+    raw_id_fields = ("image",)
+    paginator = EstimatedCountPaginator
+    changelist_query_budget = 4
+
+
+# Cached news thumbnails; failed downloads show their error here.
+@admin.register(NewsImage)
+class NewsImageAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    list_display = ("source_url", "status", "size", "last_used_at")
+    list_filter = ("status",)
+    search_fields = ("source_url", "content_hash")
+    readonly_fields = ("content_hash", "size", "last_used_at", "error")
+    changelist_query_budget = 4
+
+
+# Fixed 1-5 choices; the default filter runs SELECT DISTINCT rating over every review.
+class RatingFilter(admin.SimpleListFilter):
+    title = "rating"
+    parameter_name = "rating"
+
+    def lookups(self, request, model_admin):
+        return [(str(n), f"{n} stars") for n in range(5, 0, -1)]
+
+    def queryset(self, request, queryset):
+        if self.value() in {str(n) for n in range(1, 6)}:
+            return queryset.filter(rating=int(self.value()))
+        return queryset
 
 
 # Admin configuration for review moderation.
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin): # references django's built in method to create admin interface
+class ReviewAdmin(QueryBudgetAdminMixin, admin.ModelAdmin): # references django's built in method to create admin interface
     list_display = ("business", "rating", "name", "is_approved", "created_at")
-    list_filter = ("is_approved", "rating", "created_at")
+    list_filter = ("is_approved", RatingFilter, "created_at")
+    search_fields = ("business__name", "name", "email", "comment")
+    # Review.__str__ reads business.name; join it instead of one query per row.
+    list_select_related = ("business",)
+    # Search-as-you-type instead of a <select> listing every business.
+    autocomplete_fields = ("business",)
+    # Large table: estimate the total and skip the second, unfiltered COUNT(*).
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ["approve_reviews", "reject_reviews"]
+    # Bulk moderation posts here too: session, user, the listings' updated_at, the review UPDATE,
+    # and dropping the home snapshot row plus the check for a pending rebuild.
+    changelist_query_budget = 6
+
+    @admin.action(description="Approve selected reviews")
+    def approve_reviews(self, request, queryset):
+        updated = reviews.set_approval(queryset, True)
+        self.message_user(request, f"Approved {updated} review(s).")
+
+    @admin.action(description="Reject (hide) selected reviews")
+    def reject_reviews(self, request, queryset):
+        updated = reviews.set_approval(queryset, False)
+        self.message_user(request, f"Rejected {updated} review(s).")
+
+
+# Submissions waiting for the next bulk flush (REVIEW_STAGING).
+@admin.register(StagedReview)
+class StagedReviewAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    list_display = ("business", "rating", "name", "created_at")
     search_fields = ("business__name", "name", "email", "comment")
+    list_select_related = ("business",)
+    autocomplete_fields = ("business",)
+    readonly_fields = ("submission_key", "created_at")
+    changelist_query_budget = 4
+
+
+# Job queue inspection, including dead letters that exhausted their retries.
+@admin.register(Job)
+class JobAdmin(QueryBudgetAdminMixin, admin.ModelAdmin):
+    list_display = ("task", "status", "attempts", "max_attempts", "run_after", "updated_at")
+    list_filter = ("status", "task")
+    readonly_fields = ("created_at", "updated_at", "locked_at", "last_error")
+    actions = ["retry_jobs"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    changelist_query_budget = 3
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=Job.STATUS_RUNNING).update(
+            status=Job.STATUS_PENDING, attempts=0, run_after=timezone.now(), locked_at=None
+        )
+        self.message_user(request, f"Requeued {updated} job(s).")
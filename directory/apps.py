@@ -4,3 +4,7 @@ from django.apps import AppConfig
 # App configuration for the directory Django app.
 class DirectoryConfig(AppConfig):
     name = 'directory'
+
+    def ready(self):
+        # Register model signal handlers (cache invalidation), background tasks and system checks.
+        from . import checks, signals, tasks  # noqa: F401
@@ -0,0 +1,136 @@
+import functools
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+# Only our own assets are minified; vendored ones (admin) ship as their authors built them.
+MINIFY_PREFIX = "directory/"
+
+# Rules whose selector starts with one of these paint above the fold on some page
+# (layout, nav, hero bands, headline ratings); they are inlined into every page's <head>.
+CRITICAL_SELECTORS = (
+    ":root",
+    "*",
+    "html",
+    "body",
+    ".container",
+    ".topnav",
+    ".band",
+    ".hero-inner",
+    ".home-",
+    ".sort-",
+    ".meta-chip",
+    ".btn",
+    ".detail-hero",
+    ".detail-overlay",
+    ".detail-shell",
+    ".backlink",
+    ".detail-header",
+    ".detail-brand",
+    ".detail-side",
+    ".detail-cta",
+    ".detail-logo",
+    ".detail-title",
+    ".detail-sub",
+    ".detail-rating",
+    ".rating-",
+    ".star-bar",
+    ".news-hero",
+)
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+
+
+# Conservative CSS minifier: drops comments and whitespace that can't matter. Spaces
+# around ":" are kept, since in a selector ".a :hover" differs from ".a:hover".
+def minify_css(text):
+    text = _CSS_COMMENT.sub("", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    return text.replace(";}", "}").strip()
+
+
+# Conservative JS minifier: drops indentation, blank lines and whole-line // comments but
+# keeps line breaks, so automatic semicolon insertion and string contents are untouched.
+def minify_js(text):
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//")) + "\n"
+
+
+# Top-level (prelude, body) pairs of a comment-free stylesheet.
+def _css_blocks(text):
+    depth, start, prelude = 0, 0, ""
+    for i, char in enumerate(text):
+        if char == "{":
+            if depth == 0:
+                prelude, start = text[start:i].strip(), i + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                yield prelude, text[start:i]
+                start = i + 1
+
+
+def _is_critical(prelude):
+    return any(sel.strip().startswith(CRITICAL_SELECTORS) for sel in prelude.split(","))
+
+
+# The above-the-fold subset of a stylesheet, keeping @media blocks that contain critical rules.
+def critical_css(text):
+    rules = []
+    for prelude, body in _css_blocks(_CSS_COMMENT.sub("", text)):
+        if prelude.startswith("@media"):
+            inner = "".join(f"{p}{{{b}}}" for p, b in _css_blocks(body) if _is_critical(p))
+            if inner:
+                rules.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@") or _is_critical(prelude):
+            rules.append(f"{prelude}{{{body}}}")
+    return minify_css("".join(rules))
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_critical_css(name):
+    with open(finders.find(name), encoding="utf-8") as fh:
+        return critical_css(fh.read())
+
+
+# Critical CSS for a static stylesheet; computed once per process (every time under DEBUG).
+def inline_critical_css(name):
+    if settings.DEBUG:
+        _cached_critical_css.cache_clear()
+    return _cached_critical_css(name)
+
+
+# Whether pages can resolve {% static %} names: outside DEBUG the manifest storage needs
+# the manifest `manage.py build_assets` writes. debug overrides settings.DEBUG (servers
+# started by load_test always run with DEBUG off).
+def static_manifest_ready(debug=None):
+    debug = settings.DEBUG if debug is None else debug
+    if debug or not hasattr(staticfiles_storage, "load_manifest"):
+        return True
+    return bool(staticfiles_storage.load_manifest()[0])
+
+
+# collectstatic backend: minify our CSS/JS in place, then let WhiteNoise hash the minified
+# files and write .gz/.br copies, so the manifest names and compressed bytes match.
+class MinifiedCompressedManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name in paths:
+                if name.startswith(MINIFY_PREFIX) and name.endswith((".css", ".js")):
+                    self._minify(name, minify_css if name.endswith(".css") else minify_js)
+                    # Hashing reads from the source storage; point it at the minified copy.
+                    paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _minify(self, name, minifier):
+        with open(self.path(name), encoding="utf-8") as fh:
+            source = fh.read()
+        minified = minifier(source)
+        if minified != source:
+            with open(self.path(name), "w", encoding="utf-8") as fh:
+                fh.write(minified)
@@ -0,0 +1,203 @@
+import itertools
+import json
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default per-upstream latency (seconds); the model call is by far the slowest.
+DEFAULT_LATENCY = {
+    "google": 0.03,
+    "recaptcha": 0.03,
+    "anthropic": 0.8,
+    "rss": 0.05,
+}
+
+
+# Local stand-ins for Google Places, reCAPTCHA, Anthropic and the county RSS feeds.
+class FakeUpstreams:
+    def __init__(self, latency=None, failure_rate=0.0, rss_items=20, seed=0):
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.failure_rate = failure_rate
+        self.rss_items = rss_items
+        self.requests = Counter()
+        self.failures = Counter()
+        self.response_bytes = Counter()
+        self._random = random.Random(seed)
+        self._rss_counter = itertools.count()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def google_url(self):
+        return f"{self.base_url}/maps/api/place/details/json"
+
+    @property
+    def recaptcha_url(self):
+        return f"{self.base_url}/recaptcha/api/siteverify"
+
+    @property
+    def anthropic_url(self):
+        return self.base_url
+
+    @property
+    def rss_url(self):
+        return f"{self.base_url}/rss"
+
+    def start(self):
+        upstreams = self
+
+        class Handler(_Handler):
+            fakes = upstreams
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Sleep for the upstream's latency and decide whether this call should fail.
+    def _simulate(self, name):
+        with self._lock:
+            self.requests[name] += 1
+            failed = self._random.random() < self.failure_rate
+            if failed:
+                self.failures[name] += 1
+        time.sleep(self.latency.get(name, 0))
+        return failed
+
+    def next_rss_batch(self):
+        with self._lock:
+            return next(self._rss_counter)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fakes = None
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean.
+        pass
+
+    def _send(self, status, payload, content_type="application/json"):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path == "/maps/api/place/details/json":
+            if self.fakes._simulate("google"):
+                return self._send(503, {"status": "UNKNOWN_ERROR", "error_message": "fake outage"})
+            query = urllib.parse.parse_qs(parsed.query)
+            place_id = query.get("place_id", [""])[0]
+            fields = query.get("fields", [""])[0].split(",")
+            body = json.dumps(_place_details(place_id, fields)).encode("utf-8")
+            with self.fakes._lock:
+                self.fakes.response_bytes["google"] += len(body)
+            return self._send(200, body)
+        if parsed.path == "/rss":
+            if self.fakes._simulate("rss"):
+                return self._send(503, b"unavailable", "text/plain")
+            batch = self.fakes.next_rss_batch()
+            return self._send(200, _rss_feed(batch, self.fakes.rss_items), "application/rss+xml")
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path.startswith("/recaptcha/api/siteverify"):
+            if self.fakes._simulate("recaptcha"):
+                return self._send(503, {"success": False})
+            return self._send(200, {"success": True, "hostname": "testserver"})
+        if self.path.startswith("/v1/messages"):
+            if self.fakes._simulate("anthropic"):
+                return self._send(
+                    529, {"type": "error", "error": {"type": "overloaded_error", "message": "fake"}}
+                )
+            return self._send(200, _message_response(body))
+        self._send(404, {"error": "not found"})
+
+
+# Place Details payload shaped like the legacy Places API response, honouring the field mask.
+def _place_details(place_id, fields):
+    seed = sum(map(ord, place_id)) or 1
+    result = {
+        "name": f"Place {place_id}",
+        "rating": round(3 + (seed % 20) / 10, 1),
+        "user_ratings_total": 10 + seed % 500,
+        "url": f"https://maps.google.com/?cid={seed}",
+        "reviews": [
+            {
+                "rating": 1 + (seed + i) % 5,
+                "authorAttribution": {"displayName": f"Reviewer {i}"},
+                "relativePublishTimeDescription": f"{i + 1} weeks ago",
+                "text": {"text": "Great spot in town. " * 8},
+                "googleMapsUri": f"https://maps.google.com/?review={seed}-{i}",
+            }
+            for i in range(5)
+        ],
+    }
+    return {"status": "OK", "result": {k: v for k, v in result.items() if k in fields}}
+
+
+# Messages API response with realistic token usage.
+def _message_response(body):
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError:
+        request = {}
+    prompt_chars = len(request.get("system") or "") + sum(
+        len(str(m.get("content", ""))) for m in request.get("messages", [])
+    )
+    return {
+        "id": "msg_bench",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model", "fake"),
+        "content": [{"type": "text", "text": "Try the coffee shop on Main Street!"}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": prompt_chars // 4, "output_tokens": 12},
+    }
+
+
+# RSS document whose guids change per batch so each fetch sees new items.
+def _rss_feed(batch, count):
+    items = "".join(
+        f"<item><title>Bench item {batch}-{i}</title>"
+        f"<link>https://example.com/news/{batch}-{i}</link>"
+        f"<guid>bench-{batch}-{i}</guid>"
+        f"<description>Synthetic county update {i}.</description>"
+        f"<pubDate>Mon, 05 Jan 2026 10:00:00 GMT</pubDate></item>"
+        for i in range(count)
+    )
+    return (
+        '<?xml version="1.0"?><rss version="2.0"><channel>'
+        f"<title>Bench feed</title>{items}</channel></rss>"
+    ).encode("utf-8")
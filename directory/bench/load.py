@@ -0,0 +1,368 @@
+import contextlib
+import http.cookiejar
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from .runner import HOME_SORTS, _percentile
+
+# Gunicorn setups to compare. All run config/gunicorn.conf.py (preload, recycling, warm-up)
+# with these overrides; uvicorn runs the ASGI app, where Django executes sync views on a
+# thread pool, and needs the uvicorn-worker package.
+WORKER_CONFIGS = {
+    "sync-2": {"worker_class": "sync", "workers": 2, "threads": 1},
+    "sync-4": {"worker_class": "sync", "workers": 4, "threads": 1},
+    "gthread-2x4": {"worker_class": "gthread", "workers": 2, "threads": 4},
+    "gthread-2x8": {"worker_class": "gthread", "workers": 2, "threads": 8},
+    "uvicorn-2": {
+        "worker_class": "uvicorn_worker.UvicornWorker",
+        "workers": 2,
+        "threads": 1,
+        "app": "config.asgi:application",
+        "requires": "uvicorn_worker",
+    },
+}
+
+# Share of simulated requests per route: mostly browsing, some bookmarking and chat.
+ROUTE_MIX = {
+    **{f"home_{sort}": weight for sort, weight in zip(HOME_SORTS, (20, 8, 7))},
+    "business_detail": 35,
+    "news": 12,
+    "bookmark_toggle": 10,
+    "chatbot": 8,
+}
+
+# Visitors ask a handful of common questions, so some hit the reply cache.
+CHAT_QUESTIONS = (
+    "Where can I get good coffee?",
+    "What's the best pizza in town?",
+    "Are any roads closed today?",
+    "Where should we stay for a weekend?",
+    "Which hot springs are open late?",
+    "Any deals on dinner tonight?",
+)
+
+# The model call alone takes most of a second, so the chatbot is judged by its error and
+# shed rates; the latency SLO applies to the page routes.
+SLO_EXEMPT_ROUTES = ("chatbot",)
+
+DEFAULT_LEVELS = (1, 2, 4, 8, 16, 32, 64)
+REQUEST_TIMEOUT = 30
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+# One simulated browser: its own cookies (session, CSRF, chat conversation) and route picks.
+class Visitor:
+    def __init__(self, base_url, slugs, rng):
+        self.base_url = base_url
+        self.slugs = slugs
+        self.rng = rng
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+        self.routes = list(ROUTE_MIX)
+        self.weights = list(ROUTE_MIX.values())
+
+    # Load one page first, as a browser would before posting, to receive the CSRF cookie.
+    def prime(self):
+        self._send("GET", f"/business/{self.rng.choice(self.slugs)}/")
+
+    def _csrf_token(self):
+        return next((c.value for c in self.cookies if c.name == "csrftoken"), "")
+
+    def _send(self, method, path, body=None, content_type=None):
+        headers = {"User-Agent": "ouray.info load test"}
+        if method == "POST":
+            headers["X-CSRFToken"] = self._csrf_token()
+            if content_type:
+                headers["Content-Type"] = content_type
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request, timeout=REQUEST_TIMEOUT) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            return exc.code
+        except (urllib.error.URLError, OSError):
+            # Refused, reset or timed out.
+            return 0
+
+    # Pick a route from ROUTE_MIX and request it; returns (route, status, seconds).
+    def request(self):
+        route = self.rng.choices(self.routes, self.weights)[0]
+        slug = self.rng.choice(self.slugs)
+        start = time.perf_counter()
+        if route.startswith("home_"):
+            status = self._send("GET", f"/?sort={route[len('home_'):]}")
+        elif route == "business_detail":
+            status = self._send("GET", f"/business/{slug}/")
+        elif route == "news":
+            status = self._send("GET", "/news/")
+        elif route == "bookmark_toggle":
+            status = self._send("POST", f"/business/{slug}/bookmark/")
+        else:
+            body = json.dumps({"message": self.rng.choice(CHAT_QUESTIONS)}).encode("utf-8")
+            status = self._send("POST", "/chatbot/", body, "application/json")
+        return route, status, time.perf_counter() - start
+
+
+# Closed loop: `concurrency` visitors each send their next request as soon as the last
+# one answers, for `duration` seconds.
+def run_level(base_url, slugs, concurrency, duration, seed=0):
+    samples = []
+    visitors = [Visitor(base_url, slugs, random.Random(seed * 1000 + i)) for i in range(concurrency)]
+    for visitor in visitors:
+        visitor.prime()
+    deadline = time.monotonic() + duration
+
+    def loop(visitor):
+        while time.monotonic() < deadline:
+            samples.append(visitor.request())
+
+    threads = [threading.Thread(target=loop, args=(visitor,)) for visitor in visitors]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, time.monotonic() - started, concurrency)
+
+
+# Throughput, latency percentiles and outcomes for one level. 3xx counts as success
+# (bookmarking redirects); 429s are load shedding (chatbot slots, throttles) and are
+# reported apart from errors (5xx, timeouts, refused connections).
+def summarize(samples, elapsed, concurrency):
+    latencies = [seconds * 1000 for _, _, seconds in samples]
+    page_latencies = [seconds * 1000 for route, _, seconds in samples if route not in SLO_EXEMPT_ROUTES]
+    statuses = Counter(status for _, status, _ in samples)
+    errors = sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+    by_route = defaultdict(list)
+    for route, _, seconds in samples:
+        by_route[route].append(seconds * 1000)
+    total = len(samples)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(_percentile(latencies, 95), 1) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 99), 1) if latencies else None,
+        "page_p95_ms": round(_percentile(page_latencies, 95), 1) if page_latencies else None,
+        "error_rate": round(errors / total, 4) if total else 1.0,
+        "shed_rate": round(statuses.get(429, 0) / total, 4) if total else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "route_p95_ms": {route: round(_percentile(values, 95), 1) for route, values in sorted(by_route.items())},
+    }
+
+
+def meets_slo(level, slo_ms, max_error_rate):
+    page_p95 = level["page_p95_ms"]
+    return page_p95 is not None and page_p95 <= slo_ms and level["error_rate"] <= max_error_rate
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as fh:
+                # The command name may contain spaces; fields after it are fixed.
+                ppid = int(fh.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+# Proportional set size (shared copy-on-write pages split between sharers) in KiB, falling
+# back to RSS on kernels without smaps_rollup.
+def _memory_kib(pid):
+    for path, field in ((f"/proc/{pid}/smaps_rollup", "Pss:"), (f"/proc/{pid}/status", "VmRSS:")):
+        try:
+            with open(path) as fh:
+                for line in fh:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return None
+
+
+# Memory of each worker forked by a gunicorn master (Linux only; None elsewhere).
+def worker_memory(master_pid):
+    if not os.path.isdir("/proc"):
+        return None
+    sizes = [size for size in map(_memory_kib, _children(master_pid)) if size is not None]
+    if not sizes:
+        return None
+    return {
+        "workers": len(sizes),
+        "mean_kib": round(sum(sizes) / len(sizes)),
+        "max_kib": max(sizes),
+        "master_kib": _memory_kib(master_pid),
+    }
+
+
+def unavailable_reason(config):
+    required = config.get("requires")
+    if required and importlib.util.find_spec(required) is None:
+        return f"{required} is not installed"
+    return None
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(process, base_url, timeout, log_path):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            with urllib.request.urlopen(f"{base_url}/news/", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.25)
+    with open(log_path, errors="replace") as fh:
+        tail = fh.read()[-2000:]
+    raise RuntimeError(f"gunicorn did not become ready:\n{tail}")
+
+
+# Run gunicorn with one worker config on a free local port; yields (master pid, base URL).
+@contextlib.contextmanager
+def gunicorn_server(config, env, log_path, startup_timeout=60):
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [
+        sys.executable, "-m", "gunicorn", config.get("app", "config.wsgi:application"),
+        "--config", str(settings.BASE_DIR / "gunicorn.conf.py"),
+        "--bind", f"127.0.0.1:{port}",
+        "--worker-class", config["worker_class"],
+        "--workers", str(config["workers"]),
+        "--threads", str(config["threads"]),
+    ]
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(command, env=env, cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        _wait_until_ready(process, base_url, startup_timeout, log_path)
+        yield process.pid, base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+# Environment for the server processes: the seeded database, fake upstreams and no
+# per-visitor throttles (every simulated visitor shares 127.0.0.1).
+def server_environment(database, fakes):
+    env = dict(os.environ, **database)
+    env.update(
+        {
+            "DJANGO_SETTINGS_MODULE": "config.settings",
+            "DEBUG": "false",
+            "GOOGLE_MAPS_API_KEY": "bench",
+            "GOOGLE_PLACES_DETAILS_URL": fakes.google_url,
+            "RECAPTCHA_SITE_KEY": "bench",
+            "RECAPTCHA_SECRET_KEY": "bench",
+            "RECAPTCHA_VERIFY_URL": fakes.recaptcha_url,
+            "ANTHROPIC_BASE_URL": fakes.anthropic_url,
+            "ANTHROPIC_API_KEY": "bench",
+            "CHATBOT_RATE_PER_MINUTE": str(10**9),
+            "CHATBOT_RATE_PER_DAY": str(10**9),
+            "CHATBOT_DAILY_TOKEN_BUDGET": str(10**12),
+        }
+    )
+    return env
+
+
+# Step one config through the concurrency levels, stopping after the first level that
+# misses the SLO (the knee of its saturation curve).
+def saturation_curve(config, env, slugs, levels, duration, slo_ms, max_error_rate, log_path, stdout=None):
+    curve = []
+    with gunicorn_server(config, env, log_path) as (master_pid, base_url):
+        for concurrency in levels:
+            level = run_level(base_url, slugs, concurrency, duration)
+            level["memory"] = worker_memory(master_pid)
+            level["meets_slo"] = meets_slo(level, slo_ms, max_error_rate)
+            curve.append(level)
+            if stdout:
+                stdout.write(format_level(level))
+            if not level["meets_slo"]:
+                break
+    return curve
+
+
+def format_level(level):
+    memory = level["memory"]
+    per_worker = f"{memory['mean_kib'] / 1024:.0f}MiB" if memory else "-"
+    return (
+        f"  c={level['concurrency']:<4} {level['rps']:>8.1f} req/s  p50 {level['p50_ms']}ms  "
+        f"p95 pages {level['page_p95_ms']}ms, chatbot {level['route_p95_ms'].get('chatbot', '-')}ms  "
+        f"errors {level['error_rate']:.2%}  "
+        f"shed {level['shed_rate']:.2%}  mem/worker {per_worker}"
+        f"{'' if level['meets_slo'] else '  <- over SLO'}"
+    )
+
+
+# Capacity of one config: the best throughput (and highest concurrency) within the SLO,
+# plus total worker memory at that point.
+def capacity(curve):
+    good = [level for level in curve if level["meets_slo"]]
+    if not good:
+        return {"rps": 0.0, "concurrency": 0, "memory_kib": None}
+    best = max(good, key=lambda level: level["rps"])
+    memory = best["memory"]
+    return {
+        "rps": best["rps"],
+        "concurrency": max(level["concurrency"] for level in good),
+        "memory_kib": memory["mean_kib"] * memory["workers"] if memory else None,
+    }
+
+
+# The config with the most throughput within the SLO; within 5% of the best, the one
+# using less memory wins (Render instances are memory-bound before CPU-bound).
+def recommend(capacities):
+    ranked = [(name, cap) for name, cap in capacities.items() if cap and cap["rps"] > 0]
+    if not ranked:
+        return None
+    top = max(cap["rps"] for _, cap in ranked)
+    contenders = [(name, cap) for name, cap in ranked if cap["rps"] >= top * 0.95]
+    name, _ = min(contenders, key=lambda item: (item[1]["memory_kib"] or float("inf"), -item[1]["rps"]))
+    return name
+
+
+# Environment pointing the server processes at the database the harness just seeded.
+def database_environment(settings_dict):
+    if settings_dict["ENGINE"].endswith("sqlite3"):
+        return {"SQLITE_PATH": str(settings_dict["NAME"]), "DATABASE_URL": ""}
+    user = urllib.parse.quote(settings_dict.get("USER") or "")
+    password = urllib.parse.quote(settings_dict.get("PASSWORD") or "")
+    credentials = f"{user}:{password}@" if user else ""
+    port = f":{settings_dict['PORT']}" if settings_dict.get("PORT") else ""
+    host = settings_dict.get("HOST") or "localhost"
+    return {"DATABASE_URL": f"postgres://{credentials}{host}{port}/{settings_dict['NAME']}"}
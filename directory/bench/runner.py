@@ -0,0 +1,232 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import time
+import tracemalloc
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from directory import conversations, snapshots, views
+from directory.management.commands import fetch_news
+from directory.models import Business
+
+from .fakes import FakeUpstreams
+from .seed import SCALES, seed
+
+HOME_SORTS = ("top", "az", "google")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# Run one operation with timing and query capture; tracing memory slows Python, so it's opt-in.
+def _measure(operation, trace_memory=False):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        ok = operation()
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed * 1000, len(queries), peak / 1024, ok
+
+
+# Build the scenario table: name -> zero-arg callable returning True on success.
+# `client` has bookmarks (and so a session); `visitor` is a read-only client with no cookies.
+def _scenarios(client, visitor, fakes):
+    detail_slugs = list(
+        Business.objects.exclude(google_place_id=None).values_list("slug", flat=True)[:50]
+    ) or list(Business.objects.values_list("slug", flat=True)[:50])
+    detail_cycle = iter(detail_slugs * 1000)
+    # A visitor who bookmarked once and then removed it again.
+    cleared = Client()
+    cleared.post(f"/business/{detail_slugs[0]}/bookmark/")
+    cleared.post(f"/business/{detail_slugs[0]}/bookmark/")
+
+    def get(path):
+        return lambda: client.get(path).status_code == 200
+
+    def home(sort, snapshot):
+        def operation():
+            # Live scenarios drop the snapshot (one DELETE, counted with the page's queries);
+            # the snapshot scenario builds it on the cold run.
+            if not snapshot:
+                snapshots.drop_home()
+            elif snapshots.load_home() is None:
+                views.build_home_snapshot()
+            return client.get(f"/?sort={sort}").status_code == 200
+        return operation
+
+    def detail(as_client):
+        return lambda: as_client.get(f"/business/{next(detail_cycle)}/").status_code == 200
+
+    def reconnect():
+        # Cost of a fresh connection per request; with DB_POOL this is a pool checkout.
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+
+    def chatbot(cached):
+        def operation():
+            # Every iteration is a first turn: follow-ups in a conversation skip the reply
+            # cache. The uncached scenario measures the full DB + model path every time; the
+            # cached one counts any miss after its cold run as an error.
+            client.cookies.pop(conversations.COOKIE, None)
+            with override_settings(CHATBOT_CACHE_ENABLED=cached):
+                response = client.post(
+                    "/chatbot/",
+                    data=json.dumps({"message": "Where can I get good coffee?"}),
+                    content_type="application/json",
+                )
+            return response.status_code == 200 and response.json().get("cached", False) == cached
+        return operation
+
+    def run_fetch_news():
+        feeds = [{"name": "Bench Feed", "url": fakes.rss_url}]
+        with mock.patch.object(fetch_news, "RSS_FEEDS", feeds):
+            call_command("fetch_news", stdout=io.StringIO())
+        return True
+
+    scenarios = {f"home_{sort}": home(sort, snapshot=False) for sort in HOME_SORTS}
+    scenarios.update(
+        {
+            "home_snapshot": home("top", snapshot=True),
+            "business_detail": detail(client),
+            "business_detail_visitor": detail(visitor),
+            "business_detail_cleared": detail(cleared),
+            "bookmarks": get("/bookmarks/"),
+            "news": get("/news/"),
+            "nearby": get("/nearby/?lat=38.0228&lng=-107.6714&radius=2"),
+            "chatbot": chatbot(cached=False),
+            "chatbot_cached": chatbot(cached=True),
+            "fetch_news": run_fetch_news,
+            "db_reconnect": reconnect,
+        }
+    )
+    return scenarios
+
+
+# Measure every scenario against the current database contents.
+def run_scenarios(fakes, iterations=20, only=None):
+    client = Client()
+    # Give the bookmarks page something to render.
+    for slug in Business.objects.values_list("slug", flat=True)[:20]:
+        client.post(f"/business/{slug}/bookmark/")
+
+    results = {}
+    for name, operation in _scenarios(client, Client(), fakes).items():
+        if only and name not in only:
+            continue
+        # Cold runs start without Google details, in this process or the shared cache.
+        views._google_cache.clear()
+        cache.clear()
+        cold_ms, _, _, _ = _measure(operation)
+
+        timings, query_counts, errors = [], [], 0
+        for _ in range(iterations):
+            elapsed, queries, _, ok = _measure(operation)
+            timings.append(elapsed)
+            query_counts.append(queries)
+            errors += 0 if ok else 1
+        # One extra warm run under tracemalloc for the peak allocation figure.
+        _, _, peak_kib, _ = _measure(operation, trace_memory=True)
+
+        results[name] = {
+            "cold_ms": round(cold_ms, 2),
+            "p50_ms": round(_percentile(timings, 50), 2),
+            "p95_ms": round(_percentile(timings, 95), 2),
+            "mean_ms": round(statistics.fmean(timings), 2),
+            "queries": max(query_counts),
+            "peak_kib": round(peak_kib, 1),
+            "errors": errors,
+        }
+    return results
+
+
+# Point settings and the Anthropic SDK at the fake upstreams for the duration of the block.
+@contextlib.contextmanager
+def fake_environment(fakes):
+    with override_settings(
+        GOOGLE_MAPS_API_KEY="bench",
+        GOOGLE_PLACES_DETAILS_URL=fakes.google_url,
+        RECAPTCHA_SITE_KEY="bench",
+        RECAPTCHA_SECRET_KEY="bench",
+        RECAPTCHA_VERIFY_URL=fakes.recaptcha_url,
+        ALLOWED_HOSTS=["*"],
+        PERF_SERVER_TIMING=False,
+        # The suite hammers the chatbot from one client; measure the call, not the throttle.
+        CHATBOT_RATE_LIMITS=[(10**9, 60)],
+    ), mock.patch.dict(
+        os.environ,
+        {"ANTHROPIC_BASE_URL": fakes.anthropic_url, "ANTHROPIC_API_KEY": "bench"},
+    ):
+        yield
+
+
+# Seed each scale into the current database and benchmark it against fake upstreams.
+def run_benchmarks(scales, iterations=20, latency=None, failure_rate=0.0, place_fraction=0.2,
+                   only=None, stdout=None):
+    results = {}
+    # Per-request lines would drown the progress output.
+    quiet = [logging.getLogger(name) for name in ("directory.perf", "directory.requests")]
+    previous_levels = [logger.level for logger in quiet]
+    for logger in quiet:
+        logger.setLevel(logging.WARNING)
+
+    try:
+        with FakeUpstreams(latency=latency, failure_rate=failure_rate) as fakes, fake_environment(fakes):
+            for scale in scales:
+                volumes = SCALES[scale]
+                if stdout:
+                    stdout.write(f"Seeding {scale}: {volumes}")
+                call_command("flush", interactive=False, verbosity=0)
+                seed(place_fraction=place_fraction, stdout=stdout, **volumes)
+                results[scale] = run_scenarios(fakes, iterations=iterations, only=only)
+                results[scale]["_upstream_requests"] = dict(fakes.requests)
+                results[scale]["_upstream_bytes"] = dict(fakes.response_bytes)
+                fakes.requests.clear()
+                fakes.response_bytes.clear()
+    finally:
+        for logger, level in zip(quiet, previous_levels):
+            logger.setLevel(level)
+    return results
+
+
+# Compare a run to a baseline; returns human-readable regression lines.
+def compare(baseline, current, tolerance=0.2):
+    regressions = []
+    for scale, scenarios in current.items():
+        for name, stats in scenarios.items():
+            if name.startswith("_"):
+                continue
+            base = baseline.get(scale, {}).get(name)
+            if not base:
+                continue
+            if stats["queries"] > base["queries"]:
+                regressions.append(
+                    f"{scale}/{name}: queries {base['queries']} -> {stats['queries']}"
+                )
+            if stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{scale}/{name}: p95 {base['p95_ms']}ms -> {stats['p95_ms']}ms"
+                )
+            if stats["peak_kib"] > base["peak_kib"] * (1 + tolerance):
+                regressions.append(
+                    f"{scale}/{name}: peak memory {base['peak_kib']}KiB -> {stats['peak_kib']}KiB"
+                )
+    return regressions
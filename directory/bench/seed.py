@@ -0,0 +1,91 @@
+import datetime
+import random
+
+from django.db import transaction
+from django.utils import timezone
+
+from directory.geo import encode
+from directory.geocoders import OURAY_CENTER
+from directory.models import Business, NewsPost, Review
+
+# Data volumes for each benchmark scale.
+SCALES = {
+    "small": {"businesses": 10, "reviews": 200, "news": 50},
+    "medium": {"businesses": 1_000, "reviews": 100_000, "news": 10_000},
+    "large": {"businesses": 10_000, "reviews": 1_000_000, "news": 100_000},
+}
+
+CATEGORIES = ["Dining", "Lodging", "Outdoors", "Shopping", "Hot Springs", "Coffee", "Services"]
+BATCH_SIZE = 5_000
+
+
+# Insert synthetic businesses, reviews and news posts in batches.
+def seed(businesses, reviews, news, place_fraction=0.2, seed=42, stdout=None):
+    rng = random.Random(seed)
+    now = timezone.now()
+    # Scatter listings over a few kilometres of town so /nearby/ sees realistic density
+    # (own generator, so the rest of the seeded data is unchanged).
+    geo_rng = random.Random(seed + 1)
+    points = [
+        (OURAY_CENTER[0] + geo_rng.uniform(-0.03, 0.03), OURAY_CENTER[1] + geo_rng.uniform(-0.04, 0.04))
+        for _ in range(businesses)
+    ]
+
+    with transaction.atomic():
+        Business.objects.bulk_create(
+            [
+                Business(
+                    name=f"Bench Business {i:05d}",
+                    slug=f"bench-business-{i}",
+                    category=CATEGORIES[i % len(CATEGORIES)],
+                    description="A synthetic listing used for benchmarks. " * 3,
+                    website=f"https://example.com/{i}",
+                    phone="970-555-0100",
+                    address=f"{100 + i} Main St, Ouray, CO",
+                    google_place_id=f"place-{i}" if rng.random() < place_fraction else None,
+                    latitude=points[i][0],
+                    longitude=points[i][1],
+                    geohash=encode(*points[i]),
+                    geocoded_address=f"{100 + i} Main St, Ouray, CO",
+                )
+                for i in range(businesses)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    business_ids = list(Business.objects.values_list("id", flat=True))
+
+    for start in range(0, reviews, BATCH_SIZE):
+        with transaction.atomic():
+            Review.objects.bulk_create(
+                [
+                    Review(
+                        business_id=rng.choice(business_ids),
+                        rating=rng.randint(1, 5),
+                        name=f"Visitor {i}",
+                        comment="Lovely place, would visit again.",
+                        is_approved=rng.random() < 0.9,
+                    )
+                    for i in range(start, min(start + BATCH_SIZE, reviews))
+                ],
+                batch_size=BATCH_SIZE,
+            )
+        if stdout:
+            stdout.write(f"  reviews {min(start + BATCH_SIZE, reviews)}/{reviews}")
+
+    for start in range(0, news, BATCH_SIZE):
+        with transaction.atomic():
+            NewsPost.objects.bulk_create(
+                [
+                    NewsPost(
+                        title=f"Bench news {i}",
+                        slug=f"bench-news-{i}",
+                        summary="County update for the benchmark suite.",
+                        source_name="Bench Feed",
+                        source_url=f"https://example.com/news/{i}",
+                        guid=f"bench-seed-{i}",
+                        published_at=now - datetime.timedelta(hours=i),
+                    )
+                    for i in range(start, min(start + BATCH_SIZE, news))
+                ],
+                batch_size=BATCH_SIZE,
+            )
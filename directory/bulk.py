@@ -0,0 +1,139 @@
+import csv
+import datetime
+import json
+import os
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from .models import Business, Review
+
+# Columns read/written for businesses (images are managed in the admin).
+BUSINESS_FIELDS = [
+    "name",
+    "slug",
+    "category",
+    "description",
+    "website",
+    "phone",
+    "deal_text",
+    "address",
+    "google_place_id",
+]
+REVIEW_FIELDS = ["business_slug", "rating", "name", "email", "comment", "is_approved", "created_at"]
+
+
+# Pick the format from an explicit option or the file extension.
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson") else "csv"
+
+
+# Yield one dict per record without loading the file into memory.
+def read_rows(fh, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(fh)
+        return
+    for line in fh:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+# Yield lists of up to `size` items.
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Clean one input record into Business field values; returns None for rows without a name,
+# whose name has nothing to slugify (e.g. "!!!", which would collide on the empty slug), or
+# with a value longer than its column (Postgres would abort the whole batch).
+def clean_business_row(row):
+    values = {field: (row.get(field) or "").strip() for field in BUSINESS_FIELDS}
+    if not values["name"]:
+        return None
+    for field in BUSINESS_FIELDS:
+        max_length = Business._meta.get_field(field).max_length
+        if field != "slug" and max_length and len(values[field]) > max_length:
+            return None
+    values["slug"] = slugify(values["slug"] or values["name"])[:220]
+    if not values["slug"]:
+        return None
+    values["google_place_id"] = values["google_place_id"] or None
+    return values
+
+
+# Clean one input record in the export's review format into Review field values plus the
+# business slug; returns None for rows missing a slug, comment or valid rating/date.
+def clean_review_row(row):
+    values = {field: "" if row.get(field) is None else str(row[field]).strip() for field in REVIEW_FIELDS}
+    try:
+        rating = int(values["rating"])
+    except ValueError:
+        return None
+    if not values["business_slug"] or not values["comment"] or not 1 <= rating <= 5:
+        return None
+    created_at = timezone.now()
+    if values["created_at"]:
+        try:
+            created_at = parse_datetime(values["created_at"])
+        except ValueError:
+            return None
+        if created_at is None:
+            return None
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at, datetime.timezone.utc)
+    return {
+        "business_slug": values["business_slug"],
+        "rating": rating,
+        "name": values["name"][:120],
+        "email": values["email"][:254],
+        "comment": values["comment"][:1000],
+        # Exports write True/False (CSV) or true/false (JSON); missing means approved.
+        "is_approved": values["is_approved"].lower() not in ("false", "0", "no"),
+        "created_at": created_at,
+    }
+
+
+# Writers share one interface: write(dict) per row.
+class RowWriter:
+    def __init__(self, fh, fmt, fields):
+        self.fh = fh
+        self.fmt = fmt
+        if fmt == "csv":
+            self.writer = csv.DictWriter(fh, fieldnames=fields, extrasaction="ignore")
+            self.writer.writeheader()
+
+    def write(self, row):
+        if self.fmt == "csv":
+            self.writer.writerow(row)
+        else:
+            self.fh.write(json.dumps(row, default=str) + "\n")
+
+
+# Stream businesses as plain dicts in primary-key order.
+def iter_business_rows(chunk_size=2000):
+    for values in Business.objects.order_by("pk").values(*BUSINESS_FIELDS).iterator(chunk_size=chunk_size):
+        values["google_place_id"] = values["google_place_id"] or ""
+        yield values
+
+
+# Stream reviews with the business slug instead of an internal id.
+def iter_review_rows(chunk_size=2000):
+    queryset = Review.objects.order_by("pk").values(
+        "business__slug", "rating", "name", "email", "comment", "is_approved", "created_at"
+    )
+    for values in queryset.iterator(chunk_size=chunk_size):
+        values["business_slug"] = values.pop("business__slug")
+        values["created_at"] = values["created_at"].isoformat()
+        yield values
@@ -0,0 +1,132 @@
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .instrumentation import record_cache
+
+# Bumped whenever Business or NewsPost rows change; part of every cache key.
+DATA_VERSION_KEY = "chatbot:data_version"
+# Most recent distinct questions per data version, scanned for near-duplicates.
+INDEX_SIZE = 200
+# Questions about conditions go stale with the news, so they get the short TTL.
+NEWS_SENSITIVE_WORDS = {
+    "open", "closed", "closure", "road", "roads", "pass", "weather", "snow", "alert",
+    "alerts", "news", "today", "tonight", "tomorrow", "now", "event", "events", "fire",
+}
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+# Lowercase, drop punctuation and collapse whitespace so trivial variants share a key.
+def normalize(message):
+    text = _PUNCTUATION_RE.sub(" ", message.lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+# Character trigrams of the padded text; robust to typos and word order tweaks.
+def _shingles(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def data_version():
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, 1, None)
+        version = cache.get(DATA_VERSION_KEY, 1)
+    return version
+
+
+# Invalidate every cached reply by moving to a new key space.
+def bump_data_version():
+    cache.add(DATA_VERSION_KEY, 1, None)
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.set(DATA_VERSION_KEY, 2, None)
+
+
+def _prefix(prompt_version):
+    return f"chatbot:reply:{prompt_version}:{data_version()}"
+
+
+def _reply_key(prefix, normalized):
+    return f"{prefix}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+
+def ttl_for(normalized):
+    if NEWS_SENSITIVE_WORDS & set(normalized.split()):
+        return settings.CHATBOT_CACHE_NEWS_TTL
+    return settings.CHATBOT_CACHE_TTL
+
+
+# Exact match first, then the closest indexed question above the similarity threshold.
+def get_reply(message, prompt_version):
+    if not settings.CHATBOT_CACHE_ENABLED:
+        return None
+    normalized = normalize(message)
+    prefix = _prefix(prompt_version)
+
+    reply = cache.get(_reply_key(prefix, normalized))
+    if reply is None and settings.CHATBOT_CACHE_SIMILARITY:
+        wanted = _shingles(normalized)
+        best, best_score = None, settings.CHATBOT_CACHE_SIMILARITY
+        for candidate in cache.get(f"{prefix}:index", []):
+            score = _similarity(wanted, _shingles(candidate))
+            if score >= best_score:
+                best, best_score = candidate, score
+        if best is not None:
+            reply = cache.get(_reply_key(prefix, best))
+            if reply is not None:
+                _count("near_hits")
+
+    _count("hits" if reply is not None else "misses")
+    record_cache("chatbot", hit=reply is not None)
+    return reply
+
+
+def set_reply(message, prompt_version, reply):
+    if not settings.CHATBOT_CACHE_ENABLED:
+        return
+    normalized = normalize(message)
+    prefix = _prefix(prompt_version)
+    ttl = ttl_for(normalized)
+    cache.set(_reply_key(prefix, normalized), reply, ttl)
+
+    index_key = f"{prefix}:index"
+    index = [q for q in cache.get(index_key, []) if q != normalized]
+    index.append(normalized)
+    cache.set(index_key, index[-INDEX_SIZE:], settings.CHATBOT_CACHE_TTL)
+
+
+def _count(name):
+    key = f"chatbot:cache:{name}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+# Lifetime hit/miss counters for reporting. They live in the default cache, so they cover
+# every worker only when that cache is shared (REDIS_URL); otherwise each process counts its own.
+def stats():
+    values = cache.get_many([f"chatbot:cache:{n}" for n in ("hits", "near_hits", "misses")])
+    hits = values.get("chatbot:cache:hits", 0)
+    misses = values.get("chatbot:cache:misses", 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "near_hits": values.get("chatbot:cache:near_hits", 0),
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Cache backends only the current process can see.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+# Rate limits, chatbot concurrency slots and the daily token budget live in the default
+# cache. Without a shared one (REDIS_URL) each worker enforces its own copy, multiplying the
+# real limits by the worker count.
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    if settings.DEBUG or settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            "The default cache is per-process, so rate limits, chatbot concurrency slots and "
+            "the token budget are enforced separately by every worker.",
+            hint="Set REDIS_URL so all workers share one cache.",
+            id="directory.W001",
+        )
+    ]
@@ -0,0 +1,159 @@
+import json
+import logging
+import re
+import secrets
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .instrumentation import record_event
+
+logger = logging.getLogger("directory.perf")
+
+# Browser-session cookie naming the visitor's conversation. Django sessions here are
+# database-backed and reserved for bookmarks, so chat state lives in the cache instead.
+COOKIE = "chat_conversation"
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# Rough characters per token for English prose; only used to decide when to compact.
+CHARS_PER_TOKEN = 4
+SUMMARY_MAX_TOKENS = 300
+SUMMARY_PROMPT = (
+    "You maintain the memory of a chat between a visitor and a local guide for Ouray, Colorado. "
+    "Merge the earlier summary and the new exchanges into one short summary (under 150 words) "
+    "of what the visitor wants and which businesses, places and facts were mentioned. "
+    "Write plain prose, no preamble."
+)
+
+
+def new_id():
+    return secrets.token_hex(16)
+
+
+# The conversation id from the request's cookie, or None if missing or malformed.
+def conversation_id(request):
+    value = request.COOKIES.get(COOKIE, "")
+    return value if _ID_RE.match(value) else None
+
+
+def _key(conversation):
+    return f"chatbot:conversation:{conversation}"
+
+
+# Empty state: rolling summary, verbatim [visitor, guide] exchanges and token totals.
+def empty():
+    return {"summary": "", "exchanges": [], "turns": 0, "input_tokens": 0, "output_tokens": 0}
+
+
+# Stored as zlib-compressed JSON; anything unreadable starts a fresh conversation.
+def load(conversation):
+    raw = cache.get(_key(conversation)) if conversation else None
+    if raw is None:
+        return empty()
+    try:
+        return json.loads(zlib.decompress(raw))
+    except (zlib.error, ValueError):
+        return empty()
+
+
+# Each save restarts the expiry, so only idle conversations are dropped.
+def save(conversation, state):
+    data = zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+    cache.set(_key(conversation), data, settings.CHATBOT_CONVERSATION_TTL)
+
+
+def has_history(state):
+    return bool(state["summary"] or state["exchanges"])
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def history_tokens(state):
+    texts = [state["summary"]] + [text for exchange in state["exchanges"] for text in exchange]
+    return sum(estimate_tokens(text) for text in texts if text)
+
+
+# Model messages: the kept exchanges in order, then the new question.
+def messages(state, message):
+    result = []
+    for question, reply in state["exchanges"]:
+        result.append({"role": "user", "content": question})
+        result.append({"role": "assistant", "content": reply})
+    result.append({"role": "user", "content": message})
+    return result
+
+
+# System prompt addition carrying the rolling summary ("" when there is none).
+def summary_prompt(state):
+    if not state["summary"]:
+        return ""
+    return f"\n\nEARLIER IN THIS CONVERSATION (summary):\n\n{state['summary']}"
+
+
+# The text handed to the summarizer: the earlier summary plus the exchanges to fold in.
+def transcript(summary, exchanges):
+    lines = [f"Earlier summary: {summary}"] if summary else []
+    for question, reply in exchanges:
+        lines.append(f"Visitor: {question}")
+        lines.append(f"Guide: {reply}")
+    return "\n".join(lines)
+
+
+def add_usage(state, usage):
+    if usage:
+        state["input_tokens"] += usage.input_tokens or 0
+        state["output_tokens"] += usage.output_tokens or 0
+
+
+# Once the history passes CHATBOT_HISTORY_TOKEN_BUDGET, fold all but the last
+# CHATBOT_HISTORY_KEEP_TURNS exchanges into the summary via summarize(summary, exchanges).
+# If summarizing fails the old exchanges are dropped anyway, so the prompt stays bounded.
+# Returns "summarized", "truncated" or None.
+def compact(state, summarize):
+    if history_tokens(state) <= settings.CHATBOT_HISTORY_TOKEN_BUDGET:
+        return None
+    split = max(len(state["exchanges"]) - settings.CHATBOT_HISTORY_KEEP_TURNS, 0)
+    if not split:
+        return None
+    folded, state["exchanges"] = state["exchanges"][:split], state["exchanges"][split:]
+    try:
+        state["summary"] = summarize(state["summary"], folded).strip()
+    except Exception:
+        logger.warning("chatbot summary failed; dropping %d exchanges", len(folded), exc_info=True)
+        return "truncated"
+    return "summarized"
+
+
+# Store a finished turn (compacting when summarize is given), save the state and log how
+# the conversation's cost grows. usage is the model response's usage (None for cached replies).
+def record_turn(conversation, state, message, reply, usage=None, summarize=None):
+    add_usage(state, usage)
+    state["exchanges"].append([message, reply])
+    state["turns"] += 1
+    compaction = compact(state, summarize) if summarize else None
+    if compaction:
+        record_event("chatbot_compaction", compaction)
+    save(conversation, state)
+    logger.info(
+        json.dumps(
+            {
+                "event": "chatbot_turn",
+                "conversation": conversation[:8],
+                "turn": state["turns"],
+                "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+                "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+                "conversation_tokens": state["input_tokens"] + state["output_tokens"],
+                "history_tokens": history_tokens(state),
+                "compaction": compaction,
+            },
+            sort_keys=True,
+        )
+    )
+    return compaction
+
+
+def set_cookie(response, conversation):
+    response.set_cookie(COOKIE, conversation, httponly=True, samesite="Lax")
@@ -0,0 +1,96 @@
+import contextvars
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from .instrumentation import record_event
+
+# Self-identified bots, link unfurlers and headless browsers. Crawlers that disguise
+# themselves still get the normal site; this only spares upstreams from the honest ones.
+# Tokens are whole words, so browsers that merely contain one (e.g. "CUBOT" phones) aren't
+# caught: known names, generic "bot"/"crawler"/"spider" words, and "<name>bot/<version>".
+CRAWLER_RE = re.compile(
+    r"\b(?:googlebot|bingbot|applebot|duckduckbot|yandexbot|baiduspider|ahrefsbot|semrushbot"
+    r"|twitterbot|slackbot|discordbot|linkedinbot|facebookexternalhit|slurp|headlesschrome)\b"
+    r"|\b(?:bot|crawler|spider)\b"
+    r"|\b\w+bot/",
+    re.IGNORECASE,
+)
+
+# Views crawlers may get from the precomputed pages: name -> page path under STATIC_RENDER_ROOT.
+STATIC_PAGES = {
+    "home": lambda request, kwargs: _home_page(request),
+    "news": lambda request, kwargs: "news/index.html",
+    "business_detail": lambda request, kwargs: f"business/{kwargs['slug']}/index.html",
+}
+
+# Crawlers never get model calls.
+BLOCKED_VIEWS = {"chatbot"}
+
+# Whether the request being handled comes from a crawler (read by get_google_place_data).
+_crawler = contextvars.ContextVar("directory_crawler", default=False)
+
+
+def is_crawler(request):
+    return bool(CRAWLER_RE.search(request.META.get("HTTP_USER_AGENT", "")))
+
+
+def serving_crawler():
+    return _crawler.get()
+
+
+def _home_page(request):
+    from .views import HOME_SORTS
+
+    sort = request.GET.get("sort", "top")
+    if sort not in HOME_SORTS:
+        sort = "top"
+    return "index.html" if sort == "top" else f"index-{sort}.html"
+
+
+# The precomputed file for the request, preferring gzip when the client accepts it.
+def _static_file(request, relpath):
+    path = os.path.join(settings.STATIC_RENDER_ROOT, relpath)
+    if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "") and os.path.exists(path + ".gz"):
+        return path + ".gz", "gzip"
+    if os.path.exists(path):
+        return path, None
+    return None, None
+
+
+# Middleware: crawlers get `render_static` output instead of a live render when it exists,
+# never reach the chatbot, and (via serving_crawler) only see cached Google data.
+class CrawlerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _crawler.set(is_crawler(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _crawler.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not _crawler.get():
+            return None
+        name = request.resolver_match.url_name if request.resolver_match else None
+        if name in BLOCKED_VIEWS:
+            record_event("crawler", "blocked")
+            return JsonResponse({"error": "Not available to crawlers"}, status=403)
+        if name not in STATIC_PAGES or request.method not in ("GET", "HEAD") or not settings.STATIC_RENDER_ROOT:
+            record_event("crawler", "live")
+            return None
+        path, encoding = _static_file(request, STATIC_PAGES[name](request, view_kwargs))
+        if path is None:
+            record_event("crawler", "live")
+            return None
+        record_event("crawler", "static")
+        response = FileResponse(open(path, "rb"), content_type="text/html; charset=utf-8")
+        if encoding:
+            response["Content-Encoding"] = encoding
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
@@ -0,0 +1,120 @@
+import math
+
+from django.db.models import F, Q
+from django.db.models.functions import Abs
+
+from .models import Business
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Stored precision: ~5m cells, far finer than any search radius.
+GEOHASH_PRECISION = 9
+# Most geohash cells one query may cover; the search picks the finest precision within it.
+MAX_CELLS = 16
+# Upper bound on rows read per search, whatever the density of the area.
+MAX_CANDIDATES = 500
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+# Cell height and width in degrees at a precision.
+def _cell_size(precision):
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# (min_lat, max_lat, min_lng, max_lng) enclosing a circle.
+def bounding_box(lat, lng, radius_km):
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+    return max(lat - dlat, -90.0), min(lat + dlat, 90.0), max(lng - dlng, -180.0), min(lng + dlng, 180.0)
+
+
+# Geohash prefixes whose cells cover the box: the finest precision needing <= MAX_CELLS.
+def covering_cells(min_lat, max_lat, min_lng, max_lng):
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        rows = range(int((min_lat + 90) // height), int((max_lat + 90) // height) + 1)
+        cols = range(int((min_lng + 180) // width), int((max_lng + 180) // width) + 1)
+        if len(rows) * len(cols) <= MAX_CELLS:
+            return sorted(
+                {
+                    encode(-90 + (row + 0.5) * height, -180 + (col + 0.5) * width, precision)
+                    for row in rows
+                    for col in cols
+                }
+            )
+    return [""]
+
+
+# [low, high) bounds of the geohashes starting with prefix. high is the prefix's successor
+# in the geohash alphabet (carrying past "z"), so the range only compares digits and
+# lowercase letters and holds under any database collation. None means no upper bound.
+def prefix_range(prefix):
+    chars = prefix
+    while chars:
+        index = GEOHASH_ALPHABET.index(chars[-1])
+        if index + 1 < len(GEOHASH_ALPHABET):
+            return prefix, chars[:-1] + GEOHASH_ALPHABET[index + 1]
+        chars = chars[:-1]
+    return prefix, None
+
+
+# Businesses within radius_km, nearest first, as dicts with distance_km. One indexed query:
+# geohash prefix ranges (plain b-tree range scans on any database) narrowed by the box and
+# capped at MAX_CANDIDATES rows; exact distances are computed on that small set.
+def nearby(lat, lng, radius_km, limit=10, exclude=None):
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    cells = Q()
+    for prefix in covering_cells(min_lat, max_lat, min_lng, max_lng):
+        low, high = prefix_range(prefix)
+        cells |= Q(geohash__gte=low, geohash__lt=high) if high else Q(geohash__gte=low)
+    queryset = Business.objects.filter(
+        cells,
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    )
+    if exclude is not None:
+        queryset = queryset.exclude(pk=exclude)
+    # In dense areas keep the rows closest by a cheap in-database metric, so the cap
+    # trims the far edge of the box rather than arbitrary rows.
+    candidates = queryset.annotate(
+        approx=Abs(F("latitude") - lat) + Abs(F("longitude") - lng) * math.cos(math.radians(lat))
+    ).order_by("approx").values("pk", "name", "slug", "category", "address", "latitude", "longitude")
+
+    results = []
+    for row in candidates[:MAX_CANDIDATES]:
+        distance = haversine_km(lat, lng, row["latitude"], row["longitude"])
+        if distance <= radius_km:
+            row["distance_km"] = round(distance, 3)
+            results.append(row)
+    results.sort(key=lambda row: (row["distance_km"], row["name"]))
+    return results[:limit]
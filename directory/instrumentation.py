@@ -0,0 +1,256 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger("directory.requests")
+
+# Histogram buckets (seconds) for request duration.
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Timings for the request currently being handled (per thread / per task).
+_current = contextvars.ContextVar("directory_request_timings", default=None)
+
+
+# Per-request accumulator for component durations, call counts and cache outcomes.
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.cache = defaultdict(lambda: {"hit": 0, "miss": 0})
+
+    def server_timing(self, total):
+        # Server-Timing entries are "name;dur=ms;desc=..." joined by commas.
+        parts = []
+        for name, seconds in sorted(self.durations.items()):
+            parts.append(f'{name};dur={seconds * 1000:.1f};desc="{self.counts[name]} calls"')
+        for name, outcome in sorted(self.cache.items()):
+            parts.append(f'cache.{name};desc="hit={outcome["hit"]} miss={outcome["miss"]}"')
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# Return the timings for the active request, or None outside the middleware.
+def current_timings():
+    return _current.get()
+
+
+# Time a block of work under a component name (e.g. "db", "render", "http.maps.googleapis.com").
+@contextmanager
+def track(name):
+    timings = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.durations[name] += time.perf_counter() - start
+            timings.counts[name] += 1
+
+
+# Time an outbound HTTP call, bucketed by destination host.
+def track_http(url):
+    host = urllib.parse.urlsplit(url).hostname or "unknown"
+    return track(f"http.{host}")
+
+
+# Count a cache lookup outcome for the active request.
+def record_cache(name, hit):
+    timings = _current.get()
+    if timings is not None:
+        timings.cache[name]["hit" if hit else "miss"] += 1
+
+
+# Database execute wrapper: every query is counted and timed under "db".
+def _db_wrapper(execute, sql, params, many, context):
+    with track("db"):
+        return execute(sql, params, many, context)
+
+
+# Template backend that times top-level renders (includes/extends are part of the same render).
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        with track("render"):
+            return self._template.render(context, request)
+
+
+# Process-local aggregates exported in Prometheus text format.
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.duration_sum = defaultdict(float)
+        self.duration_count = defaultdict(int)
+        self.components = defaultdict(float)
+        self.component_calls = defaultdict(int)
+        self.cache = defaultdict(int)
+        self.events = defaultdict(int)
+        self.event_seconds = defaultdict(float)
+
+    def record_event(self, name, outcome, seconds=None):
+        with self._lock:
+            self.events[(name, outcome)] += 1
+            if seconds is not None:
+                self.event_seconds[name] += seconds
+
+    def observe(self, view, status, total, timings):
+        with self._lock:
+            self.requests[(view, str(status))] += 1
+            buckets = self.buckets[view]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            self.duration_sum[view] += total
+            self.duration_count[view] += 1
+            for name, seconds in timings.durations.items():
+                self.components[(view, name)] += seconds
+                self.component_calls[(view, name)] += timings.counts[name]
+            for name, outcome in timings.cache.items():
+                for result, count in outcome.items():
+                    self.cache[(name, result)] += count
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append("# HELP directory_requests_total Requests handled, by view and status.")
+            lines.append("# TYPE directory_requests_total counter")
+            for (view, status), count in sorted(self.requests.items()):
+                lines.append(f'directory_requests_total{{view="{view}",status="{status}"}} {count}')
+
+            lines.append("# HELP directory_request_duration_seconds Wall-clock time per request.")
+            lines.append("# TYPE directory_request_duration_seconds histogram")
+            for view in sorted(self.duration_count):
+                for bound, count in zip(DURATION_BUCKETS, self.buckets[view]):
+                    lines.append(
+                        f'directory_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'directory_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} '
+                    f"{self.duration_count[view]}"
+                )
+                lines.append(
+                    f'directory_request_duration_seconds_sum{{view="{view}"}} {self.duration_sum[view]:.6f}'
+                )
+                lines.append(
+                    f'directory_request_duration_seconds_count{{view="{view}"}} {self.duration_count[view]}'
+                )
+
+            lines.append("# HELP directory_component_seconds_total Time spent per component (db, render, http.<host>).")
+            lines.append("# TYPE directory_component_seconds_total counter")
+            for (view, name), seconds in sorted(self.components.items()):
+                lines.append(
+                    f'directory_component_seconds_total{{view="{view}",component="{name}"}} {seconds:.6f}'
+                )
+
+            lines.append("# HELP directory_component_calls_total Calls per component (queries, HTTP requests, renders).")
+            lines.append("# TYPE directory_component_calls_total counter")
+            for (view, name), count in sorted(self.component_calls.items()):
+                lines.append(
+                    f'directory_component_calls_total{{view="{view}",component="{name}"}} {count}'
+                )
+
+            lines.append("# HELP directory_cache_lookups_total Cache lookups by cache and result.")
+            lines.append("# TYPE directory_cache_lookups_total counter")
+            for (name, result), count in sorted(self.cache.items()):
+                lines.append(f'directory_cache_lookups_total{{cache="{name}",result="{result}"}} {count}')
+
+            lines.append("# HELP directory_events_total Outcomes of instrumented operations (e.g. recaptcha).")
+            lines.append("# TYPE directory_events_total counter")
+            for (name, outcome), count in sorted(self.events.items()):
+                lines.append(f'directory_events_total{{event="{name}",outcome="{outcome}"}} {count}')
+
+            lines.append("# HELP directory_event_seconds_total Time spent in instrumented operations.")
+            lines.append("# TYPE directory_event_seconds_total counter")
+            for name, seconds in sorted(self.event_seconds.items()):
+                lines.append(f'directory_event_seconds_total{{event="{name}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+# Count the outcome (and optionally duration) of an operation outside the per-request breakdown.
+def record_event(name, outcome, seconds=None):
+    metrics_registry.record_event(name, outcome, seconds)
+
+
+# Middleware: time each request and publish the breakdown as a header, a log line and metrics.
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total = time.perf_counter() - timings.start
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name if match else "") or "unresolved"
+
+        if settings.PERF_SERVER_TIMING:
+            response["Server-Timing"] = timings.server_timing(total)
+
+        metrics_registry.observe(view, response.status_code, total, timings)
+        if settings.PERF_REQUEST_LOG:
+            logger.info(
+                json.dumps(
+                    {
+                        "event": "request",
+                        "view": view,
+                        "method": request.method,
+                        "status": response.status_code,
+                        "total_ms": round(total * 1000, 2),
+                        "components_ms": {
+                            name: round(seconds * 1000, 2) for name, seconds in timings.durations.items()
+                        },
+                        "calls": dict(timings.counts),
+                        "cache": {name: dict(outcome) for name, outcome in timings.cache.items()},
+                    },
+                    sort_keys=True,
+                )
+            )
+        return response
+
+
+# Prometheus scrape endpoint, restricted to local/allow-listed addresses.
+def metrics(request):
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(
+        metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
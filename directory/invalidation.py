@@ -0,0 +1,131 @@
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import InvalidationEvent
+
+logger = logging.getLogger("directory.invalidation")
+
+CHANNEL = "directory_invalidate"
+# Events are only needed until every worker has polled past them.
+RETENTION = timedelta(hours=1)
+PRUNE_EVERY = 100
+# Seconds an id skipped by a poll is re-checked. Ids are allocated at insert but become
+# visible at commit, so on Postgres a lower id can appear after a higher one; an id still
+# missing after this long was rolled back.
+GAP_GRACE = 60
+
+# prefix -> handlers called with the rest of the key ("*" means everything under the prefix).
+HANDLERS = {}
+
+_last_seen = None
+# Ids below _last_seen not seen yet: {id: monotonic time first missed}.
+_gaps = {}
+_listener_pid = None
+
+
+# Register a handler for keys like "<prefix>:<value>" in this process. Only publish
+# prefixes something subscribes to (today just "google"); other events are dead weight.
+def subscribe(prefix, handler):
+    HANDLERS.setdefault(prefix, []).append(handler)
+
+
+# Announce that data behind `key` changed. Sent after commit so listeners never reload
+# the old rows; on Postgres a NOTIFY wakes listeners at once, elsewhere they poll.
+def publish(key):
+    transaction.on_commit(lambda: _send(key))
+
+
+def _send(key):
+    event = InvalidationEvent.objects.create(key=key)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, f"{event.pk}:{key}"])
+    if event.pk % PRUNE_EVERY == 0:
+        InvalidationEvent.objects.filter(created_at__lt=timezone.now() - RETENTION).delete()
+    # The publishing process applies its own event immediately.
+    apply(key)
+
+
+# Run the local handlers for one key.
+def apply(key):
+    prefix, _, value = key.partition(":")
+    for handler in HANDLERS.get(prefix, []):
+        try:
+            handler(value)
+        except Exception:
+            logger.exception("invalidation handler failed for %s", key)
+
+
+# Apply every event newer than the last one this process saw, plus skipped ids that
+# committed late (see GAP_GRACE). The first call only records the current position: a
+# fresh process has nothing cached to drop.
+def poll():
+    global _last_seen
+    if _last_seen is None:
+        _last_seen = InvalidationEvent.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        return 0
+    now = time.monotonic()
+    for pk in [pk for pk, missed_at in _gaps.items() if now - missed_at > GAP_GRACE]:
+        del _gaps[pk]
+    events = InvalidationEvent.objects.filter(Q(pk__gt=_last_seen) | Q(pk__in=list(_gaps)))
+    applied = 0
+    for pk, key in events.order_by("pk").values_list("pk", "key"):
+        if pk > _last_seen:
+            _gaps.update(dict.fromkeys(range(_last_seen + 1, pk), now))
+            _last_seen = pk
+        else:
+            del _gaps[pk]
+        apply(key)
+        applied += 1
+    return applied
+
+
+# Postgres: block on LISTEN, applying notifications as they arrive, and poll the table
+# every interval to catch anything sent while the connection was down. Notifications
+# don't move the poll position; handlers only drop entries, so a replay is harmless.
+def _listen(interval):
+    import psycopg
+
+    params = connection.get_connection_params()
+    with psycopg.connect(**params, autocommit=True) as conn:
+        conn.execute(f"LISTEN {CHANNEL}")
+        poll()
+        while True:
+            for notify in conn.notifies(timeout=interval):
+                apply(notify.payload.partition(":")[2])
+            poll()
+            close_old_connections()
+
+
+def _run(interval):
+    use_listen = settings.INVALIDATION_LISTEN and connection.vendor == "postgresql"
+    while True:
+        try:
+            if use_listen:
+                _listen(interval)
+            else:
+                poll()
+                close_old_connections()
+                time.sleep(interval)
+        except Exception:
+            logger.exception("invalidation listener error; retrying in %ss", interval)
+            close_old_connections()
+            time.sleep(interval)
+
+
+# Start this process's listener thread (once per pid, so it's safe to call after fork).
+def start_listener(interval=None):
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    _listener_pid = os.getpid()
+    interval = interval or settings.INVALIDATION_POLL_INTERVAL
+    threading.Thread(target=_run, args=(interval,), name="invalidation-bus", daemon=True).start()
@@ -0,0 +1,130 @@
+import datetime
+import logging
+import traceback
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger("directory.jobs")
+
+# Registered task callables by name.
+TASKS = {}
+
+# Retry delay is BACKOFF_BASE * 2 ** (attempt - 1), capped at BACKOFF_MAX (seconds).
+BACKOFF_BASE = 30
+BACKOFF_MAX = 60 * 60
+# Running jobs whose worker died are reclaimed after this long.
+STALE_LOCK_SECONDS = 15 * 60
+# How often a long-running worker prunes finished jobs (seconds).
+PRUNE_INTERVAL = 60 * 60
+
+
+# Register a function as a named background task.
+def task(name):
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+# Queue a task; workers only see it once the surrounding transaction (if any) commits.
+def enqueue(name, payload=None, delay=0, max_attempts=5):
+    if name not in TASKS:
+        raise KeyError(f"Unknown task: {name}")
+    return Job.objects.create(
+        task=name,
+        payload=payload or {},
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+        max_attempts=max_attempts,
+    )
+
+
+def backoff_seconds(attempt):
+    return min(BACKOFF_BASE * 2 ** max(attempt - 1, 0), BACKOFF_MAX)
+
+
+# Jobs a worker may claim: pending and due, or left "running" by a worker that died
+# more than STALE_LOCK_SECONDS ago.
+def _claimable(now):
+    stale = now - datetime.timedelta(seconds=STALE_LOCK_SECONDS)
+    return Q(status=Job.STATUS_PENDING, run_after__lte=now) | Q(status=Job.STATUS_RUNNING, locked_at__lt=stale)
+
+
+# Put jobs left "running" by a crashed worker back in the queue.
+def release_stale_jobs():
+    cutoff = timezone.now() - datetime.timedelta(seconds=STALE_LOCK_SECONDS)
+    return Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=cutoff).update(
+        status=Job.STATUS_PENDING, locked_at=None
+    )
+
+
+# Claim the next due job, reclaiming stale locks as it goes. The conditional UPDATE is the
+# lock, so several workers can poll the same table safely on both SQLite and Postgres.
+def claim_next():
+    now = timezone.now()
+    candidates = Job.objects.filter(_claimable(now)).values_list("pk", flat=True)[:10]
+    for pk in candidates:
+        claimed = Job.objects.filter(_claimable(now), pk=pk).update(
+            status=Job.STATUS_RUNNING, locked_at=now, attempts=F("attempts") + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+# Run one claimed job, recording success, a scheduled retry, or a dead letter. Tasks run
+# in autocommit: many do network I/O (feeds, Google, email, rendering) and must not hold a
+# transaction (or a pooled connection) open meanwhile; those that need atomicity open their
+# own. Each status change is a single UPDATE.
+def run_job(job):
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise KeyError(f"Unknown task: {job.task}")
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()[-4000:]
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.STATUS_DEAD
+            logger.error("job %s dead after %s attempts", job, job.attempts)
+        else:
+            job.status = Job.STATUS_PENDING
+            job.run_after = timezone.now() + datetime.timedelta(seconds=backoff_seconds(job.attempts))
+            logger.warning("job %s failed, retrying at %s", job, job.run_after.isoformat())
+        job.save(update_fields=["status", "run_after", "locked_at", "last_error", "updated_at"])
+        return False
+
+    job.status = Job.STATUS_DONE
+    job.locked_at = None
+    job.last_error = ""
+    job.save(update_fields=["status", "locked_at", "last_error", "updated_at"])
+    return True
+
+
+# Process due jobs until the queue is empty (or `limit` jobs ran); returns the count.
+def run_pending(limit=None):
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        ran += 1
+    return ran
+
+
+# Delete done jobs older than JOB_DONE_RETENTION_HOURS and dead letters older than
+# JOB_DEAD_RETENTION_DAYS. Returns the number of rows removed.
+def prune_finished():
+    now = timezone.now()
+    done = Job.objects.filter(
+        status=Job.STATUS_DONE, updated_at__lt=now - datetime.timedelta(hours=settings.JOB_DONE_RETENTION_HOURS)
+    ).delete()[0]
+    dead = Job.objects.filter(
+        status=Job.STATUS_DEAD, updated_at__lt=now - datetime.timedelta(days=settings.JOB_DEAD_RETENTION_DAYS)
+    ).delete()[0]
+    return done + dead
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from directory.retention import BATCH_SIZE, archive_news
+
+
+class Command(BaseCommand):
+    help = "Move old news posts into the archive table so NewsPost stays small (run on a schedule)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Keep posts newer than this (default: NEWS_RETENTION_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Posts moved per transaction")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else settings.NEWS_RETENTION_DAYS
+        if days < 1 or options["batch_size"] < 1:
+            raise CommandError("--days and --batch-size must be positive.")
+        archived = archive_news(days, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} posts older than {days} days."))
@@ -0,0 +1,66 @@
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from directory.media import serve_media
+
+
+# Time how long a worker is held: from dispatch until the last body byte is handed off.
+def _occupancy(view, request, **kwargs):
+    start = time.perf_counter()
+    response = view(request, **kwargs)
+    for _ in response:
+        pass
+    response.close()
+    return time.perf_counter() - start, response
+
+
+class Command(BaseCommand):
+    help = "Compare worker occupancy of django.views.static.serve against the production media view"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-mb", type=int, default=8, help="Size of the synthetic media file")
+        parser.add_argument("--runs", type=int, default=20, help="Requests per mode")
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        runs = options["runs"]
+
+        with tempfile.TemporaryDirectory() as media_root:
+            name = "bench.0123abcd.jpg"
+            with open(os.path.join(media_root, name), "wb") as fh:
+                fh.write(os.urandom(options["size_mb"] * 1024 * 1024))
+
+            modes = [
+                ("static.serve", serve, {"document_root": media_root}, "", {}),
+                ("serve_media (stream)", serve_media, {}, "", {}),
+                ("serve_media (range 1MB)", serve_media, {}, "", {"HTTP_RANGE": "bytes=0-1048575"}),
+                ("serve_media (nginx)", serve_media, {}, "nginx", {}),
+            ]
+
+            self.stdout.write(f"{options['size_mb']} MB file, {runs} runs per mode")
+            for label, view, extra, backend, headers in modes:
+                with override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE=backend):
+                    timings = []
+                    for _ in range(runs):
+                        request = factory.get(f"/media/{name}", **headers)
+                        elapsed, response = _occupancy(view, request, path=name, **extra)
+                        timings.append(elapsed * 1000)
+                    # Revalidation should never read the file.
+                    request = factory.get(
+                        f"/media/{name}", HTTP_IF_NONE_MATCH=response.get("ETag", "")
+                    )
+                    revalidate_s, revalidate = _occupancy(view, request, path=name, **extra)
+
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                self.stdout.write(
+                    f"  {label:<26} p50={statistics.median(timings):8.2f}ms "
+                    f"p95={p95:8.2f}ms  revalidate={revalidate.status_code} "
+                    f"in {revalidate_s * 1000:.2f}ms"
+                )
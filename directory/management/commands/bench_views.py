@@ -0,0 +1,113 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from directory.assets import static_manifest_ready
+from directory.bench.runner import compare, run_benchmarks
+from directory.bench.seed import SCALES
+
+
+# Best-effort current commit so baselines can be matched to history.
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+class Command(BaseCommand):
+    help = "Benchmark the directory views against synthetic data and fake upstream APIs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", action="append", choices=sorted(SCALES), help="Data scale (repeatable, default: small)"
+        )
+        parser.add_argument("--iterations", type=int, default=20, help="Measured requests per scenario")
+        parser.add_argument("--scenario", action="append", help="Only run these scenarios (repeatable)")
+        parser.add_argument("--latency-ms", type=float, default=30, help="Google/reCAPTCHA/RSS latency")
+        parser.add_argument("--anthropic-latency-ms", type=float, default=800, help="Model call latency")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Upstream failure probability (0-1)")
+        parser.add_argument("--place-fraction", type=float, default=0.2, help="Share of businesses with a Google place ID")
+        parser.add_argument("--output", help="Write results as JSON to this path")
+        parser.add_argument("--compare", help="Baseline JSON to compare against")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95/memory growth vs baseline")
+
+    def handle(self, *args, **options):
+        # Pages render in-process; with DEBUG off they need the hashed static manifest.
+        if not static_manifest_ready():
+            raise CommandError("No static manifest; run `manage.py build_assets` or set DEBUG=true.")
+        scales = options["scale"] or ["small"]
+        latency = options["latency_ms"] / 1000
+        upstream_latency = {
+            "google": latency,
+            "recaptcha": latency,
+            "rss": latency,
+            "anthropic": options["anthropic_latency_ms"] / 1000,
+        }
+
+        # Run against a throwaway test database so real data is never touched.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = run_benchmarks(
+                scales,
+                iterations=options["iterations"],
+                latency=upstream_latency,
+                failure_rate=options["failure_rate"],
+                place_fraction=options["place_fraction"],
+                only=options["scenario"],
+                stdout=self.stdout,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for scale, scenarios in results.items():
+            self.stdout.write(f"\n[{scale}]")
+            self.stdout.write(
+                f"  {'scenario':<24} {'cold':>9} {'p50':>9} {'p95':>9} {'queries':>8} {'peak KiB':>10} {'errors':>7}"
+            )
+            for name, stats in scenarios.items():
+                if name.startswith("_"):
+                    continue
+                self.stdout.write(
+                    f"  {name:<24} {stats['cold_ms']:>8.1f}ms {stats['p50_ms']:>7.1f}ms "
+                    f"{stats['p95_ms']:>7.1f}ms {stats['queries']:>8} {stats['peak_kib']:>10.1f} "
+                    f"{stats['errors']:>7}"
+                )
+            self.stdout.write(f"  upstream calls: {scenarios.get('_upstream_requests', {})}")
+            self.stdout.write(f"  upstream response bytes: {scenarios.get('_upstream_bytes', {})}")
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "options": {
+                    key: options[key]
+                    for key in ("iterations", "latency_ms", "anthropic_latency_ms", "failure_rate", "place_fraction")
+                },
+            },
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+            regressions = compare(baseline.get("results", {}), results, tolerance=options["tolerance"])
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(f"  REGRESSION {line}")
+                raise CommandError(f"{len(regressions)} regression(s) vs {options['compare']}")
+            self.stdout.write(self.style.SUCCESS("No regressions vs baseline."))
@@ -0,0 +1,34 @@
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from directory.assets import MINIFY_PREFIX, inline_critical_css
+
+
+class Command(BaseCommand):
+    help = "Build front-end assets: minify, hash and pre-compress static files, then report sizes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Empty STATIC_ROOT first")
+
+    def handle(self, *args, **options):
+        if not hasattr(staticfiles_storage, "load_manifest"):
+            raise CommandError("STORAGES['staticfiles'] is not a manifest storage; nothing would be hashed.")
+        call_command("collectstatic", interactive=False, clear=options["clear"], verbosity=0)
+        hashed_files, _ = staticfiles_storage.load_manifest()
+
+        self.stdout.write(f"  {'asset':<40} {'bytes':>8} {'gzip':>8} {'brotli':>8}")
+        for name, hashed in sorted(hashed_files.items()):
+            if not name.startswith(MINIFY_PREFIX) or not name.endswith((".css", ".js")):
+                continue
+            path = os.path.join(settings.STATIC_ROOT, hashed)
+            sizes = [os.path.getsize(p) if os.path.exists(p) else "-" for p in (path, path + ".gz", path + ".br")]
+            self.stdout.write(f"  {hashed:<40} " + " ".join(f"{size:>8}" for size in sizes))
+
+        critical = inline_critical_css("directory/css/site.css")
+        self.stdout.write(
+            self.style.SUCCESS(f"Built to {settings.STATIC_ROOT}; inline critical CSS is {len(critical)} bytes.")
+        )
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from directory.views import build_home_snapshot
+
+
+class Command(BaseCommand):
+    help = "Precompute the homepage for every sort mode into the cache (run on a schedule)"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        size = build_home_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(f"Homepage snapshot built in {time.monotonic() - started:.2f}s ({size:,} bytes).")
+        )
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from directory import snapshots, staticrender
+from directory.thumbnails import enforce_cap, process_pending
+
+
+class Command(BaseCommand):
+    help = "Download pending news images, write local thumbnails and trim the cache to its size cap"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, help="Process at most this many images")
+        parser.add_argument(
+            "--max-bytes",
+            type=int,
+            help="Cache size cap in bytes (default: NEWS_IMAGE_CACHE_MAX_BYTES)",
+        )
+
+    def handle(self, *args, **options):
+        counts = process_pending(limit=options["limit"])
+        freed = enforce_cap(options["max_bytes"])
+        # Status changes go through update(), so refresh the pages showing thumbnails here.
+        if counts["cached"] or freed:
+            snapshots.invalidate_home()
+            staticrender.schedule_render()
+
+        cap = options["max_bytes"] if options["max_bytes"] is not None else settings.NEWS_IMAGE_CACHE_MAX_BYTES
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{counts['cached']} cached, {counts['failed']} failed, "
+                f"{freed} bytes evicted (cap {cap} bytes)."
+            )
+        )
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from directory import chatcache
+from directory.checks import PROCESS_LOCAL_CACHES
+
+
+class Command(BaseCommand):
+    help = "Report chatbot reply cache hit rates (needs the shared cache, REDIS_URL)"
+
+    def handle(self, *args, **options):
+        # The counters live in the default cache; a per-process cache here is this command's
+        # own, empty one, not the web workers'.
+        if settings.CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHES:
+            raise CommandError("The cache is per-process, so the web workers' counters aren't visible; set REDIS_URL.")
+        stats = chatcache.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} (near-duplicate {stats['near_hits']}) "
+            f"misses={stats['misses']} hit_rate={stats['hit_rate']:.1%}"
+        )
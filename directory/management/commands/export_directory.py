@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from directory.bulk import BUSINESS_FIELDS, REVIEW_FIELDS, RowWriter, detect_format, iter_business_rows, iter_review_rows
+
+EXPORTS = {
+    "businesses": (BUSINESS_FIELDS, iter_business_rows),
+    "reviews": (REVIEW_FIELDS, iter_review_rows),
+}
+
+
+class Command(BaseCommand):
+    help = "Stream businesses or reviews to CSV or JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(EXPORTS), help="What to export")
+        parser.add_argument("--output", help="Output file (default: stdout)")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Override format detection")
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        fmt = detect_format(path or "", options["format"]) if path or options["format"] else "jsonl"
+        fields, rows = EXPORTS[options["model"]]
+
+        fh = open(path, "w", newline="", encoding="utf-8") if path else sys.stdout
+        try:
+            writer = RowWriter(fh, fmt, fields)
+            count = 0
+            for row in rows():
+                writer.write(row)
+                count += 1
+        finally:
+            if path:
+                fh.close()
+
+        if path:
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} {options['model']} to {path}."))
@@ -1,11 +1,13 @@
 import hashlib
-import feedparser
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.utils.html import strip_tags
 import datetime
 
-from directory.models import NewsPost
+from directory.models import NewsImage, NewsPost
+from directory.retention import known_guids
+from directory.signals import batched_changes
+from directory.thumbnails import schedule_cache
 
 RSS_FEEDS = [
     {
@@ -19,6 +21,32 @@ RSS_FEEDS = [
 ]
 
 
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+
+def _is_image(url, mime_type="", medium=""):
+    path = url.split("?", 1)[0].lower()
+    return medium == "image" or mime_type.startswith("image/") or path.endswith(IMAGE_EXTENSIONS)
+
+
+# First image attached to an entry: Media RSS content/thumbnails, then enclosures.
+def _entry_image(entry):
+    candidates = [
+        (m.get("url", ""), m.get("type", ""), m.get("medium", "")) for m in entry.get("media_content", [])
+    ]
+    candidates += [(m.get("url", ""), "image/", "") for m in entry.get("media_thumbnail", [])]
+    candidates += [(e.get("href", ""), e.get("type", ""), "") for e in entry.get("enclosures", [])]
+    for url, mime_type, medium in candidates:
+        if url.startswith(("http://", "https://")) and len(url) <= 1000 and _is_image(url, mime_type, medium):
+            return url
+    return ""
+
+
+def _guid(entry):
+    guid_raw = entry.get("id") or entry.get("link", "") or (entry.get("title") or "").strip()
+    return hashlib.sha256(guid_raw.encode()).hexdigest()
+
+
 def _to_datetime(struct_time):
     if struct_time:
         try:
@@ -32,33 +60,53 @@ class Command(BaseCommand):
     help = "Fetch news from configured RSS feeds"
 
     def handle(self, *args, **options):
+        import feedparser
+
         created = 0
-        for feed_cfg in RSS_FEEDS:
-            feed = feedparser.parse(feed_cfg["url"])
-            if feed.bozo and not feed.entries:
-                self.stderr.write(f"[{feed_cfg['name']}] failed: {feed.bozo_exception}")
-                continue
-
-            for entry in feed.entries:
-                title = (entry.get("title") or "").strip()
-                link = entry.get("link", "")
-                summary = strip_tags(entry.get("summary") or entry.get("description") or "").strip()
-                guid_raw = entry.get("id") or link or title
-                guid = hashlib.sha256(guid_raw.encode()).hexdigest()
-                published_at = _to_datetime(entry.get("published_parsed") or entry.get("updated_parsed"))
-
-                if not title or NewsPost.objects.filter(guid=guid).exists():
+        new_images = 0
+        # Posts are saved one by one; refresh the caches they feed once, after the loop.
+        with batched_changes():
+            for feed_cfg in RSS_FEEDS:
+                feed = feedparser.parse(feed_cfg["url"])
+                if feed.bozo and not feed.entries:
+                    self.stderr.write(f"[{feed_cfg['name']}] failed: {feed.bozo_exception}")
                     continue
 
-                NewsPost.objects.create(
-                    title=title,
-                    summary=summary[:1000],
-                    source_name=feed_cfg["name"],
-                    source_url=link,
-                    guid=guid,
-                    published_at=published_at,
-                )
-                created += 1
-                self.stdout.write(f"  + {title[:80]}")
+                # One lookup per feed for items already imported, including archived ones.
+                guids = [_guid(entry) for entry in feed.entries]
+                seen = known_guids(guids)
+
+                for entry, guid in zip(feed.entries, guids):
+                    title = (entry.get("title") or "").strip()
+                    if not title or guid in seen:
+                        continue
+                    seen.add(guid)
+                    link = entry.get("link", "")
+                    summary = strip_tags(entry.get("summary") or entry.get("description") or "").strip()
+                    published_at = _to_datetime(entry.get("published_parsed") or entry.get("updated_parsed"))
+
+                    # Posts sharing an image URL share one cached copy.
+                    image_url = _entry_image(entry)
+                    image = None
+                    if image_url:
+                        image, image_created = NewsImage.objects.get_or_create(source_url=image_url)
+                        new_images += image_created
+
+                    NewsPost.objects.create(
+                        title=title,
+                        summary=summary[:1000],
+                        source_name=feed_cfg["name"],
+                        source_url=link,
+                        image_url=image_url,
+                        image=image,
+                        guid=guid,
+                        published_at=published_at,
+                    )
+                    created += 1
+                    self.stdout.write(f"  + {title[:80]}")
+
+        # Thumbnails are downloaded by the job queue, never while the feeds are being read.
+        if new_images:
+            schedule_cache()
 
         self.stdout.write(self.style.SUCCESS(f"Done — {created} new posts imported."))
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from django.utils import timezone
+
+from directory import staticrender
+from directory.geo import encode
+from directory.geocoders import GeocodingError, get_geocoder
+from directory.models import Business
+
+
+class Command(BaseCommand):
+    help = "Fill latitude/longitude/geohash for businesses whose address is new or has changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Geocode every business with an address")
+        parser.add_argument("--limit", type=int, help="Stop after this many businesses")
+        parser.add_argument(
+            "--geocoder",
+            help="Dotted path to a geocoder class (default: GEOCODER setting), "
+            "e.g. directory.geocoders.StubGeocoder",
+        )
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to wait between lookups")
+
+    def handle(self, *args, **options):
+        try:
+            geocoder = get_geocoder(options["geocoder"])
+        except (ImportError, GeocodingError) as exc:
+            raise CommandError(str(exc))
+
+        pending = Business.objects.exclude(address="").order_by("pk")
+        if not options["all"]:
+            # geocoded_address starts empty, so this also picks up never-geocoded rows.
+            pending = pending.exclude(geocoded_address=F("address"))
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+
+        counts = {"geocoded": 0, "not_found": 0, "failed": 0}
+        for business in pending.only("pk", "name", "address"):
+            try:
+                point = geocoder.geocode(business.address)
+            except GeocodingError as exc:
+                counts["failed"] += 1
+                self.stderr.write(f"  {business.name}: {exc}")
+                continue
+            if point is None:
+                # Record the miss so unchanged addresses aren't retried on every run.
+                values = {"latitude": None, "longitude": None, "geohash": ""}
+                counts["not_found"] += 1
+            else:
+                lat, lng = point
+                values = {"latitude": lat, "longitude": lng, "geohash": encode(lat, lng)}
+                counts["geocoded"] += 1
+            # update() skips Business.save() and its signals; the static export is refreshed once below.
+            Business.objects.filter(pk=business.pk).update(
+                geocoded_address=business.address, updated_at=timezone.now(), **values
+            )
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        if counts["geocoded"] or counts["not_found"]:
+            staticrender.schedule_render()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{counts['geocoded']} geocoded, {counts['not_found']} not found, {counts['failed']} failed."
+            )
+        )
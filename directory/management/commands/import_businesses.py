@@ -0,0 +1,133 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from directory import chatcache, invalidation, snapshots, staticrender
+from directory.bulk import BUSINESS_FIELDS, chunked, clean_business_row, detect_format, read_rows
+from directory.models import Business
+
+UPDATE_FIELDS = [f for f in BUSINESS_FIELDS if f != "slug"]
+
+
+# One parameterised UPDATE run with executemany; QuerySet.bulk_update builds a CASE
+# expression per field and row, which costs milliseconds of Python per row.
+def _update_rows(businesses):
+    if not businesses:
+        return
+    qn = connection.ops.quote_name
+    # Raw SQL skips auto_now, so the modified timestamp is set here.
+    updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    assignments = ", ".join(
+        f"{qn(Business._meta.get_field(field).column)} = %s" for field in UPDATE_FIELDS + ["updated_at"]
+    )
+    sql = f"UPDATE {qn(Business._meta.db_table)} SET {assignments} WHERE {qn('id')} = %s"
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            sql, [[getattr(b, field) for field in UPDATE_FIELDS] + [updated_at, b.pk] for b in businesses]
+        )
+
+
+class Command(BaseCommand):
+    help = "Bulk import businesses from CSV or JSON Lines, matching existing rows by place ID or slug"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file (.csv or .jsonl)")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Override format detection")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction")
+        parser.add_argument(
+            "--on-conflict",
+            choices=["update", "skip"],
+            default="update",
+            help="What to do when a row matches an existing business",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Parse and match without writing")
+
+    def handle(self, *args, **options):
+        fmt = detect_format(options["path"], options["format"])
+        totals = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0, "invalid": 0}
+        started = time.monotonic()
+
+        try:
+            fh = open(options["path"], newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with fh:
+            rows = read_rows(fh, fmt)
+            for n, chunk in enumerate(chunked(rows, options["batch_size"]), start=1):
+                counts = self._import_chunk(chunk, options["on_conflict"], options["dry_run"])
+                for key, value in counts.items():
+                    totals[key] += value
+                done = sum(totals.values())
+                rate = done / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f"  batch {n}: {done} rows ({totals['created']} created, {totals['updated']} updated, "
+                    f"{totals['unchanged']} unchanged, {totals['skipped']} skipped, "
+                    f"{totals['invalid']} invalid) {rate:,.0f} rows/s"
+                )
+
+        # bulk_create/bulk_update bypass model signals, so invalidate derived caches once here.
+        if not options["dry_run"] and (totals["created"] or totals["updated"]):
+            chatcache.bump_data_version()
+            snapshots.invalidate_home()
+            staticrender.schedule_render()
+            invalidation.publish("google:*")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done in {time.monotonic() - started:.1f}s — {totals['created']} created, "
+                f"{totals['updated']} updated, {totals['unchanged']} unchanged, "
+                f"{totals['skipped']} skipped, {totals['invalid']} invalid."
+            )
+        )
+
+    def _import_chunk(self, chunk, on_conflict, dry_run):
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0, "invalid": 0}
+
+        # Clean and dedupe within the chunk (last row for a slug wins).
+        cleaned = {}
+        for row in chunk:
+            values = clean_business_row(row)
+            if values is None:
+                counts["invalid"] += 1
+                continue
+            cleaned[values["slug"]] = values
+        if not cleaned:
+            return counts
+
+        place_ids = {v["google_place_id"] for v in cleaned.values() if v["google_place_id"]}
+        with transaction.atomic():
+            # One lookup per chunk for every possible match.
+            existing = Business.objects.filter(slug__in=list(cleaned))
+            if place_ids:
+                existing = existing | Business.objects.filter(google_place_id__in=place_ids)
+            by_place = {}
+            by_slug = {}
+            for business in existing.select_for_update():
+                by_slug[business.slug] = business
+                if business.google_place_id:
+                    by_place[business.google_place_id] = business
+
+            to_create, to_update = [], []
+            for slug, values in cleaned.items():
+                match = by_place.get(values["google_place_id"]) or by_slug.get(slug)
+                if match is None:
+                    to_create.append(Business(**values))
+                elif on_conflict == "skip":
+                    counts["skipped"] += 1
+                elif all(getattr(match, field) == values[field] for field in UPDATE_FIELDS):
+                    # Re-imports of identical data cost no writes.
+                    counts["unchanged"] += 1
+                else:
+                    for field in UPDATE_FIELDS:
+                        setattr(match, field, values[field])
+                    to_update.append(match)
+
+            if not dry_run:
+                Business.objects.bulk_create(to_create)
+                _update_rows(to_update)
+            counts["created"] += len(to_create)
+            counts["updated"] += len(to_update)
+        return counts
@@ -0,0 +1,121 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from directory import reviews
+from directory.bulk import chunked, clean_review_row, detect_format, read_rows
+from directory.models import Business, Review
+
+INSERT_FIELDS = ["business_id", "rating", "name", "email", "comment", "is_approved", "created_at"]
+
+
+# One parameterised INSERT run with executemany. bulk_create would overwrite created_at
+# (auto_now_add), and imported reviews keep their original dates.
+def _insert_rows(rows):
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(Review._meta.get_field(field).column) for field in INSERT_FIELDS)
+    placeholders = ", ".join(["%s"] * len(INSERT_FIELDS))
+    sql = f"INSERT INTO {qn(Review._meta.db_table)} ({columns}) VALUES ({placeholders})"
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            sql,
+            [
+                [row[field] for field in INSERT_FIELDS[:-1]]
+                + [connection.ops.adapt_datetimefield_value(row["created_at"])]
+                for row in rows
+            ],
+        )
+
+
+class Command(BaseCommand):
+    help = "Bulk import reviews from CSV or JSON Lines (the export_directory format), keyed by business slug"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file (.csv or .jsonl)")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Override format detection")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Parse and match without writing")
+
+    def handle(self, *args, **options):
+        fmt = detect_format(options["path"], options["format"])
+        totals = {"created": 0, "duplicate": 0, "unknown_business": 0, "invalid": 0}
+        business_ids = set()
+        started = time.monotonic()
+
+        try:
+            fh = open(options["path"], newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with fh:
+            rows = read_rows(fh, fmt)
+            for n, chunk in enumerate(chunked(rows, options["batch_size"]), start=1):
+                counts = self._import_chunk(chunk, options["dry_run"], business_ids)
+                for key, value in counts.items():
+                    totals[key] += value
+                done = sum(totals.values())
+                rate = done / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f"  batch {n}: {done} rows ({totals['created']} created, {totals['duplicate']} duplicate, "
+                    f"{totals['unknown_business']} unknown business, {totals['invalid']} invalid) {rate:,.0f} rows/s"
+                )
+
+        # Raw inserts bypass the Review signals, so refresh listings and derived caches once here.
+        if not options["dry_run"] and business_ids:
+            reviews.touch_businesses(business_ids)
+            reviews.reviews_changed()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done in {time.monotonic() - started:.1f}s — {totals['created']} created, "
+                f"{totals['duplicate']} duplicate, {totals['unknown_business']} unknown business, "
+                f"{totals['invalid']} invalid."
+            )
+        )
+
+    def _import_chunk(self, chunk, dry_run, business_ids):
+        counts = {"created": 0, "duplicate": 0, "unknown_business": 0, "invalid": 0}
+
+        cleaned = []
+        for row in chunk:
+            values = clean_review_row(row)
+            if values is None:
+                counts["invalid"] += 1
+            else:
+                cleaned.append(values)
+        if not cleaned:
+            return counts
+
+        # One lookup per chunk for the listings, one for reviews already present (re-imports of
+        # an export are skipped row by row: same listing, date, name and comment).
+        by_slug = dict(
+            Business.objects.filter(slug__in={v["business_slug"] for v in cleaned}).values_list("slug", "pk")
+        )
+        seen = set(
+            Review.objects.filter(
+                business_id__in=set(by_slug.values()), created_at__in={v["created_at"] for v in cleaned}
+            ).values_list("business_id", "created_at", "name", "comment")
+        )
+
+        to_insert = []
+        for values in cleaned:
+            business_id = by_slug.get(values["business_slug"])
+            if business_id is None:
+                counts["unknown_business"] += 1
+                continue
+            key = (business_id, values["created_at"], values["name"], values["comment"])
+            if key in seen:
+                counts["duplicate"] += 1
+                continue
+            seen.add(key)
+            to_insert.append(dict(values, business_id=business_id))
+
+        if not dry_run:
+            with transaction.atomic():
+                _insert_rows(to_insert)
+            business_ids.update(row["business_id"] for row in to_insert)
+        counts["created"] += len(to_insert)
+        return counts
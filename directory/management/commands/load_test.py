@@ -0,0 +1,159 @@
+import importlib.util
+import json
+import os
+import platform
+import tempfile
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from directory.assets import static_manifest_ready
+from directory.bench.fakes import FakeUpstreams
+from directory.bench.load import (
+    DEFAULT_LEVELS,
+    ROUTE_MIX,
+    WORKER_CONFIGS,
+    capacity,
+    database_environment,
+    recommend,
+    saturation_curve,
+    server_environment,
+    unavailable_reason,
+)
+from directory.bench.seed import SCALES, seed
+from directory.management.commands.bench_views import _git_commit
+from directory.models import Business
+
+
+def _levels(value):
+    try:
+        levels = sorted({int(part) for part in value.split(",") if part.strip()})
+    except ValueError:
+        raise CommandError("--concurrency takes comma-separated integers, e.g. 1,4,16")
+    if not levels or levels[0] < 1:
+        raise CommandError("--concurrency levels must be positive.")
+    return levels
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test gunicorn worker configurations against seeded data and fake upstreams: "
+        "saturation curves, error rates, memory per worker and a recommended config"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--config", action="append", choices=sorted(WORKER_CONFIGS), help="Worker config (repeatable, default: all)"
+        )
+        parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Seeded data scale")
+        parser.add_argument(
+            "--concurrency",
+            default=",".join(map(str, DEFAULT_LEVELS)),
+            help="Concurrent visitors per step, comma-separated",
+        )
+        parser.add_argument("--duration", type=float, default=10, help="Seconds per concurrency step")
+        parser.add_argument("--latency-ms", type=float, default=30, help="Google/reCAPTCHA/RSS latency")
+        parser.add_argument("--anthropic-latency-ms", type=float, default=800, help="Model call latency")
+        parser.add_argument("--slo-ms", type=float, default=500, help="p95 latency target for page routes")
+        parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate target (0-1)")
+        parser.add_argument("--output", help="Write results as JSON to this path")
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec("gunicorn") is None:
+            raise CommandError("gunicorn is not installed.")
+        # DEBUG is off in the servers, so pages need the hashed static manifest.
+        if not static_manifest_ready(debug=False):
+            raise CommandError("No static manifest; run `manage.py build_assets` first.")
+
+        names = options["config"] or list(WORKER_CONFIGS)
+        levels = _levels(options["concurrency"])
+        latency = options["latency_ms"] / 1000
+        upstream_latency = {
+            "google": latency,
+            "recaptcha": latency,
+            "rss": latency,
+            "anthropic": options["anthropic_latency_ms"] / 1000,
+        }
+
+        workdir = tempfile.mkdtemp(prefix="ouray-load-")
+        log_path = os.path.join(workdir, "gunicorn.log")
+        # The servers are separate processes, so a SQLite test database must be a file.
+        if connection.vendor == "sqlite":
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(workdir, "load.sqlite3")
+
+        # Seed a throwaway test database so real data is never touched.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        results = {}
+        try:
+            self.stdout.write(f"Seeding {options['scale']}: {SCALES[options['scale']]}")
+            seed(**SCALES[options["scale"]])
+            slugs = list(Business.objects.values_list("slug", flat=True)[:500])
+            database = database_environment(connection.settings_dict)
+            connection.close()
+
+            with FakeUpstreams(latency=upstream_latency) as fakes:
+                env = server_environment(database, fakes)
+                for name in names:
+                    config = WORKER_CONFIGS[name]
+                    reason = unavailable_reason(config)
+                    if reason:
+                        self.stdout.write(f"\n[{name}] skipped: {reason}")
+                        results[name] = {"config": config, "skipped": reason}
+                        continue
+                    self.stdout.write(f"\n[{name}] {config['workers']} x {config['worker_class']}, {config['threads']} threads")
+                    curve = saturation_curve(
+                        config,
+                        env,
+                        slugs,
+                        levels,
+                        options["duration"],
+                        options["slo_ms"],
+                        options["max_error_rate"],
+                        log_path,
+                        stdout=self.stdout,
+                    )
+                    results[name] = {"config": config, "levels": curve, "capacity": capacity(curve)}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        capacities = {name: result.get("capacity") for name, result in results.items()}
+        self.stdout.write(f"\n  {'config':<14} {'max req/s':>10} {'max visitors':>13} {'worker memory':>14}")
+        for name, cap in capacities.items():
+            if cap is None:
+                continue
+            memory = f"{cap['memory_kib'] / 1024:.0f}MiB" if cap["memory_kib"] else "-"
+            self.stdout.write(f"  {name:<14} {cap['rps']:>10.1f} {cap['concurrency']:>13} {memory:>14}")
+
+        best = recommend(capacities)
+        if best:
+            self.stdout.write(self.style.SUCCESS(f"Recommended: {best} ({WORKER_CONFIGS[best]})"))
+        else:
+            self.stdout.write(self.style.WARNING("No configuration met the SLO at any concurrency."))
+        self.stdout.write(f"Server log: {log_path}")
+
+        if options["output"]:
+            report = {
+                "meta": {
+                    "commit": _git_commit(),
+                    "created_at": timezone.now().isoformat(),
+                    "python": platform.python_version(),
+                    "django": django.get_version(),
+                    "database": connection.vendor,
+                    "cpus": os.cpu_count(),
+                    "route_mix": ROUTE_MIX,
+                    "options": {
+                        key: options[key]
+                        for key in (
+                            "scale", "concurrency", "duration", "latency_ms", "anthropic_latency_ms",
+                            "slo_ms", "max_error_rate",
+                        )
+                    },
+                },
+                "results": results,
+                "recommended": best,
+            }
+            with open(options["output"], "w") as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,93 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+# "import time: self [us] | cumulative | imported package" lines from python -X importtime.
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+# What a worker does before serving: configure Django, build the WSGI app and load every
+# view module (the URL resolver imports them on the first request otherwise).
+STARTUP_CODE = (
+    "import config.wsgi\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+WARM_UP_CODE = "from config.startup import warm_up\nwarm_up()\n"
+
+
+# Parse -X importtime output into [{"module", "self_us", "cumulative_us", "depth"}].
+def parse_importtime(text):
+    entries = []
+    for line in text.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append(
+                {
+                    "module": module,
+                    "self_us": int(self_us),
+                    "cumulative_us": int(cumulative_us),
+                    "depth": len(indent) // 2,
+                }
+            )
+    return entries
+
+
+# Self time summed per top-level package.
+def by_package(entries):
+    totals = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        totals[package] = totals.get(package, 0) + entry["self_us"]
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+class Command(BaseCommand):
+    help = "Profile worker startup in a fresh interpreter and report import time per module"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20, help="Rows to show per table")
+        parser.add_argument("--sort", choices=["cumulative", "self"], default="cumulative")
+        parser.add_argument(
+            "--warm-up", action="store_true", help="Also run config.startup.warm_up() as a preloading master does"
+        )
+        parser.add_argument("--output", help="Write the parsed entries as JSON to this path")
+
+    def handle(self, *args, **options):
+        code = STARTUP_CODE + (WARM_UP_CODE if options["warm_up"] else "")
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings"))
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        entries = parse_importtime(proc.stderr)
+        if proc.returncode != 0:
+            errors = "\n".join(line for line in proc.stderr.splitlines() if not IMPORTTIME_RE.match(line))
+            raise CommandError(f"Startup failed:\n{errors}")
+
+        key = f"{options['sort']}_us"
+        top = options["top"]
+        self.stdout.write(
+            f"Startup: {wall_ms:.0f}ms wall, {sum(e['self_us'] for e in entries) / 1000:.0f}ms importing "
+            f"{len(entries)} modules"
+        )
+        self.stdout.write(f"\n  {'self ms':>9} {'cumul ms':>9}  module")
+        for entry in sorted(entries, key=lambda e: -e[key])[:top]:
+            self.stdout.write(
+                f"  {entry['self_us'] / 1000:>9.1f} {entry['cumulative_us'] / 1000:>9.1f}  "
+                f"{'  ' * entry['depth']}{entry['module']}"
+            )
+        self.stdout.write(f"\n  {'self ms':>9}  package")
+        for package, self_us in by_package(entries)[:top]:
+            self.stdout.write(f"  {self_us / 1000:>9.1f}  {package}")
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump({"wall_ms": round(wall_ms, 1), "entries": entries}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
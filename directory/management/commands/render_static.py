@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from directory.assets import static_manifest_ready
+from directory.staticrender import brotli, render_site
+
+
+class Command(BaseCommand):
+    help = "Export home, news and business pages as pre-compressed HTML, re-rendering only changed pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Output directory (default: STATIC_RENDER_ROOT)")
+        parser.add_argument("--force", action="store_true", help="Re-render every page")
+
+    def handle(self, *args, **options):
+        root = options["output"] or settings.STATIC_RENDER_ROOT
+        if not root:
+            raise CommandError("Pass --output or set STATIC_RENDER_ROOT.")
+        if not static_manifest_ready():
+            raise CommandError("No static manifest; run `manage.py build_assets` first.")
+        if brotli is None:
+            self.stdout.write("brotli is not installed; writing .html and .html.gz only.")
+
+        started = time.monotonic()
+        counts = render_site(root, force=options["force"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rendered {counts['rendered']} pages in {time.monotonic() - started:.1f}s "
+                f"({counts['unchanged']} unchanged, {counts['removed']} removed) to {root}."
+            )
+        )
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from directory.jobs import PRUNE_INTERVAL, prune_finished, release_stale_jobs, run_pending
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (contact emails, news fetches, Google refreshes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain due jobs and exit")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Idle poll interval in seconds")
+
+    def handle(self, *args, **options):
+        released = release_stale_jobs()
+        if released:
+            self.stdout.write(f"Released {released} stale job(s).")
+
+        pruned_at = None
+        while True:
+            if pruned_at is None or time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                pruned = prune_finished()
+                pruned_at = time.monotonic()
+                if pruned:
+                    self.stdout.write(f"Pruned {pruned} finished job(s).")
+            ran = run_pending()
+            if ran:
+                self.stdout.write(f"Ran {ran} job(s).")
+            if options["once"]:
+                break
+            if not ran:
+                time.sleep(options["sleep"])
@@ -0,0 +1,149 @@
+import mimetypes
+import os
+import posixpath
+import re
+import urllib.parse
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+
+# Names carrying a content hash (e.g. "logo.3f2a9c1b.png") never change, so they can be cached "forever".
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+HASHED_MAX_AGE = 60 * 60 * 24 * 365
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+# Resolve a URL path to a file under MEDIA_ROOT, refusing traversal and directories.
+def _resolve(path):
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404("Invalid media path")
+    if not os.path.isfile(fullpath):
+        raise Http404("Media file not found")
+    return path, fullpath
+
+
+# Cheap validator built from stat() so we never read the file to answer a conditional request.
+def _etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+# Long-lived caching for hashed names, a short revalidating window for everything else.
+def _cache_control(path):
+    if HASHED_NAME_RE.search(path):
+        return f"public, max-age={HASHED_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+# Parse a single "bytes=a-b" range; returns (start, end) inclusive, None for no/unsupported range.
+def _parse_range(header, size):
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    start_raw, end_raw = match.groups()
+    if not start_raw and not end_raw:
+        return None
+    if not start_raw:
+        # Suffix range: the last N bytes (none exist in an empty file).
+        length = int(end_raw)
+        if length == 0 or size == 0:
+            return "unsatisfiable"
+        return max(size - length, 0), size - 1
+    start = int(start_raw)
+    end = int(end_raw) if end_raw else size - 1
+    if start >= size or end < start:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+# Stream [start, end] of a file in fixed-size chunks.
+def _iter_range(fullpath, start, end):
+    with open(fullpath, "rb") as fh:
+        fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+# Production media view: conditional GETs, byte ranges and optional proxy handoff.
+def serve_media(request, path):
+    path, fullpath = _resolve(path)
+    stat = os.stat(fullpath)
+    etag = _etag(stat)
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": _cache_control(path),
+        "Accept-Ranges": "bytes",
+    }
+
+    # Answer revalidation without touching the file contents.
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        tags = parse_etags(if_none_match)
+        if "*" in tags or etag in tags:
+            response = HttpResponseNotModified()
+            for key, value in headers.items():
+                response[key] = value
+            return response
+
+    # Hand the transfer to the front proxy so the worker is released immediately.
+    backend = settings.MEDIA_SENDFILE
+    if backend in ("nginx", "apache"):
+        response = HttpResponse(content_type=content_type)
+        if backend == "nginx":
+            prefix = settings.MEDIA_ACCEL_PREFIX.rstrip("/")
+            response["X-Accel-Redirect"] = f"{prefix}/{urllib.parse.quote(path)}"
+        else:
+            response["X-Sendfile"] = fullpath
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    # Only honour Range when If-Range (if sent) still matches the current file.
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if not if_range or if_range.strip() == etag:
+        byte_range = _parse_range(request.headers.get("Range"), stat.st_size)
+
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return response
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _iter_range(fullpath, start, end), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        # FileResponse lets the WSGI server use wsgi.file_wrapper (sendfile) for the body.
+        response = FileResponse(open(fullpath, "rb"), content_type=content_type)
+        response["Content-Length"] = str(stat.st_size)
+
+    if encoding:
+        response["Content-Encoding"] = encoding
+    for key, value in headers.items():
+        response[key] = value
+    return response
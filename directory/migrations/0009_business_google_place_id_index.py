@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0008_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='business',
+            name='google_place_id',
+            field=models.CharField(blank=True, db_index=True, max_length=200, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0014_review_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedGuid',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedNewsPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=300)),
+                ('summary', models.TextField(blank=True)),
+                ('source_name', models.CharField(blank=True, max_length=200)),
+                ('source_url', models.URLField(blank=True)),
+                ('image_url', models.URLField(blank=True, max_length=1000)),
+                ('guid', models.CharField(max_length=500)),
+                ('published_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-published_at'],
+            },
+        ),
+    ]
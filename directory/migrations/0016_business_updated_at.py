@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0015_news_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='business',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
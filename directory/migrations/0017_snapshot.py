@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0016_business_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Snapshot',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 22:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('directory', '0017_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snapshot',
+            name='stale',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -18,7 +18,17 @@ class Business(models.Model): # BEAUTIFUL, builds the database tables (CARDS) fo
     address = models.CharField(max_length=300, blank=True)
     hero_image = models.ImageField(upload_to="business_hero/", blank=True, null=True)
     logo_image = models.ImageField(upload_to="business_logos/", blank=True, null=True)
-    google_place_id = models.CharField(max_length=200, blank=True, null=True)
+    # Indexed for bulk-import matching and Google refresh lookups.
+    google_place_id = models.CharField(max_length=200, blank=True, null=True, db_index=True)
+    # Filled by `manage.py geocode_businesses`; geohash is the spatial index for /nearby/.
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
+    # Address the coordinates belong to; a mismatch means it needs geocoding again.
+    geocoded_address = models.CharField(max_length=300, blank=True, editable=False)
+    # Last change to anything the listing's page shows, its reviews included (bulk writers
+    # and review changes set it explicitly); the sitemap's lastmod.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def save(self, *args, **kwargs):
         # Auto-generate the slug from the name when not provided.
@@ -48,23 +58,90 @@ class Review(models.Model):
     comment = models.TextField(max_length=1000)
     is_approved = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Per-form idempotency key; a resubmitted form can't create a second review.
+    submission_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         # Show newest reviews first in default query order.
         ordering = ["-created_at"]
+        indexes = [
+            # The admin changelist (newest first) and its approved/rejected filter.
+            models.Index(fields=["-created_at"], name="directory_review_recent_idx"),
+            models.Index(fields=["is_approved", "-created_at"], name="directory_review_mod_idx"),
+        ]
 
     def __str__(self):
         # Compact admin display label.
         return f"{self.business.name} ({self.rating})"
 
 
+# Review submission waiting in the staging queue (REVIEW_STAGING); flushed into Review in batches.
+class StagedReview(models.Model):
+    business = models.ForeignKey(Business, on_delete=models.CASCADE, related_name="+")
+    rating = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(5)]
+    )
+    name = models.CharField(max_length=120, blank=True)
+    email = models.EmailField(blank=True)
+    comment = models.TextField(max_length=1000)
+    submission_key = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.business.name} ({self.rating}, staged)"
+
+
+# Remote news image, downloaded once and stored as local thumbnails named by content
+# hash (see directory/thumbnails.py). Posts sharing an image URL share the row; different
+# URLs with identical bytes share the files.
+class NewsImage(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+    STATUS_EVICTED = "evicted"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_READY, "Ready"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_EVICTED, "Evicted"),
+    ]
+
+    source_url = models.URLField(max_length=1000, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Bytes of this image's thumbnails on disk.
+    size = models.PositiveIntegerField(default=0)
+    # Drives LRU eviction when the cache outgrows NEWS_IMAGE_CACHE_MAX_BYTES.
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    error = models.CharField(max_length=300, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.source_url} ({self.status})"
+
+    # Thumbnail URLs by size name; empty until the image is ready.
+    @property
+    def urls(self):
+        if self.status != self.STATUS_READY:
+            return {}
+        from .thumbnails import thumbnail_urls
+
+        return thumbnail_urls(self.content_hash)
+
+
 class NewsPost(models.Model):
     title = models.CharField(max_length=300)
     slug = models.SlugField(max_length=320, unique=True, blank=True)
     summary = models.TextField(blank=True)
     source_name = models.CharField(max_length=200, blank=True)
     source_url = models.URLField(blank=True)
-    image_url = models.URLField(blank=True)
+    image_url = models.URLField(max_length=1000, blank=True)
+    image = models.ForeignKey(NewsImage, null=True, blank=True, on_delete=models.SET_NULL, related_name="posts")
     # guid prevents duplicate imports from RSS feeds
     guid = models.CharField(max_length=500, unique=True)
     published_at = models.DateTimeField(default=timezone.now)
@@ -86,3 +163,90 @@ class NewsPost(models.Model):
 
     def __str__(self):
         return self.title
+
+
+# Cold storage for news moved out of NewsPost by `manage.py archive_news`. Nothing on the
+# site reads it, so it carries no indexes beyond its key.
+class ArchivedNewsPost(models.Model):
+    title = models.CharField(max_length=300)
+    summary = models.TextField(blank=True)
+    source_name = models.CharField(max_length=200, blank=True)
+    source_url = models.URLField(blank=True)
+    image_url = models.URLField(max_length=1000, blank=True)
+    guid = models.CharField(max_length=500)
+    published_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-published_at"]
+
+    def __str__(self):
+        return self.title
+
+
+# Guids of archived posts, so feeds never re-import them. The key is 60 bits of the guid's
+# SHA-256 (see retention.guid_key): one bigint per row instead of a 500-character index.
+class ArchivedGuid(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+
+
+# Background job stored in the database; run by `manage.py run_jobs`.
+class Job(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_DEAD = "dead"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["run_after", "id"]
+        indexes = [
+            # The worker's claim query: due pending jobs in order.
+            models.Index(fields=["status", "run_after"], name="directory_job_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+# Precomputed page data shared by every process (see directory/snapshots.py): one row per
+# key holding zlib-compressed JSON. Replacing the row is the atomic swap; a stale row keeps
+# being served until its rebuild lands.
+class Snapshot(models.Model):
+    key = models.CharField(max_length=100, primary_key=True)
+    data = models.BinaryField()
+    built_at = models.DateTimeField()
+    stale = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.key} ({self.built_at:%Y-%m-%d %H:%M})"
+
+
+# Cross-process cache invalidation message; the id doubles as the key's version.
+# Workers replay rows newer than the last one they saw, and re-check ids that commit late
+# (see directory/invalidation.py).
+class InvalidationEvent(models.Model):
+    key = models.CharField(max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.key} (v{self.pk})"
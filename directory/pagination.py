@@ -0,0 +1,37 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+# Below this many rows an exact COUNT(*) is cheap enough and never surprises anyone.
+ESTIMATE_THRESHOLD = 100_000
+
+
+# Planner row estimate for a table (kept current by autovacuum/ANALYZE); -1 or 0 before
+# the table was first analyzed.
+def _table_estimate(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+        row = cursor.fetchone()
+    return row[0] if row else -1
+
+
+# Row count for an unfiltered queryset on a large Postgres table without scanning it, or
+# None when an exact count is needed (filters, searches, other databases, small tables).
+def estimated_count(queryset):
+    if not isinstance(queryset, QuerySet) or queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    estimate = _table_estimate(connection, queryset.model._meta.db_table)
+    return estimate if estimate >= ESTIMATE_THRESHOLD else None
+
+
+# Admin paginator that skips COUNT(*) over the whole table; page links past the real end
+# simply come back empty.
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        return estimate if estimate is not None else super().count
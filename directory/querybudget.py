@@ -0,0 +1,98 @@
+import json
+import logging
+from contextlib import ContextDecorator, ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("directory.perf")
+
+# Declared budgets, label -> max queries; tests walk this to enforce every entry.
+QUERY_BUDGETS = {}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# Cap the number of queries a block (or decorated view) may run.
+# QUERY_BUDGET_MODE: "raise" fails loudly (tests/DEBUG), "log" warns, "off" skips counting.
+class query_budget(ContextDecorator):
+    def __init__(self, max_queries, label=None):
+        self.max_queries = max_queries
+        self.label = label
+        self.count = 0
+        self.queries = []
+        self._stack = None
+        if label:
+            QUERY_BUDGETS[label] = max_queries
+
+    def __call__(self, func):
+        if self.label is None:
+            self.label = f"{func.__module__}.{func.__qualname__}"
+            QUERY_BUDGETS[self.label] = self.max_queries
+        wrapped = super().__call__(func)
+        wrapped.query_budget = self.max_queries
+        return wrapped
+
+    def _recreate_cm(self):
+        # A fresh counter per call keeps concurrent requests from sharing state.
+        return type(self)(self.max_queries, self.label)
+
+    def _count(self, execute, sql, params, many, context):
+        self.count += 1
+        if len(self.queries) < 50:
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.count = 0
+        self.queries = []
+        self._stack = ExitStack()
+        if settings.QUERY_BUDGET_MODE != "off":
+            for connection in connections.all():
+                self._stack.enter_context(connection.execute_wrapper(self._count))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stack.close()
+        if exc_type is not None or self.count <= self.max_queries:
+            return False
+        message = f"{self.label or 'block'} ran {self.count} queries (budget {self.max_queries})"
+        if settings.QUERY_BUDGET_MODE == "raise":
+            raise QueryBudgetExceeded(message + ":\n" + "\n".join(self.queries))
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "query_budget_exceeded",
+                    "label": self.label,
+                    "queries": self.count,
+                    "budget": self.max_queries,
+                }
+            )
+        )
+        return False
+
+
+# ModelAdmin mixin: wrap the changelist in a declared query budget.
+class QueryBudgetAdminMixin:
+    changelist_query_budget = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.changelist_query_budget is not None:
+            QUERY_BUDGETS[self._changelist_budget_label] = self.changelist_query_budget
+
+    @property
+    def _changelist_budget_label(self):
+        return f"admin:{self.opts.app_label}_{self.opts.model_name}_changelist"
+
+    def changelist_view(self, request, extra_context=None):
+        if self.changelist_query_budget is None:
+            return super().changelist_view(request, extra_context)
+        with query_budget(self.changelist_query_budget, self._changelist_budget_label):
+            response = super().changelist_view(request, extra_context)
+            # Changelists are TemplateResponses; render inside the budget so template queries count.
+            if hasattr(response, "render"):
+                response.render()
+        return response
@@ -0,0 +1,130 @@
+import contextlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils import timezone
+
+# Counters for concurrency slots expire so a crashed worker can't leak slots forever; every
+# increment pushes the expiry back, so a busy counter never lapses while slots are held.
+SLOT_TTL = 300
+
+
+class ConcurrencyLimitExceeded(Exception):
+    pass
+
+
+# Client address, honouring X-Forwarded-For only for the configured number of proxies.
+def client_ip(request):
+    proxies = settings.NUM_PROXIES
+    if proxies:
+        forwarded = [p.strip() for p in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if p.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+# Increment a shared counter, creating it with a TTL on first use.
+def _incr(key, timeout, delta=1):
+    cache.add(key, 0, timeout)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Expired between add() and incr(); start again.
+        cache.set(key, delta, timeout)
+        return delta
+
+
+# Decrement a shared counter, never below zero: if it expired and was recreated while a
+# slot was held, going negative would admit extra callers.
+def _decr(key):
+    try:
+        value = cache.decr(key)
+    except ValueError:
+        return
+    if value < 0:
+        cache.incr(key, -value)
+
+
+# Sliding-window counter state for one (limit, window): weight the previous fixed window by
+# how much of it still overlaps. Returns (allowed, retry_after_seconds, key to record a hit on).
+def _sliding_window(key, limit, window):
+    now = time.time()
+    current_window = int(now // window)
+    elapsed = (now % window) / window
+    current_key = f"rl:{key}:{window}:{current_window}"
+    previous_key = f"rl:{key}:{window}:{current_window - 1}"
+
+    counts = cache.get_many([current_key, previous_key])
+    estimated = counts.get(previous_key, 0) * (1 - elapsed) + counts.get(current_key, 0)
+    if estimated >= limit:
+        return False, max(1, int(window * (1 - elapsed))), current_key
+    return True, 0, current_key
+
+
+# Apply several (limit, window) pairs to every identity; the first denial wins. Every
+# window is checked before any hit is recorded, so a denied request uses up nothing.
+def check_rate_limits(scope, identities, limits):
+    hits = []
+    for identity in identities:
+        for limit, window in limits:
+            allowed, retry_after, current_key = _sliding_window(f"{scope}:{identity}", limit, window)
+            if not allowed:
+                return False, retry_after
+            hits.append((current_key, window))
+    for current_key, window in hits:
+        _incr(current_key, window * 2)
+    return True, 0
+
+
+# Cheap JSON 429 with Retry-After.
+def too_many_requests(message, retry_after):
+    response = JsonResponse({"error": message}, status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+# Global cap on concurrent calls shared through the cache, with a short bounded wait queue.
+@contextlib.contextmanager
+def concurrency_slot(name, max_active, queue_size, queue_timeout, poll_interval=0.1):
+    active_key = f"slots:{name}:active"
+    waiting_key = f"slots:{name}:waiting"
+
+    if _incr(waiting_key, SLOT_TTL) > queue_size:
+        _decr(waiting_key)
+        raise ConcurrencyLimitExceeded(name)
+    cache.touch(waiting_key, SLOT_TTL)
+    try:
+        deadline = time.monotonic() + queue_timeout
+        while True:
+            active = _incr(active_key, SLOT_TTL)
+            cache.touch(active_key, SLOT_TTL)
+            if active <= max_active:
+                break
+            _decr(active_key)
+            if time.monotonic() >= deadline:
+                raise ConcurrencyLimitExceeded(name)
+            time.sleep(poll_interval)
+    finally:
+        _decr(waiting_key)
+
+    try:
+        yield
+    finally:
+        _decr(active_key)
+
+
+def _token_key(name):
+    return f"tokens:{name}:{timezone.now().date().isoformat()}"
+
+
+# Tokens used today for a budget name.
+def tokens_used_today(name):
+    return cache.get(_token_key(name), 0)
+
+
+# Add usage from a model response to today's total.
+def record_token_usage(name, tokens):
+    if tokens:
+        _incr(_token_key(name), 60 * 60 * 48, tokens)
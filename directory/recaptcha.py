@@ -0,0 +1,101 @@
+import collections
+import hashlib
+import json
+import re
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .instrumentation import record_event, track_http
+
+# Google tokens are URL-safe base64-ish strings, a few hundred to ~2k characters.
+TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+TOKEN_MIN_LENGTH = 20
+TOKEN_MAX_LENGTH = 4000
+# Tokens expire after two minutes at Google; remember results a little longer.
+REPLAY_TTL = 60 * 5
+# How often a repeat submission checks for the first one's result (seconds).
+PENDING_POLL = 0.1
+
+NOT_CONFIGURED = "reCAPTCHA is not configured. Please try again later."
+MISSING = "Please complete the reCAPTCHA to submit the form."
+INVALID = "reCAPTCHA verification failed. Please try again."
+UNAVAILABLE = "Verification failed. Please try again."
+
+# One token's outcome: ok, the error to show, Google's score (v3 keys; None for v2) and
+# whether it was remembered from an earlier submission of the same token.
+Verification = collections.namedtuple("Verification", "ok error score repeated", defaults=(None, False))
+
+
+def _replay_key(token):
+    return f"recaptcha:used:{hashlib.sha256(token.encode('utf-8')).hexdigest()}"
+
+
+# The remembered result for a token, waiting while its first submission is still being
+# verified; None if that never finished (the caller reports UNAVAILABLE).
+def _remembered(key):
+    deadline = time.monotonic() + settings.RECAPTCHA_TIMEOUT + 1
+    while True:
+        result = cache.get(key)
+        if result is None or "ok" in result:
+            return result
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(PENDING_POLL)
+
+
+# Verify a reCAPTCHA token once and remember the result (success and score) for
+# REPLAY_TTL, so a double-click gets the first submission's answer without contacting
+# Google again. Cheap local checks run first; the token is claimed in the cache before
+# the network call.
+def verify(token, remote_ip=""):
+    if not settings.RECAPTCHA_SITE_KEY or not settings.RECAPTCHA_SECRET_KEY:
+        record_event("recaptcha", "not_configured")
+        return Verification(False, NOT_CONFIGURED)
+
+    token = (token or "").strip()
+    if not token:
+        record_event("recaptcha", "missing")
+        return Verification(False, MISSING)
+
+    if not (TOKEN_MIN_LENGTH <= len(token) <= TOKEN_MAX_LENGTH) or not TOKEN_RE.match(token):
+        record_event("recaptcha", "malformed")
+        return Verification(False, INVALID)
+
+    key = _replay_key(token)
+    if not cache.add(key, {"pending": True}, REPLAY_TTL):
+        record_event("recaptcha", "repeat")
+        result = _remembered(key)
+        if result is None:
+            return Verification(False, UNAVAILABLE)
+        return Verification(result["ok"], result["error"], result["score"], repeated=True)
+
+    payload = urllib.parse.urlencode(
+        {
+            "secret": settings.RECAPTCHA_SECRET_KEY,
+            "response": token,
+            "remoteip": remote_ip,
+        }
+    ).encode("utf-8")
+
+    start = time.perf_counter()
+    try:
+        # POST to Google's verification endpoint.
+        req = urllib.request.Request(settings.RECAPTCHA_VERIFY_URL, data=payload, method="POST")
+        with track_http(req.full_url), urllib.request.urlopen(req, timeout=settings.RECAPTCHA_TIMEOUT) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+    except (urllib.error.URLError, ValueError, TimeoutError):
+        # Network trouble isn't the visitor's fault; let the same token be retried.
+        cache.delete(key)
+        record_event("recaptcha", "unavailable", time.perf_counter() - start)
+        return Verification(False, UNAVAILABLE)
+
+    ok = bool(data.get("success"))
+    result = Verification(ok, "" if ok else INVALID, data.get("score"))
+    cache.set(key, {"ok": result.ok, "error": result.error, "score": result.score}, REPLAY_TTL)
+    record_event("recaptcha", "ok" if ok else "rejected", time.perf_counter() - start)
+    return result
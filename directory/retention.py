@@ -0,0 +1,71 @@
+import hashlib
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import chatcache, snapshots, staticrender
+from .models import ArchivedGuid, ArchivedNewsPost, NewsPost
+
+BATCH_SIZE = 500
+ARCHIVED_FIELDS = ("title", "summary", "source_name", "source_url", "image_url", "guid", "published_at")
+
+
+# 60 bits of the guid's SHA-256: fits a signed bigint, and collisions are negligible at
+# news volumes (a false match would skip one feed item).
+def guid_key(guid):
+    return int(hashlib.sha256(guid.encode("utf-8")).hexdigest()[:15], 16)
+
+
+# The subset of guids already imported, whether still in NewsPost or archived.
+def known_guids(guids):
+    guids = set(guids)
+    known = set(NewsPost.objects.filter(guid__in=guids).values_list("guid", flat=True))
+    keys = {guid_key(guid): guid for guid in guids - known}
+    if keys:
+        known.update(keys[key] for key in ArchivedGuid.objects.filter(pk__in=keys).values_list("pk", flat=True))
+    return known
+
+
+# One DELETE by primary key for a batch of posts, without loading them or sending signals.
+def _delete_posts(pks):
+    qn = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {qn(NewsPost._meta.db_table)} WHERE {qn(NewsPost._meta.pk.column)} IN ({placeholders})",
+            pks,
+        )
+
+
+# Move posts published before now - days into ArchivedNewsPost, batch by batch, and record
+# their guids. Returns the number of posts archived.
+def archive_news(days, batch_size=BATCH_SIZE):
+    cutoff = timezone.now() - timedelta(days=days)
+    stale = NewsPost.objects.filter(published_at__lt=cutoff).order_by("pk")
+    archived = 0
+    while True:
+        batch = list(stale.values("pk", *ARCHIVED_FIELDS)[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            ArchivedNewsPost.objects.bulk_create(
+                [ArchivedNewsPost(**{field: row[field] for field in ARCHIVED_FIELDS}) for row in batch]
+            )
+            ArchivedGuid.objects.bulk_create(
+                [ArchivedGuid(pk=guid_key(row["guid"])) for row in batch], ignore_conflicts=True
+            )
+            # A plain delete() would load every row to send its signals; nothing references
+            # NewsPost, so delete by key and invalidate once below.
+            _delete_posts([row["pk"] for row in batch])
+        archived += len(batch)
+    if archived:
+        _news_changed()
+    return archived
+
+
+# bulk_create()/raw deletes skip the NewsPost signals; do their invalidation once.
+def _news_changed():
+    chatcache.bump_data_version()
+    snapshots.invalidate_home()
+    staticrender.schedule_render()
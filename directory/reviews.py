@@ -0,0 +1,114 @@
+import re
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import snapshots, staticrender
+from .jobs import enqueue
+from .models import Business, Job, Review, StagedReview
+
+# Forms carry a random hex key (uuid4().hex server-side, crypto.randomUUID() when hydrated).
+SUBMISSION_KEY_RE = re.compile(r"^[A-Za-z0-9-]{16,64}$")
+FLUSH_TASK = "flush_staged_reviews"
+
+CREATED = "created"
+STAGED = "staged"
+DUPLICATE = "duplicate"
+
+
+# The submitted idempotency key, or "" when missing or malformed.
+def clean_submission_key(raw):
+    raw = (raw or "").strip()
+    return raw if SUBMISSION_KEY_RE.match(raw) else ""
+
+
+# Whether a submission with this key was already accepted, live or staged.
+def already_submitted(key):
+    if not key:
+        return False
+    if Review.objects.filter(submission_key=key).exists():
+        return True
+    return settings.REVIEW_STAGING and StagedReview.objects.filter(submission_key=key).exists()
+
+
+# Accept a validated review. Returns CREATED, STAGED, or DUPLICATE when a concurrent
+# request with the same key won the race (the unique constraint decides).
+def submit(business, rating, name, email, comment, key):
+    values = {"business": business, "rating": rating, "name": name, "email": email, "comment": comment}
+    try:
+        with transaction.atomic():
+            if settings.REVIEW_STAGING and key:
+                StagedReview.objects.create(submission_key=key, **values)
+            else:
+                Review.objects.create(submission_key=key or None, **values)
+    except IntegrityError:
+        return DUPLICATE
+    if settings.REVIEW_STAGING and key:
+        schedule_flush()
+        return STAGED
+    return CREATED
+
+
+# Queue one delayed flush; submissions arriving meanwhile ride along in the same batch.
+def schedule_flush():
+    if not Job.objects.filter(task=FLUSH_TASK, status=Job.STATUS_PENDING).exists():
+        enqueue(FLUSH_TASK, delay=settings.REVIEW_STAGING_FLUSH_DELAY)
+
+
+# Move staged submissions into Review in batches, invalidating derived caches once for
+# the whole run. Returns the number of reviews moved.
+def flush_staged(batch_size=None):
+    batch_size = batch_size or settings.REVIEW_STAGING_BATCH_SIZE
+    moved = 0
+    while True:
+        with transaction.atomic():
+            staged = list(StagedReview.objects.select_for_update()[:batch_size])
+            if not staged:
+                break
+            # ignore_conflicts: a key that also reached Review directly stays single.
+            Review.objects.bulk_create(
+                [
+                    Review(
+                        business_id=s.business_id,
+                        rating=s.rating,
+                        name=s.name,
+                        email=s.email,
+                        comment=s.comment,
+                        submission_key=s.submission_key,
+                    )
+                    for s in staged
+                ],
+                ignore_conflicts=True,
+            )
+            StagedReview.objects.filter(pk__in=[s.pk for s in staged]).delete()
+            touch_businesses({s.business_id for s in staged})
+        moved += len(staged)
+    if moved:
+        reviews_changed()
+    return moved
+
+
+# Approve or reject reviews in one UPDATE (admin bulk moderation). Ratings are always
+# aggregated from approved rows, so only the caches built from them need refreshing.
+# Returns the number of reviews whose state changed.
+def set_approval(queryset, approved):
+    pending = queryset.exclude(is_approved=approved)
+    touch_businesses(pending.values("business_id"))
+    changed = pending.update(is_approved=approved)
+    if changed:
+        reviews_changed()
+    return changed
+
+
+# Mark listings as modified (for the sitemap's lastmod) when their reviews change. Takes
+# ids or a subquery of them; one UPDATE either way.
+def touch_businesses(business_ids):
+    Business.objects.filter(pk__in=business_ids).update(updated_at=timezone.now())
+
+
+# Writers that skip the Review signals (update(), bulk_create(), import_reviews' raw inserts)
+# call this once per batch to refresh the home snapshot and static export.
+def reviews_changed():
+    snapshots.invalidate_home()
+    staticrender.schedule_render()
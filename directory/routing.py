@@ -0,0 +1,125 @@
+import contextvars
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .instrumentation import record_event
+
+logger = logging.getLogger("directory.perf")
+
+# Cookie that pins a visitor to the primary for REPLICA_PIN_SECONDS after they write.
+PIN_COOKIE = "db_primary"
+
+# Replay lag in seconds; 0 when the replica has applied everything it received (an idle
+# primary would otherwise look like a lagging replica).
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Routing state for the request being handled: the replica alias its reads may use
+# (None = primary) and whether it wrote anything.
+_state = contextvars.ContextVar("directory_db_route", default=None)
+
+# alias -> (monotonic time of the last lag check, usable)
+_health = {}
+
+
+# Mark a view as safe to serve from a replica: it only reads, and a few seconds of
+# staleness is acceptable to anyone who hasn't just written.
+def replica_reads(view):
+    view.replica_reads = True
+    return view
+
+
+def _measure_lag(alias):
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        return float(cursor.fetchone()[0] or 0)
+
+
+# Replicas within REPLICA_MAX_LAG seconds of the primary. Each is re-checked at most every
+# REPLICA_LAG_CHECK_INTERVAL seconds per process; one that errors sits out until the next check.
+def healthy_replicas():
+    now = time.monotonic()
+    healthy = []
+    for alias in settings.DATABASE_REPLICAS:
+        checked_at, usable = _health.get(alias, (None, False))
+        if checked_at is None or now - checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL:
+            try:
+                lag = _measure_lag(alias)
+            except DatabaseError as exc:
+                logger.warning("replica %s unavailable: %s", alias, exc)
+                usable = False
+            else:
+                usable = lag <= settings.REPLICA_MAX_LAG
+                if not usable:
+                    logger.warning("replica %s is %.1fs behind; reading from primary", alias, lag)
+            _health[alias] = (now, usable)
+        if usable:
+            healthy.append(alias)
+    return healthy
+
+
+# Sends reads from replica_reads views to a healthy replica; everything else, and every
+# write, goes to the primary.
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        return state["replica"] if state else None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+# Middleware: choose the database for each request and pin visitors who just wrote (a
+# review, a bookmark, an admin edit) to the primary so they see their own changes.
+# Sits outside SessionMiddleware so session saves count as writes.
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {"replica": None, "wrote": False}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state["wrote"] and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
+
+    # Runs before the view's query budget, so lag checks never count against it.
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS or not getattr(view_func, "replica_reads", False):
+            return None
+        if request.method not in ("GET", "HEAD"):
+            return None
+        if PIN_COOKIE in request.COOKIES:
+            record_event("db_route", "pinned")
+            return None
+        replicas = healthy_replicas()
+        if not replicas:
+            record_event("db_route", "no_replica")
+            return None
+        _state.get()["replica"] = random.choice(replicas)
+        record_event("db_route", "replica")
+        return None
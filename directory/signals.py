@@ -0,0 +1,87 @@
+import contextlib
+import contextvars
+
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import chatcache, invalidation, reviews, snapshots, staticrender, thumbnails
+from .models import Business, NewsPost, Review
+
+# Refreshes requested inside batched_changes(), or None outside one.
+_batched = contextvars.ContextVar("directory_batched_changes", default=None)
+
+
+# Writers that save many rows one by one (e.g. fetch_news) wrap the loop in this: the
+# whole-cache refreshes below (chatbot replies, home snapshot, static export) run once
+# when the block exits instead of once per row.
+@contextlib.contextmanager
+def batched_changes():
+    pending = []
+    token = _batched.set(pending)
+    try:
+        yield
+    finally:
+        _batched.reset(token)
+        for refresh in dict.fromkeys(pending):
+            refresh()
+
+
+def _refresh(func):
+    pending = _batched.get()
+    if pending is None:
+        func()
+    else:
+        pending.append(func)
+
+
+# Any directory or news edit changes what the chatbot would say, so drop cached replies.
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+@receiver(post_save, sender=NewsPost)
+@receiver(post_delete, sender=NewsPost)
+def invalidate_chatbot_cache(sender, **kwargs):
+    _refresh(chatcache.bump_data_version)
+
+
+# Listings, ratings and the news strip all feed the homepage snapshot.
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=NewsPost)
+@receiver(post_delete, sender=NewsPost)
+def invalidate_home_snapshot(sender, **kwargs):
+    _refresh(snapshots.invalidate_home)
+
+
+# The same rows feed the pre-rendered pages; re-export them when an output dir is set.
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=NewsPost)
+@receiver(post_delete, sender=NewsPost)
+def schedule_static_render(sender, **kwargs):
+    _refresh(staticrender.schedule_render)
+
+
+# Tell every worker process to drop its in-process Google details for the listing.
+@receiver(post_save, sender=Business)
+@receiver(post_delete, sender=Business)
+def publish_business_change(sender, instance, **kwargs):
+    if instance.google_place_id:
+        invalidation.publish(f"google:{instance.google_place_id}")
+
+
+# A review changes its listing's page, so it counts as a modification of the listing.
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def touch_reviewed_business(sender, instance, **kwargs):
+    reviews.touch_businesses([instance.business_id])
+
+
+# Record which news thumbnails were shown once the response has gone out.
+@receiver(request_finished)
+def flush_thumbnail_touches(sender, **kwargs):
+    thumbnails.flush_touches()
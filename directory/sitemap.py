@@ -0,0 +1,97 @@
+import datetime
+import zlib
+from xml.sax.saxutils import escape
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+
+from .instrumentation import record_cache
+from .models import Business, NewsPost
+
+SITEMAP_KEY = "sitemap:state"
+# Protocol limit for a single sitemap file.
+MAX_URLS = 50_000
+# updated_at is stamped before its transaction commits, so a listing can become visible
+# with a stamp older than the last build's watermark. Refreshes re-read this far behind
+# the watermark, and keep refreshing until a build happens this long after the newest
+# change. Transactions slower than this can still be missed until the listing changes again.
+OVERLAP = datetime.timedelta(minutes=2)
+
+
+# What the sitemap depends on, in two aggregate queries: the newest listing change, the
+# listing count and the newest published news.
+def _stamp():
+    businesses = Business.objects.aggregate(latest=Max("updated_at"), count=Count("pk"))
+    news = NewsPost.objects.filter(is_published=True).aggregate(latest=Max("published_at"))
+    return businesses["latest"], businesses["count"], news["latest"]
+
+
+# Whether the build came late enough after the newest change that no slower commit can
+# still be pending.
+def _settled(state):
+    return state["watermark"] is None or state["built_at"] - state["watermark"] >= OVERLAP
+
+
+# Bring the {business id: (slug, updated_at)} map up to date, reading only listings
+# modified since shortly before the last build, then dropping deleted ids (a delete plus
+# an insert leaves the count unchanged). The rendered XML is kept when nothing changed.
+def _refresh(state, stamp):
+    entries = dict(state["businesses"]) if state else {}
+    changed = Business.objects.all()
+    if state and state["watermark"]:
+        changed = changed.filter(updated_at__gte=state["watermark"] - OVERLAP)
+    for pk, slug, updated_at in changed.values_list("pk", "slug", "updated_at"):
+        entries[pk] = (slug, updated_at)
+    if state:
+        live = set(Business.objects.values_list("pk", flat=True))
+        entries = {pk: entry for pk, entry in entries.items() if pk in live}
+    unchanged = state and state["stamp"] == stamp and state["businesses"] == entries
+    return {
+        "stamp": stamp,
+        "watermark": stamp[0],
+        "built_at": timezone.now(),
+        "businesses": entries,
+        "xml": state["xml"] if unchanged else {},
+    }
+
+
+def _lastmod(value):
+    return value.isoformat(timespec="seconds")
+
+
+def render(state, base):
+    latest, _, news_latest = state["stamp"]
+    urls = [
+        (reverse("home"), max((d for d in (latest, news_latest) if d), default=None)),
+        (reverse("news"), news_latest),
+    ]
+    urls += [
+        (reverse("business_detail", kwargs={"slug": slug}), updated_at)
+        for slug, updated_at in sorted(state["businesses"].values())
+    ]
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for path, lastmod in urls[:MAX_URLS]:
+        lastmod_tag = f"<lastmod>{_lastmod(lastmod)}</lastmod>" if lastmod else ""
+        lines.append(f"<url><loc>{escape(base.rstrip('/') + path)}</loc>{lastmod_tag}</url>")
+    lines.append("</urlset>")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# sitemap.xml for a site root (scheme and host). Settled, unchanged data costs the two
+# stamp queries; changes are applied incrementally and the rendered XML is cached per root.
+def sitemap_xml(base):
+    stamp = _stamp()
+    state = cache.get(SITEMAP_KEY)
+    stale = state is None or state["stamp"] != stamp or not _settled(state)
+    if stale:
+        state = _refresh(state, stamp)
+    xml = state["xml"].get(base)
+    record_cache("sitemap", hit=xml is not None)
+    if xml is None:
+        xml = state["xml"][base] = zlib.compress(render(state, base))
+        stale = True
+    if stale:
+        cache.set(SITEMAP_KEY, state, None)
+    return zlib.decompress(xml)
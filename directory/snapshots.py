@@ -0,0 +1,63 @@
+import json
+import zlib
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .instrumentation import record_cache
+from .models import Snapshot
+
+HOME_SNAPSHOT_KEY = "home:snapshot"
+HOME_REBUILD_TASK = "build_home_snapshot"
+
+
+# Read the homepage snapshot ({"built_at", "stale", "sorts": {sort: context}, "recent_news"}),
+# or None. It lives in the database, so web workers see what the job worker built.
+def load_home():
+    row = Snapshot.objects.filter(key=HOME_SNAPSHOT_KEY).values_list("data", "stale").first()
+    if row is None:
+        record_cache("home_snapshot", hit=False)
+        return None
+    record_cache("home_snapshot", hit=True)
+    blob, stale = row
+    snapshot = json.loads(zlib.decompress(blob))
+    snapshot["built_at"] = parse_datetime(snapshot["built_at"])
+    snapshot["stale"] = stale
+    for post in snapshot["recent_news"]:
+        post["published_at"] = parse_datetime(post["published_at"])
+    return snapshot
+
+
+# Store a freshly built snapshot of plain dicts. Overwriting the one row in a single UPDATE
+# is the atomic swap: readers see either the previous snapshot or the new one, never a mix.
+def store_home(sorts, recent_news):
+    built_at = timezone.now()
+    snapshot = {"built_at": built_at, "sorts": sorts, "recent_news": recent_news}
+    blob = zlib.compress(json.dumps(snapshot, default=str).encode("utf-8"))
+    values = {"data": blob, "built_at": built_at, "stale": False}
+    if not Snapshot.objects.filter(key=HOME_SNAPSHOT_KEY).update(**values):
+        try:
+            with transaction.atomic():
+                Snapshot.objects.create(key=HOME_SNAPSHOT_KEY, **values)
+        except IntegrityError:
+            # Another builder created it first; ours is as new.
+            Snapshot.objects.filter(key=HOME_SNAPSHOT_KEY).update(**values)
+    return len(blob)
+
+
+# Mark the snapshot stale and queue a rebuild. Home keeps serving the old snapshot until
+# the rebuild replaces it.
+def invalidate_home():
+    Snapshot.objects.filter(key=HOME_SNAPSHOT_KEY, stale=False).update(stale=True)
+    from .jobs import enqueue
+    from .models import Job
+
+    # One pending rebuild is enough however many rows changed.
+    if not Job.objects.filter(task=HOME_REBUILD_TASK, status=Job.STATUS_PENDING).exists():
+        enqueue(HOME_REBUILD_TASK)
+
+
+# Remove the snapshot so home renders live (benchmarks of the live path).
+def drop_home():
+    Snapshot.objects.filter(key=HOME_SNAPSHOT_KEY).delete()
@@ -0,0 +1,82 @@
+// Chat widget, loaded by the base template on first interaction with #chat-bubble.
+(function () {
+  const bubble = document.getElementById('chat-bubble');
+  const endpoint = bubble.dataset.endpoint;
+
+  const panel = document.createElement('div');
+  panel.id = 'chat-panel';
+  panel.setAttribute('role', 'dialog');
+  panel.setAttribute('aria-label', 'Ouray local guide chat');
+  panel.innerHTML =
+    '<div id="chat-header">' +
+    '<span>🏔️ Ouray Local Guide</span>' +
+    '<button id="chat-close" aria-label="Close chat">✕</button>' +
+    '</div>' +
+    '<div id="chat-messages">' +
+    '<div class="chat-msg bot">Hi! I know all the local businesses in Ouray. Ask me anything — restaurants, shops, activities, deals, and more.</div>' +
+    '</div>' +
+    '<div id="chat-footer">' +
+    '<textarea id="chat-input" placeholder="Ask about local businesses…" rows="1"></textarea>' +
+    '<button id="chat-send">Send</button>' +
+    '</div>';
+  document.body.appendChild(panel);
+
+  const close  = document.getElementById('chat-close');
+  const msgs   = document.getElementById('chat-messages');
+  const input  = document.getElementById('chat-input');
+  const send   = document.getElementById('chat-send');
+
+  function toggle() {
+    panel.classList.toggle('open');
+    if (panel.classList.contains('open')) input.focus();
+  }
+  close.addEventListener('click', function () { panel.classList.remove('open'); });
+
+  function getCsrf() {
+    const meta = document.querySelector('meta[name="csrf-token"]');
+    return meta ? meta.getAttribute('content') : '';
+  }
+
+  function addMsg(text, role) {
+    const el = document.createElement('div');
+    el.className = 'chat-msg ' + role;
+    el.textContent = text;
+    msgs.appendChild(el);
+    msgs.scrollTop = msgs.scrollHeight;
+    return el;
+  }
+
+  async function sendMessage() {
+    const text = input.value.trim();
+    if (!text) return;
+    input.value = '';
+    send.disabled = true;
+    addMsg(text, 'user');
+    const typing = addMsg('Thinking…', 'bot typing');
+
+    try {
+      const res = await fetch(endpoint, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCsrf() },
+        body: JSON.stringify({ message: text }),
+      });
+      const data = await res.json();
+      typing.remove();
+      addMsg(data.reply || data.error || 'Something went wrong.', 'bot');
+    } catch (e) {
+      typing.remove();
+      addMsg('Connection error. Please try again.', 'bot');
+    } finally {
+      send.disabled = false;
+      input.focus();
+    }
+  }
+
+  send.addEventListener('click', sendMessage);
+  input.addEventListener('keydown', function (e) {
+    if (e.key === 'Enter' && !e.shiftKey) { e.preventDefault(); sendMessage(); }
+  });
+
+  // The bubble's click handler (in base.html) calls this once the widget has loaded.
+  window.ourayChat = { toggle: toggle };
+})();
@@ -0,0 +1,61 @@
+(function () {
+  // Shared behavior: top nav blur increases on scroll.
+  // Topnav blur fades in as you scroll (home + detail pages)
+  const topnav = document.querySelector('.topnav');
+  if (topnav) {
+    const prefersReduced = window.matchMedia && window.matchMedia('(prefers-reduced-motion: reduce)').matches;
+
+    function clamp(v, min, max){ return Math.max(min, Math.min(max, v)); }
+
+    function updateTopnav() {
+      // 0px => 0 blur/opacity, 120px => fully blurred/opaque
+      const y = window.scrollY || 0;
+      const p = clamp(y / 120, 0, 1);
+      topnav.style.setProperty('--nav-blur', prefersReduced ? 1 : p.toFixed(3));
+    }
+
+    window.addEventListener('scroll', updateTopnav, { passive: true });
+    window.addEventListener('resize', updateTopnav);
+    updateTopnav();
+  }
+
+  // Home-only scroll fade effect for elements that opt in.
+  // Fade/move only on home, and only on elements that opt-in.
+  if (!document.body.classList.contains('home')) return;
+
+  const prefersReduced2 = window.matchMedia && window.matchMedia('(prefers-reduced-motion: reduce)').matches;
+  if (prefersReduced2) return;
+
+  const targets = () => Array.from(document.querySelectorAll('[data-fade="true"]'));
+  let els = targets();
+  let ticking = false;
+
+  function clamp(v, min, max){ return Math.max(min, Math.min(max, v)); }
+
+  function update() {
+    ticking = false;
+    els = els.length ? els : targets();
+    const vh = window.innerHeight || 800;
+
+    for (const el of els) {
+      const r = el.getBoundingClientRect();
+      const start = vh * 0.55;
+      const end = 30;
+      const p = clamp((start - r.top) / (start - end), 0, 1);
+
+      el.style.transform = `translateY(${-p * 26}px)`;
+      el.style.opacity = (1 - (p * 0.55)).toFixed(3);
+    }
+  }
+
+  function onScroll() {
+    if (!ticking) {
+      ticking = true;
+      window.requestAnimationFrame(update);
+    }
+  }
+
+  window.addEventListener('scroll', onScroll, { passive: true });
+  window.addEventListener('resize', onScroll);
+  update();
+})();
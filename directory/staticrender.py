@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.template.loader import get_template
+from django.utils.module_loading import import_string
+
+from .models import Business, Job, NewsPost, Review
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only .html and .html.gz are written.
+    brotli = None
+
+MANIFEST_NAME = ".render-manifest.json"
+RENDER_TASK = "render_static"
+# Seconds to wait before re-rendering so a burst of admin edits costs one run.
+RENDER_DELAY = 60
+# Templates whose source is part of every page fingerprint.
+RENDER_TEMPLATES = ("base.html", "home.html", "business_detail.html", "directory/news.html")
+
+
+def _digest(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+# Anything that changes every page: template sources, hashed static asset names, encoders.
+def _render_version():
+    sources = [get_template(name).template.source for name in RENDER_TEMPLATES]
+    static_manifest = ""
+    manifest_path = os.path.join(settings.STATIC_ROOT, "staticfiles.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "rb") as fh:
+            static_manifest = hashlib.sha256(fh.read()).hexdigest()
+    return _digest(sources, settings.STATIC_URL, static_manifest, brotli is not None)
+
+
+# Fingerprint of everything a business page shows, keyed by business id. Only database
+# state counts: Google details come from a per-process cache that expires, so hashing them
+# would re-render (and refetch) every linked page after each TTL. A new place id still
+# re-renders the page.
+def _business_fingerprints():
+    review_hashes = {}
+    reviews = (
+        Review.objects.filter(is_approved=True)
+        .order_by("business_id", "-created_at", "pk")
+        .values_list("business_id", "pk", "rating", "name", "comment", "created_at")
+    )
+    for business_id, *values in reviews.iterator(chunk_size=2000):
+        h = review_hashes.setdefault(business_id, hashlib.sha256())
+        h.update(json.dumps(values, default=str).encode("utf-8"))
+
+    # "Also nearby" links depend on other listings' names and positions; any change to
+    # those re-renders every geocoded page.
+    geo_digest = _digest(
+        list(
+            Business.objects.exclude(latitude=None)
+            .order_by("pk")
+            .values_list("pk", "name", "slug", "latitude", "longitude")
+        )
+    )
+
+    fields = [f.attname for f in Business._meta.concrete_fields]
+    fingerprints = {}
+    for values in Business.objects.order_by("pk").values(*fields).iterator(chunk_size=2000):
+        reviews_hash = review_hashes.get(values["id"])
+        fingerprints[values["id"]] = (
+            values["slug"],
+            _digest(
+                values,
+                reviews_hash.hexdigest() if reviews_hash else "",
+                geo_digest if values["latitude"] is not None else "",
+            ),
+        )
+    return fingerprints
+
+
+def _news_fingerprint():
+    posts = NewsPost.objects.filter(is_published=True).order_by("-published_at", "pk").values(
+        "pk",
+        "title",
+        "slug",
+        "summary",
+        "source_name",
+        "source_url",
+        "image__status",
+        "image__content_hash",
+        "published_at",
+    )
+    return _digest(list(posts))
+
+
+# Every page to export: {relative path: (fingerprint, view path, url, view kwargs)}.
+# Home sort modes live at index-<sort>.html; map /?sort=<sort> to them at the CDN.
+def collect_pages():
+    from .views import HOME_SORTS
+
+    version = _render_version()
+    businesses = _business_fingerprints()
+    news = _news_fingerprint()
+    home = _digest(version, sorted(fp for _, fp in businesses.values()), news)
+
+    pages = {}
+    for sort in HOME_SORTS:
+        path = "index.html" if sort == "top" else f"index-{sort}.html"
+        pages[path] = (home, "directory.views.home", f"/?sort={sort}", {})
+    pages["news/index.html"] = (_digest(version, news), "directory.views.news", "/news/", {})
+    for slug, fingerprint in businesses.values():
+        pages[f"business/{slug}/index.html"] = (
+            _digest(version, fingerprint),
+            "directory.views.business_detail",
+            f"/business/{slug}/",
+            {"slug": slug},
+        )
+    return pages
+
+
+# Render a page as an anonymous visitor would see it. request.static_render makes the
+# base template add the script that hydrates CSRF tokens and bookmarks client-side.
+def render_page(view_path, url, kwargs):
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.test import RequestFactory
+
+    request = RequestFactory().get(url)
+    request.session = SessionStore()
+    request.user = AnonymousUser()
+    request.static_render = True
+    response = import_string(view_path)(request, **kwargs)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url} rendered with status {response.status_code}")
+    return response.content
+
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".render-")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def _encoded_paths(path):
+    return [path, path + ".gz", path + ".br"]
+
+
+# Write the page plus precompressed variants; gzip mtime=0 keeps unchanged pages byte-identical.
+def write_page(root, relpath, content):
+    path = os.path.join(root, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _atomic_write(path, content)
+    _atomic_write(path + ".gz", gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _atomic_write(path + ".br", brotli.compress(content, mode=brotli.MODE_TEXT, quality=11))
+
+
+def remove_page(root, relpath):
+    for path in _encoded_paths(os.path.join(root, relpath)):
+        if os.path.exists(path):
+            os.remove(path)
+    # Drop the now-empty business/<slug>/ directory.
+    directory = os.path.dirname(os.path.join(root, relpath))
+    if directory != os.path.normpath(root) and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+# Render pages whose fingerprint differs from the last run and remove pages that no
+# longer exist. Returns {"rendered", "unchanged", "removed"} counts.
+def render_site(root, force=False):
+    os.makedirs(root, exist_ok=True)
+    previous = load_manifest(root)
+    pages = collect_pages()
+    counts = {"rendered": 0, "unchanged": 0, "removed": 0}
+    manifest = {}
+
+    for relpath, (fingerprint, view_path, url, kwargs) in pages.items():
+        if not force and previous.get(relpath) == fingerprint and os.path.exists(os.path.join(root, relpath)):
+            counts["unchanged"] += 1
+        else:
+            write_page(root, relpath, render_page(view_path, url, kwargs))
+            counts["rendered"] += 1
+        manifest[relpath] = fingerprint
+
+    for relpath in set(previous) - set(pages):
+        remove_page(root, relpath)
+        counts["removed"] += 1
+
+    _atomic_write(
+        os.path.join(root, MANIFEST_NAME), json.dumps(manifest, indent=0, sort_keys=True).encode("utf-8")
+    )
+    return counts
+
+
+# Queue one delayed incremental render when an export directory is configured.
+def schedule_render():
+    if not settings.STATIC_RENDER_ROOT:
+        return
+    from .jobs import enqueue
+
+    if not Job.objects.filter(task=RENDER_TASK, status=Job.STATUS_PENDING).exists():
+        enqueue(RENDER_TASK, delay=RENDER_DELAY)
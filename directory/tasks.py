@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.management import call_command
+
+from .jobs import task
+
+
+# Contact form delivery; raising lets the queue retry with backoff.
+@task("send_contact_email")
+def send_contact_email(name, email, message):
+    subject = "New Ouray Info Contact Form Submission"
+    body = (
+        f"Name: {name}\n"
+        f"Email: {email}\n\n"
+        f"Message:\n{message}\n"
+    )
+    send_mail(
+        subject,
+        body,
+        settings.DEFAULT_FROM_EMAIL,
+        settings.CONTACT_RECIPIENTS,
+        fail_silently=False,
+    )
+
+
+# Pull the county RSS feeds.
+@task("fetch_news")
+def fetch_news():
+    call_command("fetch_news")
+
+
+# Re-fetch Google Places details for one listing into the shared cache. The full profile
+# also answers summary lookups.
+@task("refresh_google_place")
+def refresh_google_place(place_id):
+    from .invalidation import publish
+    from .views import get_google_place_data
+
+    data = get_google_place_data(place_id, profile="full", use_cache=False)
+    if data.get("google_error"):
+        raise RuntimeError(f"Google refresh failed: {data['google_error_label']}")
+    # Web workers drop their in-process copies and read the refreshed shared one.
+    publish(f"google:{place_id}")
+
+
+# Move aged-out news into the archive table.
+@task("archive_news")
+def archive_news():
+    call_command("archive_news")
+
+
+# Download and thumbnail news images queued by fetch_news.
+@task("cache_news_images")
+def cache_news_images():
+    call_command("cache_news_images")
+
+
+# Rebuild the precomputed homepage after data changes.
+@task("build_home_snapshot")
+def build_home_snapshot():
+    from .views import build_home_snapshot as build
+
+    build()
+
+
+# Incremental static export after data changes.
+@task("render_static")
+def render_static():
+    call_command("render_static")
+
+
+# Move staged review submissions into Review in bulk.
+@task("flush_staged_reviews")
+def flush_staged_reviews():
+    from .reviews import flush_staged
+
+    flush_staged()
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from directory.assets import inline_critical_css
+
+register = template.Library()
+
+
+# <style> with the above-the-fold rules of a static stylesheet; the full file loads deferred.
+@register.simple_tag
+def critical_css(name):
+    return mark_safe(f"<style>{inline_critical_css(name)}</style>")
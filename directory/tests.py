@@ -1,3 +1,1363 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Placeholder for future app tests.
+from django.http import Http404
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.conf import settings as django_settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.contrib.sessions.models import Session
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import assets, chatcache, conversations, geo, invalidation, pagination, recaptcha, reviews, routing, signals, snapshots, staticrender, thumbnails
+from .bench import load
+from .bench.fakes import FakeUpstreams
+from .bench.runner import compare, fake_environment, run_scenarios
+from .bench.seed import seed
+from .crawlers import is_crawler
+from .jobs import STALE_LOCK_SECONDS, TASKS, claim_next, enqueue, prune_finished, run_job, run_pending, task
+from .management.commands import fetch_news
+from .management.commands.profile_startup import by_package, parse_importtime
+from .media import serve_media
+from .models import ArchivedNewsPost, Business, InvalidationEvent, Job, NewsImage, NewsPost, Review, StagedReview
+from .ratelimit import ConcurrencyLimitExceeded, check_rate_limits, concurrency_slot, record_token_usage
+from .querybudget import QUERY_BUDGETS, QueryBudgetExceeded, query_budget
+from .views import CHATBOT_PROMPT_VERSION, _google_cache, build_home_snapshot, get_google_place_data
+
+
+# Production media view: conditional requests, ranges and proxy handoff.
+class ServeMediaTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.factory = RequestFactory()
+        with open(os.path.join(self.tmp.name, "logo.png"), "wb") as fh:
+            fh.write(b"0123456789")
+        with open(os.path.join(self.tmp.name, "logo.3f2a9c1b.png"), "wb") as fh:
+            fh.write(b"hashed")
+
+    def _get(self, path, **headers):
+        with override_settings(MEDIA_ROOT=self.tmp.name):
+            response = serve_media(self.factory.get(f"/media/{path}", **headers), path=path)
+            body = b"".join(response) if response.status_code in (200, 206) else b""
+        return response, body
+
+    def test_full_file_and_cache_headers(self):
+        response, body = self._get("logo.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, b"0123456789")
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+        response, _ = self._get("logo.3f2a9c1b.png")
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_if_none_match_returns_304(self):
+        response, _ = self._get("logo.png")
+        response, _ = self._get("logo.png", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        response, body = self._get("logo.png", HTTP_RANGE="bytes=2-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, b"234")
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+
+        response, body = self._get("logo.png", HTTP_RANGE="bytes=-3")
+        self.assertEqual(body, b"789")
+
+        response, _ = self._get("logo.png", HTTP_RANGE="bytes=50-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_suffix_range_of_empty_file_is_unsatisfiable(self):
+        open(os.path.join(self.tmp.name, "empty.txt"), "wb").close()
+        response, _ = self._get("empty.txt", HTTP_RANGE="bytes=-5")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */0")
+
+    def test_nginx_handoff(self):
+        with override_settings(MEDIA_SENDFILE="nginx"):
+            response, _ = self._get("logo.png")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/logo.png")
+        self.assertEqual(response.content, b"")
+
+    def test_traversal_is_rejected(self):
+        with self.assertRaises(Http404):
+            self._get("../settings.py")
+
+
+# Per-request instrumentation: Server-Timing header and Prometheus endpoint.
+@override_settings(PERF_SERVER_TIMING=True)
+class PerformanceMiddlewareTests(TestCase):
+    def test_server_timing_breaks_down_db_and_render(self):
+        with override_settings(PERF_REQUEST_LOG=True), self.assertLogs("directory.requests", level="INFO") as logs:
+            response = self.client.get("/news/")
+        self.assertEqual(response.status_code, 200)
+        header = response["Server-Timing"]
+        self.assertIn("db;dur=", header)
+        self.assertIn("render;dur=", header)
+        self.assertIn("total;dur=", header)
+        self.assertIn('"view": "news"', logs.output[0])
+
+    def test_request_lines_are_opt_in(self):
+        with self.assertNoLogs("directory.requests"):
+            self.client.get("/news/")
+
+    def test_metrics_endpoint_is_local_only(self):
+        self.client.get("/news/")
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('directory_requests_total{view="news",status="200"}', response.content.decode())
+
+        response = self.client.get("/metrics/", REMOTE_ADDR="203.0.113.9")
+        self.assertEqual(response.status_code, 403)
+
+
+# Benchmark suite smoke test: every scenario runs cleanly against the fake upstreams.
+class BenchmarkSuiteTests(TestCase):
+    def test_scenarios_run_against_fakes(self):
+        seed(businesses=5, reviews=20, news=5, place_fraction=1.0)
+        latency = {"google": 0, "recaptcha": 0, "anthropic": 0, "rss": 0}
+        with FakeUpstreams(latency=latency) as fakes, fake_environment(fakes):
+            results = run_scenarios(fakes, iterations=2)
+
+        # Includes chatbot_cached: every warm iteration was answered from the reply cache.
+        self.assertEqual(sum(stats["errors"] for stats in results.values()), 0)
+        # Dropping the snapshot, the snapshot lookup, then the live render's two queries.
+        self.assertEqual(results["home_top"]["queries"], 4)
+        self.assertGreater(fakes.requests["anthropic"], 0)
+
+        slower = {name: dict(stats, queries=stats["queries"] + 1) for name, stats in results.items()}
+        self.assertEqual(len(compare({"small": results}, {"small": slower})), len(results))
+
+
+# Query budgets: every view and admin changelist stays within its declared query count.
+@override_settings(QUERY_BUDGET_MODE="raise", RECAPTCHA_SITE_KEY=None, RECAPTCHA_SECRET_KEY=None)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # More rows than an admin page (100) so any per-row query would blow the budget.
+        seed(businesses=30, reviews=150, news=150, place_fraction=0)
+        cls.slug = Business.objects.values_list("slug", flat=True).first()
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def test_context_manager_raises_over_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                list(Business.objects.all())
+                list(Business.objects.all())
+
+    @override_settings(QUERY_BUDGET_MODE="log")
+    def test_log_mode_only_warns(self):
+        self.addCleanup(QUERY_BUDGETS.pop, "probe", None)
+        with self.assertLogs("directory.perf", level="WARNING") as logs:
+            with query_budget(0, "probe"):
+                list(Business.objects.all())
+        self.assertIn("query_budget_exceeded", logs.output[0])
+
+    # Requests that exercise each declared budget; test_every_budget_is_enforced fails when
+    # a view or changelist declares a budget without an entry here.
+    def _budget_requests(self):
+        requests = {
+            "home": [("get", "/?sort=top"), ("get", "/?sort=az"), ("get", "/?sort=google")],
+            "business_detail": [("get", f"/business/{self.slug}/")],
+            "review_submit": [("post", f"/business/{self.slug}/review/")],
+            "bookmark_toggle": [("post", f"/business/{self.slug}/bookmark/")],
+            "bookmarks": [("get", "/bookmarks/")],
+            "session_state": [("get", "/session/state/")],
+            "nearby": [("get", "/nearby/?lat=38.0228&lng=-107.6714")],
+            "contact": [("get", "/contact/")],
+            "contact_success": [("get", "/contact/success/")],
+            "news": [("get", "/news/")],
+            "chatbot": [("post", "/chatbot/")],
+            "sitemap": [("get", "/sitemap.xml")],
+            "robots_txt": [("get", "/robots.txt")],
+        }
+        for model in ("business", "review", "stagedreview", "newspost", "newsimage", "job"):
+            requests[f"admin:directory_{model}_changelist"] = [("get", f"/admin/directory/{model}/")]
+        return requests
+
+    def test_every_budget_is_enforced(self):
+        requests = self._budget_requests()
+        self.assertEqual(sorted(set(QUERY_BUDGETS) - set(requests)), [])
+        for slug in Business.objects.values_list("slug", flat=True)[:10]:
+            self.client.post(f"/business/{slug}/bookmark/")
+        self.client.force_login(self.admin)
+
+        entered = []
+        enter = query_budget.__enter__
+
+        def spy(budget):
+            entered.append(budget.label)
+            return enter(budget)
+
+        reply = SimpleNamespace(content=[SimpleNamespace(text="Hi!")], usage=None)
+        messages = SimpleNamespace(create=lambda **kwargs: reply)
+        client = SimpleNamespace(base_url="https://api.anthropic.com", messages=messages)
+        data = {"rating": "5", "comment": "ok", "message": "Where can I eat?"}
+        with mock.patch.object(query_budget, "__enter__", spy), \
+                mock.patch("anthropic.Anthropic", return_value=client):
+            for label in QUERY_BUDGETS:
+                for method, path in requests[label]:
+                    with self.subTest(label=label, path=path):
+                        if path == "/chatbot/":
+                            response = self.client.post(path, json.dumps(data), content_type="application/json")
+                        elif method == "post":
+                            response = self.client.post(path, data)
+                        else:
+                            response = self.client.get(path)
+                        self.assertLess(response.status_code, 400)
+                        self.assertIn(label, entered)
+
+
+# The review and news changelists at the scale they were fixed for.
+@override_settings(QUERY_BUDGET_MODE="raise")
+class ChangelistScaleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(businesses=30, reviews=10_000, news=10_000, place_fraction=0)
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def test_changelists_within_budget_at_10k_rows(self):
+        self.client.force_login(self.admin)
+        for model in ("review", "newspost"):
+            with self.subTest(model=model):
+                self.assertEqual(self.client.get(f"/admin/directory/{model}/").status_code, 200)
+
+
+# Chatbot throttling: cheap 429s before any DB or model work.
+@override_settings(CHATBOT_RATE_LIMITS=[(2, 60)], CHATBOT_DAILY_TOKEN_BUDGET=1000)
+class ChatbotRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _post(self, **extra):
+        return self.client.post(
+            "/chatbot/", data="{}", content_type="application/json", **extra
+        )
+
+    def test_ip_limit_returns_429_without_queries(self):
+        self.assertEqual(self._post().status_code, 400)
+        self.assertEqual(self._post().status_code, 400)
+        with self.assertNumQueries(0):
+            response = self._post()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+        # Another client is unaffected.
+        self.assertEqual(self._post(REMOTE_ADDR="198.51.100.7").status_code, 400)
+
+    def test_daily_token_budget(self):
+        record_token_usage("chatbot", 1000)
+        response = self.client.post(
+            "/chatbot/", data='{"message": "hi"}', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_concurrency_slot_rejects_when_full(self):
+        with concurrency_slot("probe", max_active=1, queue_size=2, queue_timeout=0):
+            with self.assertRaises(ConcurrencyLimitExceeded):
+                with concurrency_slot("probe", max_active=1, queue_size=2, queue_timeout=0):
+                    pass
+        with concurrency_slot("probe", max_active=1, queue_size=2, queue_timeout=0):
+            pass
+
+    def test_expired_slot_counter_never_goes_negative(self):
+        first = concurrency_slot("probe", max_active=1, queue_size=2, queue_timeout=0)
+        first.__enter__()
+        # The counter lapses while the slot is held; the next caller recreates it.
+        cache.delete("slots:probe:active")
+        with concurrency_slot("probe", max_active=1, queue_size=2, queue_timeout=0):
+            first.__exit__(None, None, None)
+        self.assertEqual(cache.get("slots:probe:active"), 0)
+
+    def test_denied_request_records_no_hits(self):
+        limits = [(2, 60), (1, 3600)]
+        self.assertEqual(check_rate_limits("probe", ["a"], limits), (True, 0))
+        self.assertFalse(check_rate_limits("probe", ["a"], limits)[0])
+        # The hourly denial didn't use up the per-minute allowance.
+        self.assertEqual(check_rate_limits("probe", ["a"], limits[:1]), (True, 0))
+
+
+# Chatbot reply cache: normalization, near-duplicates and invalidation on data changes.
+class ChatbotCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _ask(self, message):
+        return self.client.post(
+            "/chatbot/", data=json.dumps({"message": message}), content_type="application/json"
+        )
+
+    def test_normalize(self):
+        self.assertEqual(chatcache.normalize("  Best COFFEE?!  in town "), "best coffee in town")
+
+    def test_hit_skips_db_and_near_duplicates_match(self):
+        chatcache.set_reply("What's the best coffee in Ouray?", "v1", "Try Mouse's.")
+        self.assertEqual(chatcache.get_reply("whats the best coffee in ouray", "v1"), "Try Mouse's.")
+        self.assertEqual(chatcache.get_reply("What's the best cofee in Ouray", "v1"), "Try Mouse's.")
+        self.assertIsNone(chatcache.get_reply("Where can I rent a jeep?", "v1"))
+        self.assertIsNone(chatcache.get_reply("What's the best coffee in Ouray?", "v2"))
+
+        chatcache.set_reply("best coffee?", CHATBOT_PROMPT_VERSION, "Cached answer")
+        with self.assertNumQueries(0):
+            response = self._ask("Best coffee")
+        self.assertEqual(response.json(), {"reply": "Cached answer", "cached": True})
+        self.assertEqual(chatcache.stats()["misses"], 2)
+
+    def test_stats_command_needs_a_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, "REDIS_URL"):
+            call_command("chatbot_cache_stats", stdout=io.StringIO())
+
+    def test_business_change_invalidates(self):
+        chatcache.set_reply("best coffee", "v1", "Old answer")
+        Business.objects.create(name="New Coffee Shop")
+        self.assertIsNone(chatcache.get_reply("best coffee", "v1"))
+
+    def test_news_questions_get_short_ttl(self):
+        self.assertEqual(chatcache.ttl_for("is the road open"), 60 * 15)
+        self.assertEqual(chatcache.ttl_for("best pizza"), 60 * 60 * 6)
+
+
+# Chatbot conversation memory: server-side history, compaction and per-conversation usage.
+@override_settings(CHATBOT_HISTORY_TOKEN_BUDGET=100, CHATBOT_HISTORY_KEEP_TURNS=1)
+class ChatbotConversationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.calls = []
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        text = "Summary of the chat." if kwargs["system"] == conversations.SUMMARY_PROMPT else "x" * 300
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=text)], usage=SimpleNamespace(input_tokens=50, output_tokens=20)
+        )
+
+    def _ask(self, message):
+        client = SimpleNamespace(base_url="https://api.anthropic.com", messages=SimpleNamespace(create=self._create))
+        with mock.patch("anthropic.Anthropic", return_value=client):
+            return self.client.post(
+                "/chatbot/", data=json.dumps({"message": message}), content_type="application/json"
+            )
+
+    def test_follow_ups_carry_history_and_compact(self):
+        first = self._ask("Where can I get coffee?")
+        conversation = first.cookies[conversations.COOKIE].value
+        self.assertEqual(len(self.calls[0]["messages"]), 1)
+
+        second = self._ask("Are they open late?")
+        self.assertNotIn(conversations.COOKIE, second.cookies)
+        contents = [m["content"] for m in self.calls[1]["messages"]]
+        self.assertEqual(contents, ["Where can I get coffee?", "x" * 300, "Are they open late?"])
+
+        # Two long replies passed the budget: the first exchange was summarized.
+        self.assertEqual(self.calls[2]["system"], conversations.SUMMARY_PROMPT)
+        state = conversations.load(conversation)
+        self.assertEqual(state["summary"], "Summary of the chat.")
+        self.assertEqual([q for q, _ in state["exchanges"]], ["Are they open late?"])
+        self.assertEqual((state["turns"], state["input_tokens"], state["output_tokens"]), (2, 150, 60))
+
+        self._ask("Thanks!")
+        self.assertIn("Summary of the chat.", self.calls[3]["system"])
+        self.assertEqual(len(self.calls[3]["messages"]), 3)
+
+    def test_cached_reply_only_opens_a_conversation(self):
+        chatcache.set_reply("best coffee", CHATBOT_PROMPT_VERSION, "Cached answer")
+        first = self._ask("Best coffee")
+        self.assertEqual(first.json()["reply"], "Cached answer")
+        self.assertEqual(self.calls, [])
+
+        # The same question mid-conversation goes to the model, with the history.
+        self._ask("Best coffee")
+        self.assertEqual(self.calls[0]["messages"][1]["content"], "Cached answer")
+
+    def test_failed_summary_still_bounds_history(self):
+        state = conversations.empty()
+        state["exchanges"] = [["q" * 400, "a" * 400], ["latest", "reply"]]
+
+        def fail(summary, exchanges):
+            raise RuntimeError("model down")
+
+        with self.assertLogs("directory.perf", "WARNING"):
+            self.assertEqual(conversations.compact(state, fail), "truncated")
+        self.assertEqual(state["exchanges"], [["latest", "reply"]])
+        self.assertEqual(state["summary"], "")
+
+
+# Database-backed job queue: contact email offload, retries and dead letters.
+class JobQueueTests(TestCase):
+    @override_settings(EMAIL_HOST="smtp.example.com", DEFAULT_FROM_EMAIL="site@example.com")
+    def test_contact_enqueues_email_and_redirects(self):
+        latency = {"recaptcha": 0}
+        with FakeUpstreams(latency=latency) as fakes, fake_environment(fakes):
+            response = self.client.post(
+                "/contact/",
+                {"name": "Ann", "email": "ann@example.com", "message": "Hi", "g-recaptcha-response": "t" * 40},
+            )
+        self.assertRedirects(response, "/contact/success/", fetch_redirect_response=False)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().task, "send_contact_email")
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Ann", mail.outbox[0].body)
+        self.assertEqual(Job.objects.get().status, Job.STATUS_DONE)
+
+    def test_failures_retry_with_backoff_then_dead_letter(self):
+        @task("always_fails")
+        def always_fails():
+            raise RuntimeError("relay down")
+        self.addCleanup(TASKS.pop, "always_fails")
+
+        job = enqueue("always_fails", max_attempts=2)
+        with self.assertLogs("directory.jobs", level="WARNING"):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_PENDING, 1))
+        self.assertIn("relay down", job.last_error)
+        # Not due yet because of the backoff.
+        self.assertEqual(run_pending(), 0)
+
+        Job.objects.update(run_after=job.created_at)
+        with self.assertLogs("directory.jobs", level="ERROR"):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_DEAD)
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        job = enqueue("fetch_news")
+        Job.objects.filter(pk=job.pk).update(status=Job.STATUS_RUNNING, locked_at=timezone.now())
+        self.assertIsNone(claim_next())
+        # The worker holding it died; the lock is reclaimed without a restart.
+        stale = timezone.now() - datetime.timedelta(seconds=STALE_LOCK_SECONDS + 1)
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        claimed = claim_next()
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (job.pk, Job.STATUS_RUNNING, 1))
+
+    def test_finished_jobs_are_pruned(self):
+        old = timezone.now() - datetime.timedelta(days=2)
+        done = enqueue("fetch_news")
+        dead = enqueue("fetch_news")
+        pending = enqueue("fetch_news")
+        Job.objects.filter(pk=done.pk).update(status=Job.STATUS_DONE, updated_at=old)
+        Job.objects.filter(pk=dead.pk).update(status=Job.STATUS_DEAD, updated_at=old)
+        Job.objects.filter(pk=pending.pk).update(updated_at=old)
+        self.assertEqual(prune_finished(), 1)
+        # Dead letters stay around longer for inspection; pending work is never pruned.
+        self.assertEqual(sorted(Job.objects.values_list("pk", flat=True)), [dead.pk, pending.pk])
+
+
+# Shared reCAPTCHA verification: local validation, remembered results, network failures.
+@override_settings(RECAPTCHA_SITE_KEY="site", RECAPTCHA_SECRET_KEY="secret")
+class RecaptchaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_local_checks_skip_network(self):
+        with FakeUpstreams(latency={"recaptcha": 0}) as fakes, fake_environment(fakes):
+            self.assertEqual(recaptcha.verify("")[:2], (False, recaptcha.MISSING))
+            self.assertEqual(recaptcha.verify("short")[:2], (False, recaptcha.INVALID))
+            self.assertEqual(recaptcha.verify("x" * 30 + "<script>")[:2], (False, recaptcha.INVALID))
+        self.assertEqual(fakes.requests["recaptcha"], 0)
+
+    def test_repeated_token_gets_the_remembered_result(self):
+        token = "a" * 60
+        with FakeUpstreams(latency={"recaptcha": 0}) as fakes, fake_environment(fakes):
+            first = recaptcha.verify(token)
+            second = recaptcha.verify(token)
+        self.assertEqual(fakes.requests["recaptcha"], 1)
+        self.assertEqual((first.ok, first.repeated), (True, False))
+        self.assertEqual(second, first._replace(repeated=True))
+
+    @override_settings(EMAIL_HOST="smtp.example.com", DEFAULT_FROM_EMAIL="site@example.com")
+    def test_contact_double_click_queues_one_email(self):
+        data = {"name": "Ann", "email": "ann@example.com", "message": "Hi", "g-recaptcha-response": "c" * 60}
+        with FakeUpstreams(latency={"recaptcha": 0}) as fakes, fake_environment(fakes):
+            for _ in range(2):
+                response = self.client.post("/contact/", data)
+                self.assertRedirects(response, "/contact/success/", fetch_redirect_response=False)
+        self.assertEqual(Job.objects.filter(task="send_contact_email").count(), 1)
+
+    @override_settings(RECAPTCHA_VERIFY_URL="http://127.0.0.1:9/siteverify", RECAPTCHA_TIMEOUT=1)
+    def test_network_failure_allows_retry(self):
+        token = "b" * 60
+        self.assertEqual(recaptcha.verify(token)[:2], (False, recaptcha.UNAVAILABLE))
+        self.assertEqual(recaptcha.verify(token)[:2], (False, recaptcha.UNAVAILABLE))
+
+
+# Bulk import/export: batched upserts keyed on place ID or slug, streaming output.
+class BulkImportExportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _path(self, name, content=None):
+        path = os.path.join(self.tmp.name, name)
+        if content is not None:
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(content)
+        return path
+
+    def test_import_creates_updates_and_matches_place_id(self):
+        Business.objects.create(name="Old Name", slug="old-name", google_place_id="p1")
+        path = self._path(
+            "in.csv",
+            "name,slug,category,google_place_id\n"
+            "Renamed Cafe,,Coffee,p1\n"
+            "Hot Springs Inn,,Lodging,\n"
+            ",,missing name,\n"
+            "!!!,,no slug,\n"
+            f"Long Name,,{'x' * 201},\n",
+        )
+        out = io.StringIO()
+        with override_settings(STATIC_RENDER_ROOT=self.tmp.name):
+            call_command("import_businesses", path, batch_size=2, stdout=out)
+        self.assertIn("3 invalid", out.getvalue())
+        self.assertTrue(Job.objects.filter(task="render_static").exists())
+
+        self.assertEqual(Business.objects.count(), 2)
+        cafe = Business.objects.get(google_place_id="p1")
+        self.assertEqual((cafe.name, cafe.slug, cafe.category), ("Renamed Cafe", "old-name", "Coffee"))
+        self.assertTrue(Business.objects.filter(slug="hot-springs-inn").exists())
+
+        call_command("import_businesses", path, on_conflict="skip", stdout=io.StringIO())
+        self.assertEqual(Business.objects.count(), 2)
+
+    def test_export_round_trips_through_jsonl(self):
+        seed(businesses=5, reviews=10, news=0, place_fraction=0.5)
+        out = self._path("out.jsonl")
+        call_command("export_directory", "businesses", output=out, stdout=io.StringIO())
+        call_command("export_directory", "reviews", output=self._path("r.csv"), stdout=io.StringIO())
+        with open(self._path("r.csv")) as fh:
+            self.assertEqual(len(fh.readlines()), 11)
+
+        Business.objects.all().delete()
+        call_command("import_businesses", out, stdout=io.StringIO())
+        self.assertEqual(Business.objects.count(), 5)
+
+    def test_reviews_reimport_by_slug_with_their_dates(self):
+        seed(businesses=3, reviews=12, news=0, place_fraction=0)
+        Review.objects.filter(pk=Review.objects.first().pk).update(is_approved=False)
+        before = sorted(Review.objects.values_list("business__slug", "created_at", "is_approved", "comment"))
+        for fmt in ("csv", "jsonl"):
+            path = self._path(f"reviews.{fmt}")
+            call_command("export_directory", "reviews", output=path, stdout=io.StringIO())
+            Review.objects.all().delete()
+            call_command("import_reviews", path, batch_size=5, stdout=io.StringIO())
+            after = sorted(Review.objects.values_list("business__slug", "created_at", "is_approved", "comment"))
+            self.assertEqual(after, before)
+
+            out = io.StringIO()
+            call_command("import_reviews", path, stdout=out)
+            self.assertIn("0 created, 12 duplicate", out.getvalue())
+
+    def test_review_rows_need_a_known_business(self):
+        Business.objects.create(name="Box Canyon")
+        path = self._path(
+            "reviews.csv",
+            "business_slug,rating,comment\n"
+            "box-canyon,5,Great\n"
+            "nowhere,4,Good\n"
+            "box-canyon,9,Bad rating\n",
+        )
+        out = io.StringIO()
+        call_command("import_reviews", path, stdout=out)
+        self.assertIn("1 created, 0 duplicate, 1 unknown business, 1 invalid", out.getvalue())
+        self.assertEqual(Review.objects.get().comment, "Great")
+
+
+# Homepage snapshot: one cache read per request, invalidated and rebuilt on data changes.
+class HomeSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.cafe = Business.objects.create(name="Mouse's Coffee", category="Coffee")
+        Business.objects.create(name="Box Canyon", category="Attractions")
+        Business.objects.create(name="Jeep Rentals", category="Tours")
+
+    def _home(self, sort="top"):
+        return self.client.get(f"/?sort={sort}")
+
+    def test_live_and_snapshot_render_the_same_sections(self):
+        live = self._home()
+        self.assertEqual([b["name"] for b in live.context["buckets"]["coffee"]], ["Mouse's Coffee"])
+        self.assertEqual([b["name"] for b in live.context["buckets"]["other"]], ["Jeep Rentals"])
+
+        build_home_snapshot()
+        # The snapshot is one row every process reads, not per-process cache memory.
+        cache.clear()
+        with self.assertNumQueries(1):
+            cached = self._home()
+        self.assertEqual(cached.context["buckets"], live.context["buckets"])
+        self.assertContains(cached, "Box Canyon")
+
+    def test_snapshot_news_renders_like_live(self):
+        NewsPost.objects.create(title="Road open", source_name="CDOT", published_at=timezone.now())
+        live = self._home()
+        build_home_snapshot()
+        cached = self._home()
+        self.assertEqual(cached.context["recent_news"], live.context["recent_news"])
+        self.assertContains(cached, "Road open")
+        self.assertContains(cached, f'{timezone.now():%b} ')
+
+    def test_changes_invalidate_and_queue_one_rebuild(self):
+        Job.objects.all().delete()
+        build_home_snapshot()
+        Review.objects.create(business=self.cafe, rating=5, comment="Great")
+        Review.objects.create(business=self.cafe, rating=4, comment="Good")
+        # The old snapshot keeps serving, marked stale, until the rebuild replaces it.
+        snapshot = snapshots.load_home()
+        self.assertTrue(snapshot["stale"])
+        self.assertEqual(snapshot["sorts"]["top"]["buckets"]["coffee"][0]["review_count"], 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(self._home().status_code, 200)
+        self.assertEqual(Job.objects.filter(task="build_home_snapshot").count(), 1)
+
+        run_pending()
+        snapshot = snapshots.load_home()
+        self.assertFalse(snapshot["stale"])
+        self.assertEqual(snapshot["sorts"]["top"]["buckets"]["coffee"][0]["review_count"], 2)
+
+    def test_batched_writes_refresh_once(self):
+        build_home_snapshot()
+        Job.objects.all().delete()
+        with mock.patch("directory.chatcache.bump_data_version") as bump:
+            with signals.batched_changes():
+                for n in range(3):
+                    NewsPost.objects.create(title=f"Post {n}", guid=f"g{n}")
+                self.assertFalse(snapshots.load_home()["stale"])
+        bump.assert_called_once()
+        self.assertTrue(snapshots.load_home()["stale"])
+        self.assertEqual(Job.objects.filter(task="build_home_snapshot").count(), 1)
+
+
+# Static export: pre-compressed pages, incremental re-renders and client-side hydration.
+class StaticRenderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cafe = Business.objects.create(name="Mouse's Coffee", category="Coffee")
+        self.canyon = Business.objects.create(name="Box Canyon", category="Attractions")
+
+    def _render(self, **options):
+        call_command("render_static", output=self.tmp.name, stdout=io.StringIO(), **options)
+        return staticrender.load_manifest(self.tmp.name)
+
+    def _read(self, relpath):
+        with open(os.path.join(self.tmp.name, relpath), "rb") as fh:
+            return fh.read()
+
+    def test_writes_precompressed_pages_with_hydration(self):
+        self._render()
+        html = self._read("business/mouses-coffee/index.html")
+        self.assertEqual(gzip.decompress(self._read("business/mouses-coffee/index.html.gz")), html)
+        self.assertIn(b"/session/state/", html)
+        self.assertIn(f'data-bookmark-id="{self.cafe.pk}"'.encode(), html)
+        for relpath in ("index.html", "index-az.html", "index-google.html", "news/index.html"):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, relpath)), relpath)
+
+        live = self.client.get("/business/mouses-coffee/")
+        self.assertNotContains(live, "/session/state/")
+
+    def test_only_changed_pages_are_rerendered(self):
+        first = self._render()
+        with mock.patch.object(staticrender, "write_page") as write_page:
+            self._render()
+        write_page.assert_not_called()
+
+        Review.objects.create(business=self.canyon, rating=5, comment="Stunning")
+        with mock.patch.object(staticrender, "write_page", wraps=staticrender.write_page) as write_page:
+            second = self._render()
+        written = sorted(call.args[1] for call in write_page.call_args_list)
+        self.assertEqual(
+            written, ["business/box-canyon/index.html", "index-az.html", "index-google.html", "index.html"]
+        )
+        self.assertEqual(first["news/index.html"], second["news/index.html"])
+
+    def test_google_data_never_changes_fingerprints(self):
+        _google_cache.clear()
+        self.addCleanup(_google_cache.clear)
+        self.cafe.google_place_id = "p1"
+        self.cafe.save()
+        fakes = FakeUpstreams(latency={"google": 0}).start()
+        self.addCleanup(fakes.stop)
+        with override_settings(GOOGLE_MAPS_API_KEY="k", GOOGLE_PLACES_DETAILS_URL=fakes.google_url):
+            before = staticrender.collect_pages()
+            self.assertEqual(fakes.requests["google"], 0)
+            self._render()
+            # The render filled this process's Google cache; a second run has nothing to do.
+            self.assertIn(("full", "p1"), _google_cache)
+            self.assertEqual(self._render(), {path: page[0] for path, page in before.items()})
+            with mock.patch.object(staticrender, "write_page") as write_page:
+                self._render()
+            write_page.assert_not_called()
+
+    def test_deleted_business_pages_are_removed(self):
+        self._render()
+        self.canyon.delete()
+        manifest = self._render()
+        self.assertNotIn("business/box-canyon/index.html", manifest)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "business", "box-canyon")))
+
+    def test_session_state_returns_token_and_bookmarks(self):
+        self.client.post(f"/business/{self.cafe.slug}/bookmark/")
+        response = self.client.get("/session/state/")
+        data = response.json()
+        self.assertEqual(data["bookmarks"], [self.cafe.pk])
+        self.assertTrue(data["csrf_token"])
+        self.assertIn("no-store", response["Cache-Control"])
+
+    @override_settings(STATIC_RENDER_ROOT="/tmp/unused")
+    def test_changes_queue_one_render(self):
+        Job.objects.all().delete()
+        Review.objects.create(business=self.cafe, rating=5, comment="Great")
+        self.cafe.save()
+        self.assertEqual(Job.objects.filter(task="render_static").count(), 1)
+
+
+# Sessions exist only while a visitor has bookmarks.
+class LazySessionTests(TestCase):
+    def setUp(self):
+        self.cafe = Business.objects.create(name="Mouse's Coffee", category="Coffee")
+
+    def test_read_only_visitor_never_touches_sessions(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/business/{self.cafe.slug}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if "django_session" in q["sql"]])
+        self.assertNotIn("sessionid", response.cookies)
+
+    def test_removing_last_bookmark_drops_the_session(self):
+        url = f"/business/{self.cafe.slug}/bookmark/"
+        self.client.post(url)
+        self.assertEqual(Session.objects.count(), 1)
+        response = self.client.post(url)
+        self.assertEqual(Session.objects.count(), 0)
+        self.assertEqual(response.cookies["sessionid"].value, "")
+
+
+# Worker startup: heavy SDKs stay out of the import graph until a view needs them.
+class StartupProfileTests(TestCase):
+    def test_parses_importtime_lines(self):
+        entries = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+        )
+        self.assertEqual(
+            entries[0], {"module": "json.decoder", "self_us": 120, "cumulative_us": 120, "depth": 1}
+        )
+        self.assertEqual(by_package(entries), [("json", 420)])
+
+    def test_startup_skips_heavy_sdks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "startup.json")
+            call_command("profile_startup", output=path, stdout=io.StringIO())
+            with open(path) as fh:
+                modules = {entry["module"] for entry in json.load(fh)["entries"]}
+        self.assertIn("directory.views", modules)
+        self.assertNotIn("anthropic", modules)
+        self.assertNotIn("feedparser", modules)
+
+
+# Review writes: idempotency keys, throttles and staged bulk ingestion.
+class ReviewSubmissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.cafe = Business.objects.create(name="Mouse's Coffee", category="Coffee")
+        patcher = mock.patch("directory.views._verify_recaptcha", return_value=recaptcha.Verification(True, ""))
+        self.verify = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, key, business=None, **extra):
+        business = business or self.cafe
+        return self.client.post(
+            f"/business/{business.slug}/review/",
+            {"rating": "5", "comment": "Great latte", "submission_key": key},
+            **extra,
+        )
+
+    def test_resubmitted_form_creates_one_review(self):
+        self.assertEqual(self._post("a" * 32).status_code, 302)
+        self.assertEqual(self._post("a" * 32).status_code, 302)
+        self.assertEqual(Review.objects.count(), 1)
+        self.assertEqual(self.verify.call_count, 1)
+
+    @override_settings(REVIEW_RATE_LIMITS=[(2, 60)])
+    def test_per_ip_throttle(self):
+        self._post("a" * 32)
+        self._post("b" * 32)
+        response = self._post("c" * 32)
+        self.assertEqual(response.status_code, 429)
+        self.assertContains(response, "Too many reviews", status_code=429)
+        self.assertEqual(Review.objects.count(), 2)
+        # Another client can still review.
+        self.assertEqual(self._post("d" * 32, REMOTE_ADDR="203.0.113.5").status_code, 302)
+
+    @override_settings(REVIEW_BUSINESS_RATE_LIMITS=[(1, 60)])
+    def test_per_business_throttle(self):
+        self._post("a" * 32, REMOTE_ADDR="203.0.113.5")
+        self.assertEqual(self._post("b" * 32, REMOTE_ADDR="203.0.113.6").status_code, 429)
+        other = Business.objects.create(name="Box Canyon")
+        self.assertEqual(self._post("c" * 32, business=other, REMOTE_ADDR="203.0.113.6").status_code, 302)
+
+    @override_settings(REVIEW_STAGING=True)
+    def test_staged_reviews_flush_in_one_batch(self):
+        Job.objects.all().delete()
+        for key in ("a" * 32, "b" * 32, "c" * 32):
+            self._post(key)
+        self._post("a" * 32)
+        self.assertEqual(StagedReview.objects.count(), 3)
+        self.assertEqual(Review.objects.count(), 0)
+        self.assertEqual(Job.objects.filter(task="flush_staged_reviews").count(), 1)
+
+        with mock.patch("directory.snapshots.invalidate_home") as invalidate:
+            self.assertEqual(reviews.flush_staged(batch_size=2), 3)
+        invalidate.assert_called_once()
+        self.assertEqual(StagedReview.objects.count(), 0)
+        self.assertEqual(Review.objects.filter(business=self.cafe).count(), 3)
+
+
+# Google Places: lean summary fetches for lists, full fetches with reviews for detail pages.
+class GooglePlacesProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        _google_cache.clear()
+        self.addCleanup(_google_cache.clear)
+        self.fakes = FakeUpstreams(latency={"google": 0}).start()
+        self.addCleanup(self.fakes.stop)
+        settings = override_settings(GOOGLE_MAPS_API_KEY="k", GOOGLE_PLACES_DETAILS_URL=self.fakes.google_url)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_summary_skips_reviews(self):
+        data = get_google_place_data("p1", profile="summary")
+        self.assertIsNotNone(data["google_rating"])
+        self.assertEqual(data["google_reviews"], [])
+        summary_bytes = self.fakes.response_bytes["google"]
+
+        get_google_place_data("p1", profile="full")
+        self.assertGreater(self.fakes.response_bytes["google"] - summary_bytes, summary_bytes * 3)
+
+    def test_background_refresh_reaches_other_workers(self):
+        run_job(enqueue("refresh_google_place", {"place_id": "p1"}))
+        self.assertEqual(self.fakes.requests["google"], 1)
+        # A web worker with an empty in-process cache reads the refreshed shared copy.
+        _google_cache.clear()
+        self.assertIsNotNone(get_google_place_data("p1", profile="summary")["google_rating"])
+        self.assertEqual(self.fakes.requests["google"], 1)
+
+    def test_full_entry_answers_summary_and_stores_normalized_reviews(self):
+        full = get_google_place_data("p1", profile="full")
+        self.assertEqual(get_google_place_data("p1", profile="summary"), full)
+        self.assertIs(get_google_place_data("p1", profile="full"), full)
+        self.assertEqual(self.fakes.requests["google"], 1)
+        self.assertEqual(
+            set(full["google_reviews"][0]), {"source", "rating", "name", "date", "comment", "google_maps_uri"}
+        )
+
+
+# Invalidation bus: committed changes reach every process's in-process caches.
+class InvalidationBusTests(TestCase):
+    def setUp(self):
+        _google_cache.clear()
+        self.addCleanup(_google_cache.clear)
+        self.addCleanup(setattr, invalidation, "_last_seen", None)
+        self.addCleanup(invalidation._gaps.clear)
+        invalidation._last_seen = None
+
+    def _cache_place(self, place_id):
+        for profile in ("summary", "full"):
+            _google_cache[(profile, place_id)] = {"ts": time.time(), "data": {}}
+
+    def test_business_change_publishes_after_commit(self):
+        self._cache_place("p1")
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            cafe = Business.objects.create(name="Mouse's Coffee", google_place_id="p1")
+        self.assertFalse(InvalidationEvent.objects.exists())
+        for callback in callbacks:
+            callback()
+        keys = set(InvalidationEvent.objects.values_list("key", flat=True))
+        self.assertEqual(keys, {"google:p1"})
+        self.assertEqual(_google_cache, {})
+
+        # Nothing subscribes to listing or review changes, so they publish nothing.
+        Review.objects.create(business=cafe, rating=5, comment="Great")
+        cafe.google_place_id = None
+        cafe.save()
+        self.assertEqual(InvalidationEvent.objects.count(), 1)
+
+    def test_poll_applies_events_from_other_processes(self):
+        InvalidationEvent.objects.create(key="google:old")
+        self.assertEqual(invalidation.poll(), 0)
+        self._cache_place("p1")
+        self._cache_place("p2")
+        # Rows written by another worker.
+        InvalidationEvent.objects.create(key="google:p1")
+        self.assertEqual(invalidation.poll(), 1)
+        self.assertEqual(set(_google_cache), {("summary", "p2"), ("full", "p2")})
+
+        InvalidationEvent.objects.create(key="google:*")
+        self.assertEqual(invalidation.poll(), 1)
+        self.assertEqual(_google_cache, {})
+        self.assertEqual(invalidation.poll(), 0)
+
+    def test_poll_picks_up_ids_that_commit_late(self):
+        first = InvalidationEvent.objects.create(key="google:old")
+        invalidation.poll()
+        # Id first+1 was allocated by a transaction that commits after first+2.
+        InvalidationEvent.objects.create(pk=first.pk + 2, key="google:p2")
+        self._cache_place("p1")
+        self.assertEqual(invalidation.poll(), 1)
+        self.assertIn(("full", "p1"), _google_cache)
+
+        InvalidationEvent.objects.create(pk=first.pk + 1, key="google:p1")
+        self.assertEqual(invalidation.poll(), 1)
+        self.assertEqual(_google_cache, {})
+        self.assertEqual(invalidation._gaps, {})
+
+        # A rolled-back id is given up on after the grace period.
+        InvalidationEvent.objects.create(pk=first.pk + 4, key="google:p4")
+        invalidation.poll()
+        self.assertEqual(set(invalidation._gaps), {first.pk + 3})
+        with mock.patch.object(invalidation.time, "monotonic", return_value=time.monotonic() + 61):
+            invalidation.poll()
+        self.assertEqual(invalidation._gaps, {})
+
+
+# Geohash index, /nearby/ and the offline geocoding command.
+class GeoTests(TestCase):
+    def _place(self, name, lat, lng):
+        return Business.objects.create(
+            name=name, latitude=lat, longitude=lng, geohash=geo.encode(lat, lng), address=name
+        )
+
+    def test_encode_and_covering_cells(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        box = geo.bounding_box(38.0228, -107.6714, 2)
+        cells = geo.covering_cells(*box)
+        self.assertLessEqual(len(cells), geo.MAX_CELLS)
+        # Every point in the box falls under one of the cells.
+        for lat in (box[0], 38.0228, box[1]):
+            for lng in (box[2], -107.6714, box[3]):
+                self.assertTrue(any(geo.encode(lat, lng).startswith(c) for c in cells))
+
+    def test_prefix_ranges_stay_inside_the_alphabet(self):
+        self.assertEqual(geo.prefix_range("9x2"), ("9x2", "9x3"))
+        self.assertEqual(geo.prefix_range("9"), ("9", "b"))
+        self.assertEqual(geo.prefix_range("9zz"), ("9zz", "b"))
+        self.assertEqual(geo.prefix_range("zz"), ("zz", None))
+        self.assertEqual(geo.prefix_range(""), ("", None))
+
+    def test_nearby_sorted_within_radius(self):
+        center = self._place("Center", 38.0228, -107.6714)
+        self._place("Far", 38.2, -107.6714)
+        self._place("Close", 38.0240, -107.6714)
+        self._place("Closer", 38.0230, -107.6714)
+        Business.objects.create(name="Not geocoded")
+
+        results = geo.nearby(38.0228, -107.6714, 1.0, exclude=center.pk)
+        self.assertEqual([r["name"] for r in results], ["Closer", "Close"])
+        self.assertLess(results[0]["distance_km"], results[1]["distance_km"])
+
+        response = self.client.get("/nearby/", {"lat": "38.0228", "lng": "-107.6714", "radius": "1", "limit": "2"})
+        self.assertEqual([r["name"] for r in response.json()["results"]], ["Center", "Closer"])
+
+        # The detail page links the nearest other listings.
+        response = self.client.get(f"/business/{center.slug}/")
+        self.assertEqual([n["name"] for n in response.context["nearby"]], ["Closer", "Close"])
+
+    def test_nearby_rejects_bad_input(self):
+        for params in ({}, {"lat": "x", "lng": "1"}, {"lat": "91", "lng": "0"}, {"lat": "1", "lng": "1", "radius": "nan"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/nearby/", params).status_code, 400)
+
+    def test_geocode_command_only_touches_changed_addresses(self):
+        stub = "directory.geocoders.StubGeocoder"
+        cafe = Business.objects.create(name="Cafe", address="1 Main St, Ouray, CO")
+        Business.objects.create(name="No address")
+        call_command("geocode_businesses", geocoder=stub, stdout=io.StringIO())
+        cafe.refresh_from_db()
+        self.assertIsNotNone(cafe.latitude)
+        self.assertEqual(cafe.geohash, geo.encode(cafe.latitude, cafe.longitude))
+        self.assertEqual(cafe.geocoded_address, cafe.address)
+
+        out = io.StringIO()
+        call_command("geocode_businesses", geocoder=stub, stdout=out)
+        self.assertIn("0 geocoded", out.getvalue())
+
+        Business.objects.filter(pk=cafe.pk).update(address="9 Main St, Ouray, CO")
+        out = io.StringIO()
+        call_command("geocode_businesses", geocoder=stub, stdout=out)
+        self.assertIn("1 geocoded", out.getvalue())
+
+
+# Replica routing with a second SQLite database standing in for the replica.
+@override_settings(DATABASE_REPLICAS=["replica"], REPLICA_LAG_CHECK_INTERVAL=0)
+class ReplicaRoutingTests(TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        routing._health.clear()
+        self.addCleanup(routing._health.clear)
+        Business.objects.create(name="Cafe", slug="cafe")
+        # The replica's copy differs, so each response shows where it was read from.
+        Business.objects.using("replica").create(name="Cafe (replica)", slug="cafe")
+
+    def _detail_name(self):
+        return self.client.get("/business/cafe/").context["b"].name
+
+    def test_reads_use_replica_until_visitor_writes(self):
+        self.assertEqual(self._detail_name(), "Cafe (replica)")
+        self.assertNotIn(routing.PIN_COOKIE, self.client.cookies)
+
+        response = self.client.post("/business/cafe/bookmark/")
+        self.assertIn(routing.PIN_COOKIE, response.cookies)
+        # Pinned: the bookmark (and everything else) is read back from the primary.
+        self.assertEqual(self._detail_name(), "Cafe")
+        self.assertEqual(len(self.client.get("/bookmarks/").context["businesses"]), 1)
+
+    def test_writes_and_unmarked_views_use_primary(self):
+        response = self.client.post("/business/cafe/review/", {"rating": "5", "comment": "ok"})
+        self.assertEqual(response.context["b"].name, "Cafe")
+        self.assertFalse(Review.objects.using("replica").exists())
+
+    def test_lagging_or_broken_replica_falls_back_to_primary(self):
+        with mock.patch.object(routing, "_measure_lag", return_value=60.0):
+            self.assertEqual(self._detail_name(), "Cafe")
+        with mock.patch.object(routing, "_measure_lag", side_effect=DatabaseError("down")):
+            self.assertEqual(self._detail_name(), "Cafe")
+        self.assertEqual(self._detail_name(), "Cafe (replica)")
+
+
+# Front-end assets: minifiers, inlined critical CSS and the lazily loaded chat widget.
+class AssetTests(TestCase):
+    def test_minifiers_keep_meaningful_whitespace(self):
+        css = "/* c */\n.a :hover ,\n.b > .c {\n  color: red;\n  margin: 0 auto;\n}\n"
+        self.assertEqual(assets.minify_css(css), ".a :hover,.b>.c{color: red;margin: 0 auto}")
+        js = "(function () {\n  // note\n  const a = 'x // y';\n\n  return a\n})();\n"
+        self.assertEqual(assets.minify_js(js), "(function () {\nconst a = 'x // y';\nreturn a\n})();\n")
+
+    def test_critical_css_keeps_above_the_fold_rules(self):
+        css = ".topnav{a:1}.review-card{b:2}@media (max-width: 9px){.detail-hero{c:3}.news-card{d:4}}"
+        self.assertEqual(assets.critical_css(css), ".topnav{a:1}@media (max-width: 9px){.detail-hero{c:3}}")
+
+    def test_pages_inline_critical_css_and_defer_the_rest(self):
+        html = self.client.get("/news/").content.decode()
+        self.assertIn("<style>:root{", html)
+        self.assertIn('rel="preload" href="/static/directory/css/site.css" as="style"', html)
+        # The widget ships as a button that points at its bundle, not as inline markup.
+        self.assertIn('data-script="/static/directory/js/chat.js"', html)
+        self.assertNotIn("chat-messages", html)
+
+    def test_page_rendering_commands_need_a_manifest_outside_debug(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        manifest_storage = {
+            **django_settings.STORAGES,
+            "staticfiles": {"BACKEND": "directory.assets.MinifiedCompressedManifestStaticFilesStorage"},
+        }
+        with override_settings(STORAGES=manifest_storage, STATIC_ROOT=tmp.name):
+            self.assertFalse(assets.static_manifest_ready())
+            for name, options in (("render_static", {"output": tmp.name}), ("bench_views", {})):
+                with self.assertRaisesMessage(CommandError, "build_assets"):
+                    call_command(name, stdout=io.StringIO(), **options)
+            with override_settings(DEBUG=True):
+                self.assertTrue(assets.static_manifest_ready())
+
+
+# News images: feed extraction, deduped local thumbnails and LRU eviction.
+class NewsThumbnailTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        thumbnails._touched.clear()
+        thumbnails._last_touch_flush = 0.0
+
+    def _png(self, color):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (1200, 800), color).save(buffer, "PNG")
+        return buffer.getvalue()
+
+    def test_entry_image_prefers_media_then_enclosures(self):
+        entry = {
+            "media_content": [{"url": "https://x.test/clip.mp4", "medium": "video"}],
+            "enclosures": [{"href": "https://x.test/photo.JPG?w=2000", "type": ""}],
+        }
+        self.assertEqual(fetch_news._entry_image(entry), "https://x.test/photo.JPG?w=2000")
+        entry["media_thumbnail"] = [{"url": "https://x.test/thumb"}]
+        self.assertEqual(fetch_news._entry_image(entry), "https://x.test/thumb")
+        self.assertEqual(fetch_news._entry_image({"enclosures": [{"href": "https://x.test/a.pdf"}]}), "")
+
+    def test_identical_images_share_thumbnails_and_lru_evicts(self):
+        red, blue = self._png("red"), self._png("blue")
+        bodies = {"https://a.test/1.png": red, "https://b.test/copy.png": red, "https://c.test/2.png": blue}
+        images = [NewsImage.objects.create(source_url=url) for url in bodies]
+        with mock.patch.object(thumbnails, "_download", side_effect=bodies.get) as download:
+            self.assertEqual(thumbnails.process_pending(), {"cached": 3, "failed": 0})
+        self.assertEqual(download.call_count, 3)
+
+        first, copy, other = [NewsImage.objects.get(pk=image.pk) for image in images]
+        self.assertEqual(first.content_hash, copy.content_hash)
+        self.assertEqual(first.urls, copy.urls)
+        self.assertRegex(first.urls["card"], r"\.[0-9a-f]{20}\.jpg$")
+        self.assertTrue(default_storage.exists(thumbnails.thumbnail_name(first.content_hash, "card")))
+
+        # Over the cap: the least recently used hash goes (both rows sharing it).
+        NewsImage.objects.filter(pk=other.pk).update(last_used_at=timezone.now() - datetime.timedelta(days=1))
+        self.assertEqual(thumbnails.enforce_cap(max_bytes=first.size), other.size)
+        other.refresh_from_db()
+        self.assertEqual(other.status, NewsImage.STATUS_EVICTED)
+        self.assertFalse(default_storage.exists(thumbnails.thumbnail_name(other.content_hash, "card")))
+        self.assertEqual(NewsImage.objects.filter(status=NewsImage.STATUS_READY).count(), 2)
+
+        # Showing an evicted image again queues it for another download.
+        thumbnails.touch({other.pk})
+        thumbnails.flush_touches()
+        other.refresh_from_db()
+        self.assertEqual(other.status, NewsImage.STATUS_PENDING)
+        self.assertTrue(Job.objects.filter(task=thumbnails.CACHE_TASK).exists())
+
+    def test_news_page_uses_local_thumbnail(self):
+        image = NewsImage.objects.create(source_url="https://a.test/1.png")
+        NewsPost.objects.create(title="Road work", guid="g1", image_url=image.source_url, image=image)
+        with mock.patch.object(thumbnails, "_download", return_value=self._png("green")):
+            thumbnails.process_pending()
+        last_week = timezone.now() - datetime.timedelta(days=7)
+        NewsImage.objects.update(last_used_at=last_week)
+        html = self.client.get("/news/").content.decode()
+        image.refresh_from_db()
+        self.assertIn(image.urls["list"], html)
+        self.assertNotIn("https://a.test/1.png", html)
+        # Use is recorded after the response (outside the view's query budget).
+        self.assertGreater(image.last_used_at, last_week)
+
+
+# Admin at scale: bulk moderation in one UPDATE and estimated changelist counts.
+class AdminScaleTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.admin)
+        self.cafe = Business.objects.create(name="Cafe")
+        for n in range(3):
+            Review.objects.create(business=self.cafe, rating=4, comment=f"r{n}", is_approved=n == 0)
+
+    @override_settings(QUERY_BUDGET_MODE="raise")
+    def test_bulk_approve_is_one_update_and_refreshes_caches(self):
+        build_home_snapshot()
+        pks = list(Review.objects.values_list("pk", flat=True))
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/admin/directory/review/",
+                {"action": "approve_reviews", "_selected_action": pks},
+            )
+        self.assertEqual(response.status_code, 302)
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "directory_review"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Review.objects.filter(is_approved=True).count(), 3)
+        # The listings count as modified for the sitemap's lastmod.
+        self.assertGreater(Business.objects.get(pk=self.cafe.pk).updated_at, self.cafe.updated_at)
+        self.assertTrue(snapshots.load_home()["stale"])
+
+        self.assertEqual(reviews.set_approval(Review.objects.all(), True), 0)
+        self.assertEqual(reviews.set_approval(Review.objects.filter(pk=pks[0]), False), 1)
+
+    def test_estimated_count_only_for_large_unfiltered_postgres_tables(self):
+        self.assertIsNone(pagination.estimated_count(Review.objects.all()))
+        with mock.patch.object(connection, "vendor", "postgresql"), mock.patch.object(
+            pagination, "_table_estimate", return_value=1_000_000
+        ):
+            self.assertEqual(pagination.EstimatedCountPaginator(Review.objects.all(), 100).count, 1_000_000)
+            self.assertEqual(pagination.EstimatedCountPaginator(Review.objects.filter(rating=4), 100).count, 3)
+        with mock.patch.object(connection, "vendor", "postgresql"), mock.patch.object(
+            pagination, "_table_estimate", return_value=500
+        ):
+            self.assertEqual(pagination.EstimatedCountPaginator(Review.objects.all(), 100).count, 3)
+
+    def test_review_form_uses_autocomplete(self):
+        other = Business.objects.create(name="Other")
+        html = self.client.get(f"/admin/directory/review/{Review.objects.first().pk}/change/").content.decode()
+        self.assertIn("admin-autocomplete", html)
+        # Only the current business is rendered as an option, not the whole table.
+        self.assertIn(f'<option value="{self.cafe.pk}"', html)
+        self.assertNotIn(f'<option value="{other.pk}"', html)
+
+
+# News retention: old posts move to the archive and are never re-imported.
+class NewsRetentionTests(TestCase):
+    def test_archive_moves_old_posts_and_feeds_skip_them(self):
+        old_guid = fetch_news._guid({"id": "county-1"})
+        NewsPost.objects.create(
+            title="Old closure", guid=old_guid, published_at=timezone.now() - datetime.timedelta(days=400)
+        )
+        NewsPost.objects.create(title="Fresh alert", guid=fetch_news._guid({"id": "county-2"}))
+        build_home_snapshot()
+        self.addCleanup(cache.clear)
+
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("archive_news", days=180, stdout=out)
+        self.assertIn("Archived 1 posts", out.getvalue())
+        self.assertEqual(list(NewsPost.objects.values_list("title", flat=True)), ["Fresh alert"])
+        archived = ArchivedNewsPost.objects.get()
+        self.assertEqual((archived.title, archived.guid), ("Old closure", old_guid))
+        self.assertTrue(snapshots.load_home()["stale"])
+
+        feed = SimpleNamespace(
+            bozo=False,
+            entries=[
+                {"id": "county-1", "title": "Old closure"},
+                {"id": "county-2", "title": "Fresh alert"},
+                {"id": "county-3", "title": "New post"},
+                {"id": "county-3", "title": "New post"},
+            ],
+        )
+        with mock.patch("feedparser.parse", return_value=feed):
+            call_command("fetch_news", stdout=io.StringIO())
+        self.assertEqual(NewsPost.objects.count(), 2)
+        self.assertEqual(NewsPost.objects.filter(title="New post").count(), 1)
+        self.assertFalse(NewsPost.objects.filter(guid=old_guid).exists())
+
+
+# Load-test harness: level summaries, the SLO and the recommended worker config.
+class LoadHarnessTests(TestCase):
+    def test_summary_and_recommendation(self):
+        samples = [("home_top", 200, 0.05)] * 90 + [("chatbot", 200, 0.9)] * 8 + [("news", 502, 0.01)] * 2
+        level = load.summarize(samples, elapsed=2.0, concurrency=4)
+        self.assertEqual((level["requests"], level["rps"], level["error_rate"]), (100, 50.0, 0.02))
+        # The model's latency doesn't count against the page SLO; errors still do.
+        self.assertEqual(level["page_p95_ms"], 50.0)
+        self.assertFalse(load.meets_slo(level, slo_ms=500, max_error_rate=0.01))
+        self.assertTrue(load.meets_slo(level, slo_ms=500, max_error_rate=0.05))
+
+        def curve(*points):
+            return [
+                {"rps": rps, "concurrency": c, "meets_slo": ok, "memory": {"workers": 2, "mean_kib": kib}}
+                for rps, c, ok, kib in points
+            ]
+
+        capacities = {
+            "sync-2": load.capacity(curve((20, 1, True, 50_000), (25, 4, False, 50_000))),
+            "gthread-2x4": load.capacity(curve((30, 4, True, 60_000), (48, 16, True, 65_000))),
+            "gthread-2x8": load.capacity(curve((49, 16, True, 90_000))),
+            "uvicorn-2": None,
+        }
+        self.assertEqual(capacities["sync-2"], {"rps": 20, "concurrency": 1, "memory_kib": 100_000})
+        # Within 5% of the best throughput, the lighter config wins.
+        self.assertEqual(load.recommend(capacities), "gthread-2x4")
+        self.assertIsNone(load.recommend({"sync-2": load.capacity(curve((5, 1, False, 1)))}))
+
+
+# Sitemap and crawlers: incremental lastmod, precomputed pages, no upstream calls for bots.
+class SitemapCrawlerTests(TestCase):
+    BOT = {"HTTP_USER_AGENT": "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"}
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.cafe = Business.objects.create(name="Mouse's Coffee", category="Coffee", google_place_id="p1")
+        self.canyon = Business.objects.create(name="Box Canyon", category="Attractions")
+
+    def test_crawler_tokens_are_whole_words(self):
+        for agent in (
+            self.BOT["HTTP_USER_AGENT"],
+            "Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)",
+            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 HeadlessChrome/120.0 Safari/537.36",
+            "ExampleBot/1.0",
+            "Screaming Frog SEO Spider/19.0",
+        ):
+            self.assertTrue(is_crawler(RequestFactory().get("/", HTTP_USER_AGENT=agent)), agent)
+        for agent in (
+            "Mozilla/5.0 (Linux; Android 10; CUBOT X30) AppleWebKit/537.36 Chrome/120.0 Mobile Safari/537.36",
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) AppleWebKit/605.1.15 Version/17.0 Safari/605.1.15",
+        ):
+            self.assertFalse(is_crawler(RequestFactory().get("/", HTTP_USER_AGENT=agent)), agent)
+
+    def _sitemap(self):
+        response = self.client.get("/sitemap.xml")
+        self.assertEqual(response["Content-Type"], "application/xml")
+        return response.content.decode()
+
+    def test_sitemap_follows_listing_changes(self):
+        Business.objects.update(updated_at=timezone.now() - datetime.timedelta(days=1))
+        xml = self._sitemap()
+        self.assertIn("<loc>http://testserver/business/box-canyon/</loc>", xml)
+        # Settled and unchanged: only the two stamp queries.
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._sitemap(), xml)
+        self.assertEqual(len(queries), 2)
+
+        Review.objects.create(business=self.cafe, rating=5, comment="Great latte")
+        touched = Business.objects.get(pk=self.cafe.pk).updated_at
+        self.assertIn(f"<lastmod>{touched.isoformat(timespec='seconds')}</lastmod>", self._sitemap())
+
+        # A listing stamped before that build but committed after it is still picked up.
+        Business.objects.filter(pk=self.canyon.pk).update(
+            slug="box-canyon-park", updated_at=touched - datetime.timedelta(seconds=30)
+        )
+        self.assertIn("/business/box-canyon-park/", self._sitemap())
+
+        # A delete plus an insert keeps the count but must still swap the URLs.
+        self.canyon.delete()
+        Business.objects.create(name="Hot Springs Pool")
+        xml = self._sitemap()
+        self.assertIn("/business/hot-springs-pool/", xml)
+        self.assertNotIn("box-canyon", xml)
+
+    def test_robots_points_to_sitemap(self):
+        body = self.client.get("/robots.txt").content.decode()
+        self.assertIn("Disallow: /chatbot/", body)
+        self.assertIn("Sitemap: http://testserver/sitemap.xml", body)
+
+    def test_crawlers_never_reach_upstreams(self):
+        response = self.client.post("/chatbot/", {"message": "hi"}, **self.BOT)
+        self.assertEqual(response.status_code, 403)
+
+        _google_cache.clear()
+        self.addCleanup(_google_cache.clear)
+        fakes = FakeUpstreams(latency={"google": 0}).start()
+        self.addCleanup(fakes.stop)
+        with override_settings(GOOGLE_MAPS_API_KEY="k", GOOGLE_PLACES_DETAILS_URL=fakes.google_url):
+            self.assertEqual(self.client.get("/business/mouses-coffee/", **self.BOT).status_code, 200)
+            self.assertEqual(fakes.requests["google"], 0)
+            self.client.get("/business/mouses-coffee/")
+            self.assertEqual(fakes.requests["google"], 1)
+
+    def test_crawlers_get_precomputed_pages(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        call_command("render_static", output=tmp.name, stdout=io.StringIO())
+        with open(os.path.join(tmp.name, "business", "box-canyon", "index.html.gz"), "rb") as fh:
+            page = fh.read()
+        with override_settings(STATIC_RENDER_ROOT=tmp.name):
+            response = self.client.get("/business/box-canyon/", HTTP_ACCEPT_ENCODING="gzip", **self.BOT)
+            live = self.client.get("/business/box-canyon/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(b"".join(response.streaming_content), page)
+        self.assertFalse(live.has_header("Content-Encoding"))
@@ -0,0 +1,184 @@
+import hashlib
+import io
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError
+from django.db.models import Max
+from django.utils import timezone
+
+from .instrumentation import track_http
+from .models import Job, NewsImage
+
+logger = logging.getLogger("directory.thumbnails")
+
+CACHE_TASK = "cache_news_images"
+# Fixed output sizes (width, height), cropped to fill: news cards and list rows.
+THUMBNAIL_SIZES = {"card": (480, 270), "list": (160, 90)}
+# Media directory; names carry the content hash, so media.py serves them as immutable.
+THUMBNAIL_DIR = "news-thumbs"
+JPEG_QUALITY = 82
+USER_AGENT = "ouray.info news thumbnailer"
+# Last-used times are written at most this often per process.
+TOUCH_INTERVAL = 60
+
+_touched = set()
+_touch_lock = threading.Lock()
+_last_touch_flush = 0.0
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def thumbnail_name(content_hash, size):
+    return f"{THUMBNAIL_DIR}/{content_hash[:2]}/{size}.{content_hash[:20]}.jpg"
+
+
+def thumbnail_urls(content_hash):
+    return {size: default_storage.url(thumbnail_name(content_hash, size)) for size in THUMBNAIL_SIZES}
+
+
+# Fetch an image, refusing non-images and anything over NEWS_IMAGE_MAX_DOWNLOAD_BYTES.
+def _download(url):
+    limit = settings.NEWS_IMAGE_MAX_DOWNLOAD_BYTES
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    try:
+        with track_http(url), urllib.request.urlopen(request, timeout=settings.NEWS_IMAGE_TIMEOUT) as resp:
+            content_type = resp.headers.get("Content-Type", "")
+            if not content_type.startswith("image/"):
+                raise ThumbnailError(f"not an image ({content_type or 'no content type'})")
+            data = resp.read(limit + 1)
+    except (urllib.error.URLError, TimeoutError, ValueError) as exc:
+        raise ThumbnailError(str(exc))
+    if len(data) > limit:
+        raise ThumbnailError(f"larger than {limit} bytes")
+    return data
+
+
+# Write every thumbnail size for an original; returns the bytes written.
+def _write_thumbnails(content_hash, data):
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            # JPEG draft mode decodes at reduced scale, far cheaper for large photos.
+            original.draft("RGB", max(THUMBNAIL_SIZES.values()))
+            image = ImageOps.exif_transpose(original).convert("RGB")
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        raise ThumbnailError(f"unreadable image: {exc}")
+
+    total = 0
+    for size, dimensions in THUMBNAIL_SIZES.items():
+        name = thumbnail_name(content_hash, size)
+        if not default_storage.exists(name):
+            buffer = io.BytesIO()
+            ImageOps.fit(image, dimensions, Image.LANCZOS).save(
+                buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True
+            )
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+        total += default_storage.size(name)
+    return total
+
+
+# Download and thumbnail one image. Identical bytes already cached under another URL
+# reuse those files instead of being resized again.
+def cache_image(image):
+    data = _download(image.source_url)
+    content_hash = hashlib.sha256(data).hexdigest()
+    twin = NewsImage.objects.filter(content_hash=content_hash, status=NewsImage.STATUS_READY).first()
+    size = twin.size if twin else _write_thumbnails(content_hash, data)
+    image.content_hash = content_hash
+    image.size = size
+    image.status = NewsImage.STATUS_READY
+    image.error = ""
+    image.last_used_at = timezone.now()
+    image.save(update_fields=["content_hash", "size", "status", "error", "last_used_at"])
+
+
+# Cache pending images (oldest first); failures are recorded and not retried.
+# Returns {"cached", "failed"} counts.
+def process_pending(limit=None):
+    counts = {"cached": 0, "failed": 0}
+    pending = NewsImage.objects.filter(status=NewsImage.STATUS_PENDING).order_by("pk")
+    for image in pending[:limit] if limit else pending:
+        try:
+            cache_image(image)
+        except ThumbnailError as exc:
+            NewsImage.objects.filter(pk=image.pk).update(status=NewsImage.STATUS_FAILED, error=str(exc)[:300])
+            counts["failed"] += 1
+            logger.warning("news image %s failed: %s", image.source_url, exc)
+        else:
+            counts["cached"] += 1
+    return counts
+
+
+# Evict least recently used images until the cache fits in max_bytes. Files are shared
+# by content hash, so a hash is only as recent as its most recently used image and is
+# removed as a unit. Evicted images are fetched again if a page shows them later.
+# Returns the number of bytes freed.
+def enforce_cap(max_bytes=None):
+    max_bytes = settings.NEWS_IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    groups = list(
+        NewsImage.objects.filter(status=NewsImage.STATUS_READY)
+        .values("content_hash")
+        .annotate(last_used=Max("last_used_at"), size=Max("size"))
+        .order_by("last_used")
+    )
+    total = sum(group["size"] for group in groups)
+    freed = 0
+    for group in groups:
+        if total <= max_bytes:
+            break
+        for size in THUMBNAIL_SIZES:
+            default_storage.delete(thumbnail_name(group["content_hash"], size))
+        NewsImage.objects.filter(content_hash=group["content_hash"]).update(
+            status=NewsImage.STATUS_EVICTED, size=0
+        )
+        total -= group["size"]
+        freed += group["size"]
+    return freed
+
+
+# Queue one cache run unless one is already waiting.
+def schedule_cache():
+    from .jobs import enqueue
+
+    if not Job.objects.filter(task=CACHE_TASK, status=Job.STATUS_PENDING).exists():
+        enqueue(CACHE_TASK)
+
+
+# Note that these images were shown. Recorded in memory and written by flush_touches
+# after the response, so rendering a page never waits on (or counts) the write.
+def touch(image_ids):
+    if image_ids:
+        with _touch_lock:
+            _touched.update(image_ids)
+
+
+# Write the buffered last-used times, at most every TOUCH_INTERVAL seconds (called after
+# each response). Evicted images that are still being shown are queued again.
+def flush_touches():
+    global _last_touch_flush
+    now = time.monotonic()
+    with _touch_lock:
+        if not _touched or now - _last_touch_flush < TOUCH_INTERVAL:
+            return
+        ids = list(_touched)
+        _touched.clear()
+        _last_touch_flush = now
+    try:
+        NewsImage.objects.filter(pk__in=ids).update(last_used_at=timezone.now())
+        if NewsImage.objects.filter(pk__in=ids, status=NewsImage.STATUS_EVICTED).update(
+            status=NewsImage.STATUS_PENDING
+        ):
+            schedule_cache()
+    except DatabaseError:
+        # Recency is best-effort; the next flush records these images again when shown.
+        logger.exception("could not record news image use")
@@ -9,7 +9,12 @@ from .views import (
     bookmarks,
     chatbot,
     news,
+    nearby,
+    session_state,
+    sitemap,
+    robots_txt,
 )
+from .instrumentation import metrics
 
 # Public routes for the directory app.
 urlpatterns = [
@@ -17,9 +22,14 @@ urlpatterns = [
     path("contact/", contact, name="contact"),
     path("contact/success/", contact_success, name="contact_success"),
     path("bookmarks/", bookmarks, name="bookmarks"),
+    path("session/state/", session_state, name="session_state"),
     path("business/<slug:slug>/", business_detail, name="business_detail"),
     path("business/<slug:slug>/review/", review_submit, name="review_submit"),
     path("business/<slug:slug>/bookmark/", bookmark_toggle, name="bookmark_toggle"),
     path("chatbot/", chatbot, name="chatbot"),
     path("news/", news, name="news"),
+    path("nearby/", nearby, name="nearby"),
+    path("metrics/", metrics, name="metrics"),
+    path("robots.txt", robots_txt, name="robots_txt"),
+    path("sitemap.xml", sitemap, name="sitemap"),
 ]
@@ -1,24 +1,68 @@
+import functools
+import hashlib
 import json
 import os
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
-
-import anthropic
+import uuid
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.db.models import Avg, Count, Q
 from django.db.models.functions import Coalesce
 
-from .models import Business, Review, NewsPost
+from . import chatcache, conversations, crawlers, geo, invalidation, recaptcha, reviews, snapshots, thumbnails
+from .instrumentation import record_cache, track_http
+from .jobs import enqueue
+from .models import Business, NewsPost
+from .querybudget import query_budget
+from .routing import replica_reads
+from .sitemap import sitemap_xml
+from .ratelimit import (
+    ConcurrencyLimitExceeded,
+    check_rate_limits,
+    client_ip,
+    concurrency_slot,
+    record_token_usage,
+    tokens_used_today,
+    too_many_requests,
+)
 
 # Small in-memory cache to reduce Google Places API calls per place ID [HOW COULD WE MINIMIZE CACHE RELIANCE???]
 GOOGLE_CACHE_TTL = 300
+# Entries are keyed by (profile, place_id); a fresh "full" entry also answers "summary".
 _google_cache = {}
+# Fetched entries are also written to the default cache. When that cache is shared (REDIS_URL,
+# see directory.W001) one Places call serves every worker, including refresh_google_place jobs.
+GOOGLE_SHARED_KEY = "google:place:{profile}:{place_id}"
+
+# Places Details field masks. List pages only need the headline numbers; the detail page
+# also needs reviews, by far the largest (and a pricier SKU) part of the response.
+GOOGLE_FIELD_PROFILES = {
+    "summary": "rating,user_ratings_total,url",
+    "full": "rating,user_ratings_total,reviews,url",
+}
+
+# Chatbot model and fixed prompt preamble; their hash versions the reply cache.
+CHATBOT_MODEL = "claude-opus-4-8"
+CHATBOT_PROMPT_INTRO = (
+    "You are a friendly local guide for Ouray, Colorado — a small mountain town known as the "
+    "'Switzerland of America.' You help visitors and locals discover businesses and stay up to date "
+    "on local news.\n\n"
+    "Use the business directory and recent news below to answer questions. Keep answers concise "
+    "and friendly. If something is not in the data, say so and suggest they browse ouray.info. "
+    "Never make up details.\n\n"
+)
+CHATBOT_PROMPT_VERSION = hashlib.sha256(
+    f"{CHATBOT_MODEL}\n{CHATBOT_PROMPT_INTRO}".encode("utf-8")
+).hexdigest()[:12]
 
 # Annotate businesses with average rating and count for approved reviews.
 def _annotate_reviews(queryset):
@@ -39,8 +83,39 @@ def _rating_to_percent(rating):
     return round(rounded * 100, 2)
 
 
-# Fetch place details from Google Places API
-def get_google_place_data(place_id):
+# Drop one place's in-process details ("*" drops all); runs when any worker saves a Business
+# and after a background refresh, so the next read picks up the shared copy.
+def _drop_google_place(place_id):
+    if place_id == "*":
+        _google_cache.clear()
+        return
+    for profile in GOOGLE_FIELD_PROFILES:
+        _google_cache.pop((profile, place_id), None)
+
+
+invalidation.subscribe("google", _drop_google_place)
+
+
+# Cached entry for a profile (this process first, then the shared cache), or None when
+# missing or stale.
+def _cached_google(profile, place_id, now):
+    profiles = ("summary", "full") if profile == "summary" else ("full",)
+    for name in profiles:
+        cached = _google_cache.get((name, place_id))
+        if cached and (now - cached["ts"] < GOOGLE_CACHE_TTL):
+            return cached["data"]
+    shared = cache.get_many([GOOGLE_SHARED_KEY.format(profile=name, place_id=place_id) for name in profiles])
+    for name in profiles:
+        cached = shared.get(GOOGLE_SHARED_KEY.format(profile=name, place_id=place_id))
+        if cached and (now - cached["ts"] < GOOGLE_CACHE_TTL):
+            _google_cache[(name, place_id)] = cached
+            return cached["data"]
+    return None
+
+
+# Fetch place details from Google Places API with the "summary" or "full" field mask.
+# use_cache=False always calls Places (background refreshes) and stores the result.
+def get_google_place_data(place_id, profile="full", use_cache=True):
     # Default payload mirrors template expectations even on errors, keeps UI -->CONSISTENT<--
     defaults = {
         "google_rating": None,
@@ -57,22 +132,27 @@ def get_google_place_data(place_id):
         return defaults
 
     now = time.time()
-    cached = _google_cache.get(place_id)
+    cached = _cached_google(profile, place_id, now) if use_cache else None
     # Return cached data if still fresh, [MIGHT WANT TO WORK ON DEVELOPING W/ OUT CACHE RELIANCE]
-    if cached and (now - cached["ts"] < GOOGLE_CACHE_TTL):
-        return cached["data"]
+    if cached is not None:
+        record_cache("google", hit=True)
+        return cached
+    record_cache("google", hit=False)
+    # Crawlers only see what visitors already paid for; they never trigger a Places call.
+    if crawlers.serving_crawler():
+        return defaults
 
     try: # Makes API Url request, then finds https and references information.
         query = urllib.parse.urlencode(
             {
                 "place_id": place_id,
-                "fields": "rating,user_ratings_total,reviews,url,name",
+                "fields": GOOGLE_FIELD_PROFILES[profile],
                 "key": settings.GOOGLE_MAPS_API_KEY,
             }
         )
-        url = f"https://maps.googleapis.com/maps/api/place/details/json?{query}"
+        url = f"{settings.GOOGLE_PLACES_DETAILS_URL}?{query}"
         req = urllib.request.Request(url)
-        with urllib.request.urlopen(req, timeout=8) as resp:
+        with track_http(url), urllib.request.urlopen(req, timeout=8) as resp:
             payload = json.loads(resp.read().decode("utf-8"))
     except urllib.error.HTTPError as exc:
         # Handle non-2xx responses and extract any error payload for display.
@@ -161,7 +241,8 @@ def get_google_place_data(place_id):
         "google_error_label": "",
     }
 
-    # Normalize review data for template rendering.
+    # Normalize reviews once, straight into the detail page's combined-review shape, so
+    # cache hits reuse them as-is.
     for review in result.get("reviews", []) or []:
         text_payload = review.get("text")
         if isinstance(text_payload, dict):
@@ -171,16 +252,19 @@ def get_google_place_data(place_id):
 
         data["google_reviews"].append(
             {
+                "source": "google",
                 "rating": review.get("rating"),
-                "author": (review.get("authorAttribution") or {}).get("displayName"),
-                "relative_time": review.get("relativePublishTimeDescription"),
-                "text": text_value,
+                "name": (review.get("authorAttribution") or {}).get("displayName"),
+                "date": review.get("relativePublishTimeDescription"),
+                "comment": text_value,
                 "google_maps_uri": review.get("googleMapsUri"),
             }
         )
 
     # Cache the response for a short period to reduce API usage.
-    _google_cache[place_id] = {"ts": now, "data": data}
+    entry = {"ts": now, "data": data}
+    _google_cache[(profile, place_id)] = entry
+    cache.set(GOOGLE_SHARED_KEY.format(profile=profile, place_id=place_id), entry, GOOGLE_CACHE_TTL)
     return data
 
 
@@ -193,7 +277,7 @@ def _attach_google_summaries(businesses):
         b.google_fill_percent = None
         b.google_maps_uri = None
         if b.google_place_id:
-            google = get_google_place_data(b.google_place_id)
+            google = get_google_place_data(b.google_place_id, profile="summary")
             if google.get("google_rating") is not None:
                 b.google_rating = google.get("google_rating")
                 b.google_user_count = google.get("google_count") or 0
@@ -203,100 +287,137 @@ def _attach_google_summaries(businesses):
 
 # Parse bookmark IDs from session into a set of ints.
 def _get_bookmark_ids(request):
+    # Visitors without a session cookie have no bookmarks; skip the session entirely so
+    # read-only page views cost no session query and don't mark the response Vary: Cookie.
+    if request.session.session_key is None:
+        return set()
     raw_ids = request.session.get("bookmarks", [])
     return {int(v) for v in raw_ids if str(v).isdigit()}
 
 
 # Verify reCAPTCHA responses for user-submitted forms.
 def _verify_recaptcha(request, recaptcha_response):
-    if not settings.RECAPTCHA_SITE_KEY or not settings.RECAPTCHA_SECRET_KEY:
-        return False, "reCAPTCHA is not configured. Please try again later."
+    return recaptcha.verify(recaptcha_response, client_ip(request))
 
-    if not recaptcha_response:
-        return False, "Please complete the reCAPTCHA to submit the form."
 
-    payload = urllib.parse.urlencode(
+HOME_SORTS = ("top", "google", "az")
+# Card sections on the homepage, keyed by lowercased category.
+HOME_BUCKETS = ("coffee", "restaurants", "shopping", "attractions")
+
+
+# Sort enriched businesses for a homepage sort mode.
+def _sort_businesses(businesses, sort):
+    if sort == "az":
+        return sorted(businesses, key=lambda b: (b["name"],))
+    if sort == "google":
+        return sorted(
+            businesses,
+            key=lambda b: (
+                -(b["google_rating"] or 0),
+                -(b["google_user_count"] or 0),
+                b["name"],
+            ),
+        )
+    return sorted(businesses, key=lambda b: (-(b["avg_rating"] or 0), -b["review_count"], b["name"]))
+
+
+# Split sorted businesses into the homepage sections.
+def _bucket_businesses(businesses):
+    buckets = {name: [] for name in HOME_BUCKETS}
+    buckets["other"] = []
+    for b in businesses:
+        category = (b["category"] or "").lower()
+        if category in buckets:
+            buckets[category].append(b)
+        # Mirrors the template's old substring test, so e.g. "shop" stays out of "other".
+        if not category or category not in "coffee restaurants shopping attractions":
+            buckets["other"].append(b)
+    return buckets
+
+
+# Annotated, Google-enriched businesses as the plain dicts the homepage cards need.
+def _home_businesses():
+    businesses = list(_annotate_reviews(Business.objects.all()))
+    _attach_google_summaries(businesses)
+    return [
         {
-            "secret": settings.RECAPTCHA_SECRET_KEY,
-            "response": recaptcha_response,
-            "remoteip": request.META.get("REMOTE_ADDR", ""),
+            "name": b.name,
+            "slug": b.slug,
+            "category": b.category,
+            # The card shows at most 140 characters.
+            "description": b.description[:141],
+            "website": b.website,
+            "avg_rating": b.avg_rating,
+            "review_count": b.review_count,
+            "google_rating": b.google_rating,
+            "google_user_count": b.google_user_count,
         }
-    ).encode("utf-8")
+        for b in businesses
+    ]
 
-    try:
-        # POST to Google's verification endpoint.
-        req = urllib.request.Request(
-            "https://www.google.com/recaptcha/api/siteverify",
-            data=payload,
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-    except (urllib.error.URLError, ValueError):
-        # Treat network/parse errors as failed verification.
-        return False, "Verification failed. Please try again."
 
-    if not data.get("success"):
-        return False, "reCAPTCHA verification failed. Please try again."
+# The homepage news cards as plain dicts (what the template reads).
+def _recent_news():
+    posts = NewsPost.objects.filter(is_published=True).select_related("image").order_by("-published_at")[:4]
+    return [
+        {
+            "title": post.title,
+            "summary": post.summary,
+            "source_name": post.source_name,
+            "source_url": post.source_url,
+            "published_at": post.published_at,
+            "image_id": post.image_id,
+            "image": {"urls": post.image.urls} if post.image_id else None,
+        }
+        for post in posts
+    ]
 
-    return True, ""
+
+# Homepage context for every sort mode, computed once; stored by build_home_snapshot.
+def build_home_snapshot():
+    businesses = _home_businesses()
+    sorts = {
+        sort: {"sort": sort, "buckets": _bucket_businesses(_sort_businesses(businesses, sort))}
+        for sort in HOME_SORTS
+    }
+    return snapshots.store_home(sorts, _recent_news())
 
 
-# Homepage: list businesses with sort options and summary ratings.
+# Homepage: list businesses with sort options and summary ratings. The snapshot row read
+# is the only query when it exists; without it the live render adds two.
+@replica_reads
+@query_budget(3, "home")
 def home(request):
     # Default to top-rated ordering when no sort parameter is supplied.
     sort = request.GET.get("sort", "top")
-    businesses = list(_annotate_reviews(Business.objects.all()))
-
-    # Attach Google review summaries for display.
-    _attach_google_summaries(businesses)
-
-    # Sort according to the selected mode.
-    if sort == "az":
-        businesses.sort(key=lambda b: (b.name,))
-    elif sort == "google":
-        businesses.sort(
-            key=lambda b: (
-                -(b.google_rating or 0),
-                -(b.google_user_count or 0),
-                b.name,
-            )
-        )
-    else:
+    if sort not in HOME_SORTS:
         sort = "top"
-        businesses.sort(key=lambda b: (-(b.avg_rating or 0), -b.review_count, b.name))
 
-    recent_news = NewsPost.objects.filter(is_published=True).order_by("-published_at")[:4]
-    return render(request, "home.html", {"businesses": businesses, "sort": sort, "recent_news": recent_news})
+    # Serve the prebuilt snapshot; compute live only when it's missing.
+    snapshot = snapshots.load_home()
+    if snapshot is not None:
+        context = dict(snapshot["sorts"][sort], recent_news=snapshot["recent_news"])
+    else:
+        businesses = _sort_businesses(_home_businesses(), sort)
+        context = {"sort": sort, "buckets": _bucket_businesses(businesses), "recent_news": _recent_news()}
+    thumbnails.touch({post["image_id"] for post in context["recent_news"] if post["image_id"]})
+    return render(request, "home.html", context)
 
-# Business detail page with combined Ouray + Google reviews.
-def business_detail(request, slug):
-    b = get_object_or_404(Business, slug=slug)
+# Detail page context with combined Ouray + Google reviews; shared by the review form.
+def _business_context(request, b, review_form=None):
     # Build summary stats from approved local reviews.
     approved_reviews = b.reviews.filter(is_approved=True)
     stats = approved_reviews.aggregate(avg=Avg("rating"), count=Count("id"))
     avg_rating = stats["avg"] or 0
     review_count = stats["count"] or 0
-    reviews = list(approved_reviews)
+    local_reviews = list(approved_reviews)
     is_bookmarked = b.id in _get_bookmark_ids(request)
     google_place_id = b.google_place_id or ""
-    google = get_google_place_data(google_place_id)
-    google_reviews = google.get("google_reviews", [])
+    google = get_google_place_data(google_place_id, profile="full")
 
-    # Merge Google reviews first, then fill with local reviews.
-    combined_reviews = []
-    for review in google_reviews:
-        combined_reviews.append(
-            {
-                "source": "google",
-                "rating": review.get("rating"),
-                "name": review.get("author"),
-                "date": review.get("relative_time"),
-                "comment": review.get("text"),
-                "google_maps_uri": review.get("google_maps_uri"),
-            }
-        )
-    for review in reviews:
+    # Google reviews first (cached pre-normalized; copy the list, not the dicts), then local ones.
+    combined_reviews = list(google.get("google_reviews", []))
+    for review in local_reviews:
         if len(combined_reviews) >= 20:
             break
         combined_reviews.append(
@@ -314,6 +435,9 @@ def business_detail(request, slug):
     google_user_count = google.get("google_count") or 0
     google_fill_percent = _rating_to_percent(google_rating)
     google_maps_uri = google.get("google_url")
+    nearby_businesses = []
+    if b.latitude is not None:
+        nearby_businesses = geo.nearby(b.latitude, b.longitude, settings.NEARBY_RADIUS_KM, limit=4, exclude=b.pk)
     # Template context for the detail page and review form.
     context = {
         "b": b,
@@ -322,17 +446,40 @@ def business_detail(request, slug):
         "combined_reviews": combined_reviews[:20],
         "site_key": settings.RECAPTCHA_SITE_KEY,
         "is_bookmarked": is_bookmarked,
-        "review_form": {"rating": "", "name": "", "email": "", "comment": ""},
+        "review_form": review_form or {"rating": "", "name": "", "email": "", "comment": ""},
+        # Closest other businesses, when this one has been geocoded.
+        "nearby": nearby_businesses,
+        # Idempotency key for the review form (replaced client-side on pre-rendered pages).
+        "submission_key": uuid.uuid4().hex,
         "ouray_fill_percent": ouray_fill_percent,
         "google_rating": google_rating,
         "google_user_count": google_user_count,
         "google_fill_percent": google_fill_percent,
         "google_maps_uri": google_maps_uri,
     }
-    return render(request, "business_detail.html", context)
+    return context
+
+
+# Business detail page with combined Ouray + Google reviews.
+@replica_reads
+@query_budget(5, "business_detail")
+def business_detail(request, slug):
+    b = get_object_or_404(Business, slug=slug)
+    return render(request, "business_detail.html", _business_context(request, b))
+
+
+# Re-render the detail page with the visitor's input and an inline error.
+def _review_error(request, b, review_form, message, status=200):
+    context = _business_context(request, b, review_form)
+    context["review_error"] = message
+    return render(request, "business_detail.html", context, status=status)
 
 
-# Handle review submissions and re-render on validation errors.
+# Handle review submissions: throttle, dedupe by idempotency key, validate, then save
+# (or stage for a bulk flush). The detail context is only built when showing an error.
+# The staged path is the most expensive: listing, two key checks, the insert in its own
+# savepoint, and queueing the flush job.
+@query_budget(8, "review_submit")
 def review_submit(request, slug):
     if request.method != "POST":
         return redirect("business_detail", slug=slug)
@@ -344,67 +491,12 @@ def review_submit(request, slug):
     email = request.POST.get("email", "").strip()
     comment = request.POST.get("comment", "").strip()
     recaptcha_response = request.POST.get("g-recaptcha-response", "")
+    submission_key = reviews.clean_submission_key(request.POST.get("submission_key"))
+    review_form = {"rating": rating_raw, "name": name, "email": email, "comment": comment}
 
-    # Rebuild the detail context so errors can be shown inline.
-    approved_reviews = b.reviews.filter(is_approved=True)
-    stats = approved_reviews.aggregate(avg=Avg("rating"), count=Count("id"))
-    avg_rating = stats["avg"] or 0
-    review_count = stats["count"] or 0
-    reviews = list(approved_reviews)
-    is_bookmarked = b.id in _get_bookmark_ids(request)
-    google = get_google_place_data(b.google_place_id)
-    google_reviews = google.get("google_reviews", [])
-
-    combined_reviews = []
-    for review in google_reviews:
-        combined_reviews.append(
-            {
-                "source": "google",
-                "rating": review.get("rating"),
-                "name": review.get("author"),
-                "date": review.get("relative_time"),
-                "comment": review.get("text"),
-                "google_maps_uri": review.get("google_maps_uri"),
-            }
-        )
-    for review in reviews:
-        if len(combined_reviews) >= 20:
-            break
-        combined_reviews.append(
-            {
-                "source": "ouray",
-                "rating": review.rating,
-                "name": review.name,
-                "date": review.created_at,
-                "comment": review.comment,
-            }
-        )
-
-    ouray_fill_percent = _rating_to_percent(avg_rating)
-    google_rating = google.get("google_rating")
-    google_user_count = google.get("google_count") or 0
-    google_fill_percent = _rating_to_percent(google_rating)
-    google_maps_uri = google.get("google_url")
-
-    context = {
-        "b": b,
-        "avg_rating": avg_rating,
-        "review_count": review_count,
-        "combined_reviews": combined_reviews[:20],
-        "site_key": settings.RECAPTCHA_SITE_KEY,
-        "is_bookmarked": is_bookmarked,
-        "review_form": {
-            "rating": rating_raw,
-            "name": name,
-            "email": email,
-            "comment": comment,
-        },
-        "ouray_fill_percent": ouray_fill_percent,
-        "google_rating": google_rating,
-        "google_user_count": google_user_count,
-        "google_fill_percent": google_fill_percent,
-        "google_maps_uri": google_maps_uri,
-    }
+    # A double click or retry of an accepted form lands on the page it already produced.
+    if reviews.already_submitted(submission_key):
+        return redirect("business_detail", slug=slug)
 
     # Validate rating input before saving.
     try:
@@ -413,37 +505,37 @@ def review_submit(request, slug):
         rating = 0
 
     if rating < 1 or rating > 5:
-        context["review_error"] = "Please choose a rating between 1 and 5."
-        return render(request, "business_detail.html", context)
+        return _review_error(request, b, review_form, "Please choose a rating between 1 and 5.")
 
     # Validate comment length and presence.
     if not comment:
-        context["review_error"] = "Please add a short comment."
-        return render(request, "business_detail.html", context)
+        return _review_error(request, b, review_form, "Please add a short comment.")
 
     if len(comment) > 1000:
-        context["review_error"] = "Comment is too long (1000 characters max)."
-        return render(request, "business_detail.html", context)
-
-    # Validate reCAPTCHA before accepting submission.
-    ok, error = _verify_recaptcha(request, recaptcha_response)
-    if not ok:
-        context["review_error"] = error
-        return render(request, "business_detail.html", context)
-
-    # Create the review (approval default handled by model).
-    Review.objects.create(
-        business=b,
-        rating=rating,
-        name=name,
-        email=email,
-        comment=comment,
-    )
+        return _review_error(request, b, review_form, "Comment is too long (1000 characters max).")
+
+    # Throttle per client IP and per listing; only well-formed submissions count.
+    allowed, _ = check_rate_limits("review", [f"ip:{client_ip(request)}"], settings.REVIEW_RATE_LIMITS)
+    if allowed:
+        allowed, _ = check_rate_limits("review", [f"business:{b.pk}"], settings.REVIEW_BUSINESS_RATE_LIMITS)
+    if not allowed:
+        return _review_error(
+            request, b, review_form, "Too many reviews right now. Please try again later.", status=429
+        )
 
+    # Validate reCAPTCHA before accepting submission. A repeated token is a double submit,
+    # which the submission key already dedupes.
+    verification = _verify_recaptcha(request, recaptcha_response)
+    if not verification.ok:
+        return _review_error(request, b, review_form, verification.error)
+
+    # Create (or stage) the review; approval default handled by model.
+    reviews.submit(b, rating, name, email, comment, submission_key)
     return redirect("business_detail", slug=slug)
 
 
 # Toggle a business bookmark stored in the session.
+@query_budget(4, "bookmark_toggle")
 def bookmark_toggle(request, slug):
     if request.method != "POST":
         return redirect("business_detail", slug=slug)
@@ -457,11 +549,19 @@ def bookmark_toggle(request, slug):
         bookmark_ids.add(b.id)
 
     # Store sorted IDs to keep session data stable.
-    request.session["bookmarks"] = sorted(bookmark_ids)
+    if bookmark_ids:
+        request.session["bookmarks"] = sorted(bookmark_ids)
+    else:
+        request.session.pop("bookmarks", None)
+        # Nothing left worth a session: drop the row and the cookie (keeps admin logins).
+        if not request.session.keys():
+            request.session.flush()
     return redirect("business_detail", slug=slug)
 
 
 # List all bookmarked businesses with rating summaries.
+@replica_reads
+@query_budget(2, "bookmarks")
 def bookmarks(request):
     bookmark_ids = _get_bookmark_ids(request)
     businesses = list(
@@ -473,7 +573,48 @@ def bookmarks(request):
     return render(request, "directory/bookmarks.html", {"businesses": businesses})
 
 
-# Contact form with reCAPTCHA and email delivery.
+# Per-visitor state for pre-rendered pages: a CSRF token and the bookmarked IDs.
+@never_cache
+@query_budget(1, "session_state")
+def session_state(request):
+    return JsonResponse({"csrf_token": get_token(request), "bookmarks": sorted(_get_bookmark_ids(request))})
+
+
+# Businesses near a point, nearest first: /nearby/?lat=&lng=&radius=<km>&limit=.
+# One bounded query whatever the radius (see geo.nearby).
+@replica_reads
+@query_budget(1, "nearby")
+def nearby(request):
+    try:
+        lat = float(request.GET["lat"])
+        lng = float(request.GET["lng"])
+        radius = float(request.GET.get("radius", settings.NEARBY_RADIUS_KM))
+        limit = int(request.GET.get("limit", 10))
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "lat and lng are required; radius and limit must be numbers"}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or not radius > 0:
+        return JsonResponse({"error": "Coordinates out of range"}, status=400)
+    radius = min(radius, settings.NEARBY_MAX_RADIUS_KM)
+    limit = max(1, min(limit, 50))
+
+    results = [
+        {
+            "name": row["name"],
+            "slug": row["slug"],
+            "category": row["category"],
+            "address": row["address"],
+            "lat": row["latitude"],
+            "lng": row["longitude"],
+            "distance_km": row["distance_km"],
+            "url": reverse("business_detail", args=[row["slug"]]),
+        }
+        for row in geo.nearby(lat, lng, radius, limit=limit)
+    ]
+    return JsonResponse({"radius_km": radius, "results": results})
+
+
+# Contact form with reCAPTCHA; the email itself is sent by the job queue.
+@query_budget(1, "contact")
 def contact(request):
     context = {"site_key": settings.RECAPTCHA_SITE_KEY}
 
@@ -486,40 +627,10 @@ def contact(request):
 
         context.update({"name": name, "email": email, "message": message})
 
-        # Guard rails if reCAPTCHA is not configured.
-        if not settings.RECAPTCHA_SITE_KEY or not settings.RECAPTCHA_SECRET_KEY:
-            context["error"] = "reCAPTCHA is not configured. Please try again later."
-            return render(request, "directory/contact.html", context)
-
-        # Require a reCAPTCHA response.
-        if not recaptcha_response:
-            context["error"] = "Please complete the reCAPTCHA to submit the form."
-            return render(request, "directory/contact.html", context)
-
-        payload = urllib.parse.urlencode(
-            {
-                "secret": settings.RECAPTCHA_SECRET_KEY,
-                "response": recaptcha_response,
-                "remoteip": request.META.get("REMOTE_ADDR", ""),
-            }
-        ).encode("utf-8")
-
-        try:
-            # Verify the token with Google's endpoint.
-            req = urllib.request.Request(
-                "https://www.google.com/recaptcha/api/siteverify",
-                data=payload,
-                method="POST",
-            )
-            with urllib.request.urlopen(req, timeout=8) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-        except (urllib.error.URLError, ValueError):
-            context["error"] = "Verification failed. Please try again."
-            return render(request, "directory/contact.html", context)
-
-        # Reject failed verification responses.
-        if not data.get("success"):
-            context["error"] = "reCAPTCHA verification failed. Please try again."
+        # Validate reCAPTCHA (shared verification, remembered per token).
+        verification = _verify_recaptcha(request, recaptcha_response)
+        if not verification.ok:
+            context["error"] = verification.error
             return render(request, "directory/contact.html", context)
 
         # Fail fast if email settings are not configured.
@@ -527,26 +638,12 @@ def contact(request):
             context["error"] = "Email is not configured. Please try again later."
             return render(request, "directory/contact.html", context)
 
-        # Prepare the email payload.
-        subject = "New Ouray Info Contact Form Submission"
-        body = (
-            f"Name: {name}\n"
-            f"Email: {email}\n\n"
-            f"Message:\n{message}\n"
-        )
+        # A double-click resubmits the same token; the first request already queued the email.
+        if verification.repeated:
+            return redirect("contact_success")
 
-        try:
-            # Send the email to the configured recipients.
-            send_mail(
-                subject,
-                body,
-                settings.DEFAULT_FROM_EMAIL,
-                settings.CONTACT_RECIPIENTS,
-                fail_silently=False,
-            )
-        except Exception:
-            context["error"] = "Email sending failed. Please try again."
-            return render(request, "directory/contact.html", context)
+        # Hand delivery to the job queue so a slow mail relay never blocks the request.
+        enqueue("send_contact_email", {"name": name, "email": email, "message": message})
 
         # Redirect to a success page to avoid resubmission on refresh.
         return redirect("contact_success")
@@ -555,21 +652,81 @@ def contact(request):
 
 
 # Simple success confirmation page.
+@query_budget(0, "contact_success")
 def contact_success(request):
     return render(request, "directory/contact_success.html")
 
 
 # News list page: all published posts, newest first.
+@replica_reads
+@query_budget(1, "news")
 def news(request):
-    posts = NewsPost.objects.filter(is_published=True).order_by("-published_at")
+    posts = list(NewsPost.objects.filter(is_published=True).select_related("image").order_by("-published_at"))
+    thumbnails.touch({post.image_id for post in posts if post.image_id})
     return render(request, "directory/news.html", {"posts": posts})
 
 
+# sitemap.xml: every listing with its last change, built incrementally and cached.
+@replica_reads
+@query_budget(4, "sitemap")
+def sitemap(request):
+    return HttpResponse(sitemap_xml(request.build_absolute_uri("/")), content_type="application/xml")
+
+
+# Paths crawlers should skip: per-visitor pages, POST endpoints and the model-backed chatbot.
+ROBOTS_DISALLOW = (
+    "/admin/",
+    "/bookmarks/",
+    "/business/*/bookmark/",
+    "/business/*/review/",
+    "/chatbot/",
+    "/metrics/",
+    "/nearby/",
+    "/session/",
+)
+
+
+@query_budget(0, "robots_txt")
+def robots_txt(request):
+    lines = ["User-agent: *"] + [f"Disallow: {path}" for path in ROBOTS_DISALLOW]
+    lines += ["", f"Sitemap: {request.build_absolute_uri(reverse('sitemap'))}"]
+    return HttpResponse("\n".join(lines) + "\n", content_type="text/plain")
+
+
+def _record_chatbot_usage(usage):
+    if usage:
+        record_token_usage("chatbot", (usage.input_tokens or 0) + (usage.output_tokens or 0))
+
+
+# Fold earlier exchanges into a short summary; its tokens count against the daily budget
+# and the conversation's own total.
+def _summarize_conversation(client, state, summary, exchanges):
+    response = client.messages.create(
+        model=CHATBOT_MODEL,
+        max_tokens=conversations.SUMMARY_MAX_TOKENS,
+        system=conversations.SUMMARY_PROMPT,
+        messages=[{"role": "user", "content": conversations.transcript(summary, exchanges)}],
+    )
+    usage = getattr(response, "usage", None)
+    _record_chatbot_usage(usage)
+    conversations.add_usage(state, usage)
+    return response.content[0].text
+
+
 # Chatbot endpoint: accepts a user message and returns a Claude reply with business context.
+@query_budget(2, "chatbot")
 def chatbot(request):
     if request.method != "POST":
         return JsonResponse({"error": "Method not allowed"}, status=405)
 
+    # Throttle before any DB work: per IP and per existing session, then the daily token budget.
+    identities = [f"ip:{client_ip(request)}"]
+    if request.session.session_key:
+        identities.append(f"session:{request.session.session_key}")
+    allowed, retry_after = check_rate_limits("chatbot", identities, settings.CHATBOT_RATE_LIMITS)
+    if not allowed:
+        return too_many_requests("You're sending messages too quickly. Please wait a moment.", retry_after)
+
     try:
         data = json.loads(request.body)
         message = data.get("message", "").strip()[:1000]
@@ -579,6 +736,27 @@ def chatbot(request):
     if not message:
         return JsonResponse({"error": "No message provided"}, status=400)
 
+    # Follow-ups are answered with the conversation so far, kept server-side per browser.
+    conversation = conversations.conversation_id(request)
+    state = conversations.load(conversation)
+    is_new = conversation is None
+    conversation = conversation or conversations.new_id()
+    first_turn = not conversations.has_history(state)
+
+    # Repeated opening questions are answered from cache without touching the DB or the
+    # model; follow-ups depend on context, so they never are.
+    if first_turn:
+        cached_reply = chatcache.get_reply(message, CHATBOT_PROMPT_VERSION)
+        if cached_reply is not None:
+            conversations.record_turn(conversation, state, message, cached_reply)
+            response = JsonResponse({"reply": cached_reply, "cached": True})
+            if is_new:
+                conversations.set_cookie(response, conversation)
+            return response
+
+    if tokens_used_today("chatbot") >= settings.CHATBOT_DAILY_TOKEN_BUDGET:
+        return too_many_requests("The guide is resting for today. Please try again tomorrow.", 3600)
+
     # Build business context from the full directory.
     businesses = Business.objects.all().order_by("name")
     entries = []
@@ -611,26 +789,45 @@ def chatbot(request):
     news_context = "\n".join(news_lines) if news_lines else "No recent news available."
 
     system_prompt = (
-        "You are a friendly local guide for Ouray, Colorado — a small mountain town known as the "
-        "'Switzerland of America.' You help visitors and locals discover businesses and stay up to date "
-        "on local news.\n\n"
-        "Use the business directory and recent news below to answer questions. Keep answers concise "
-        "and friendly. If something is not in the data, say so and suggest they browse ouray.info. "
-        "Never make up details.\n\n"
+        f"{CHATBOT_PROMPT_INTRO}"
         f"OURAY BUSINESS DIRECTORY:\n\n{business_context}\n\n"
         f"RECENT LOCAL NEWS:\n\n{news_context}"
+        f"{conversations.summary_prompt(state)}"
     )
 
+    # The SDK takes over a second to import; only chatbot requests pay for it (gunicorn
+    # preloads it in the master, see config/startup.py).
+    import anthropic
+
     try:
         client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-        response = client.messages.create(
-            model="claude-opus-4-8",
-            max_tokens=500,
-            system=system_prompt,
-            messages=[{"role": "user", "content": message}],
-        )
-        reply = response.content[0].text
+        # Cap in-flight model calls across all workers; wait briefly for a slot.
+        with concurrency_slot(
+            "chatbot",
+            settings.CHATBOT_MAX_CONCURRENT,
+            settings.CHATBOT_QUEUE_SIZE,
+            settings.CHATBOT_QUEUE_TIMEOUT,
+        ), track_http(str(client.base_url)):
+            response = client.messages.create(
+                model=CHATBOT_MODEL,
+                max_tokens=500,
+                system=system_prompt,
+                messages=conversations.messages(state, message),
+            )
+            reply = response.content[0].text
+            usage = getattr(response, "usage", None)
+            _record_chatbot_usage(usage)
+            # Compaction's summary call, when due, runs in the same slot.
+            summarize = functools.partial(_summarize_conversation, client, state)
+            conversations.record_turn(conversation, state, message, reply, usage, summarize)
+    except ConcurrencyLimitExceeded:
+        return too_many_requests("The guide is busy right now. Try again in a moment.", 5)
     except Exception:
         return JsonResponse({"error": "Sorry, I couldn't reach the AI right now. Try again in a moment."}, status=502)
 
-    return JsonResponse({"reply": reply})
+    if first_turn:
+        chatcache.set_reply(message, CHATBOT_PROMPT_VERSION, reply)
+    response = JsonResponse({"reply": reply})
+    if is_new:
+        conversations.set_cookie(response, conversation)
+    return response
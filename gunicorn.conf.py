@@ -0,0 +1,48 @@
+import gc
+import os
+
+# Gunicorn reads this file from the working directory; every value can be set from the
+# environment (Render provides PORT and WEB_CONCURRENCY).
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+# Recycle workers to bound memory growth; with preload a replacement is a cheap fork.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# Import the app once in the master so forked workers share it copy-on-write.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+# Runs in the master after the app is loaded: finish lazy imports, then move everything
+# allocated so far out of the GC's reach so collections don't touch (and copy) shared pages.
+def when_ready(server):
+    if not preload_app:
+        return
+    from config.startup import warm_up
+    from directory.checks import shared_cache_check
+
+    # Surface configuration warnings (e.g. a per-process cache) in the server log.
+    for warning in shared_cache_check(None):
+        server.log.warning("%s %s", warning.msg, warning.hint)
+    warm_up()
+    gc.freeze()
+
+
+# Never inherit database connections from the master (Django is only loaded there with preload).
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from django.db import connections
+
+    connections.close_all()
+
+
+# Each worker runs its own invalidation listener once the app is loaded.
+def post_worker_init(worker):
+    from django.conf import settings
+
+    if settings.INVALIDATION_BUS:
+        from directory.invalidation import start_listener
+
+        start_listener()
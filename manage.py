@@ -6,8 +6,10 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    # Point Django at the project settings module before command execution.
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    # Point Django at the project settings module before command execution; the test
+    # command gets the test settings unless DJANGO_SETTINGS_MODULE says otherwise.
+    settings_module = 'config.test_settings' if sys.argv[1:2] == ['test'] else 'config.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
     try:
         # Import lazily so missing Django raises a clear error below.
         from django.core.management import execute_from_command_line